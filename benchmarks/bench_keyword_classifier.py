@@ -0,0 +1,81 @@
+"""
+Benchmark keyword classification on synthetic updates
+
+Compares the nine-substring loop of OpenAISummarizer's fallback summary with that
+loop over the full lexicon and with KeywordClassifier.classify_batch, the weighted,
+whole-word classifier of the extractive summarizer. Run from the repository root:
+    
+    python benchmarks/bench_keyword_classifier.py [count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summarizers.keyword_classifier import DEFAULT_LEXICON, KeywordClassifier
+
+WORDS = (
+    "the service migration deploy api cluster team review release customer dashboard query "
+    "latency config rollout ticket page docs test build pipeline database index cache"
+).split()
+KEYWORDS = ["blocked", "issue", "can't", "need to", "next", "shipped", "done", "todo", "stuck", "will"]
+
+def synthetic_updates(count: int, seed: int = 7):
+    """Chat-sized texts with a keyword in roughly half of them"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(8, 60))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS))
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+def legacy_classify(content: str) -> str:
+    """The fallback summary's heuristic"""
+    lowered = content.lower()
+    if any(word in lowered for word in ["block", "issue", "problem", "can't", "cannot"]):
+        return "blockers"
+    if any(word in lowered for word in ["next", "todo", "need to", "should"]):
+        return "next_steps"
+    return "progress"
+
+def per_update_classify(content: str) -> str:
+    """The original loop, but over DEFAULT_LEXICON (first category with any keyword wins)"""
+    lowered = content.lower()
+    for category, keywords in DEFAULT_LEXICON.items():
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return "progress"
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    texts = synthetic_updates(count)
+    
+    started = time.perf_counter()
+    legacy = [legacy_classify(text) for text in texts]
+    legacy_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    [per_update_classify(text) for text in texts]
+    per_update_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    classifier = KeywordClassifier()
+    compile_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    batch = classifier.classify_batch(texts)
+    batch_seconds = time.perf_counter() - started
+    
+    print(f"{count} updates, {sum(map(len, texts)) / 1e6:.1f}M characters")
+    print(f"fallback any() loop:    {legacy_seconds:.3f}s (9 substrings)")
+    print(f"same loop, full lexicon: {per_update_seconds:.3f}s (unweighted, substring matches)")
+    print(f"classify_batch:         {batch_seconds:.3f}s (weighted, whole-word matches, "
+          f"compiled in {compile_seconds * 1000:.1f}ms)")
+    for category in classifier.categories:
+        print(f"  {category:<11} fallback {legacy.count(category):>6}  batch {batch.count(category):>6}")
+
+if __name__ == "__main__":
+    main()
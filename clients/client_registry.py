@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import aiohttp
+import httpx
+from jira import JIRA
+from notion_client import AsyncClient
+from requests.adapters import HTTPAdapter
+from slack_sdk.web.async_client import AsyncWebClient
+
+from .rate_limiter import RateLimit, RateLimiter
+from .smtp_pool import SMTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Published limits: Slack's per-method tiers (Tier 3 is 50+/min, Tier 4 100+/min, one
+# message per second per channel), Notion's three requests per second per integration.
+# Jira Cloud does not publish fixed numbers, so a conservative provider-wide rate is used.
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, RateLimit]] = {
+    "slack": {
+        "conversations.history": RateLimit(rate=50 / 60, burst=10),
+        "conversations.replies": RateLimit(rate=50 / 60, burst=10),
+        "conversations.list": RateLimit(rate=20 / 60, burst=5),
+        "users.info": RateLimit(rate=100 / 60, burst=20),
+        "chat.postMessage": RateLimit(rate=1.0, burst=3),
+    },
+    "jira": {
+        "*": RateLimit(rate=10.0, burst=20),
+    },
+    "notion": {
+        "*": RateLimit(rate=3.0, burst=10),
+    },
+}
+
+class ClientRegistry:
+    """
+    Process-wide registry of API clients and rate limiters
+    
+    Every fetcher, notifier and concurrent digest job that talks to the same provider
+    with the same credentials shares one client (and so one connection pool) and one
+    RateLimiter, so the process as a whole stays under the provider's limits.
+    """
+    
+    def __init__(self, rate_limits: Optional[Dict[str, Dict[str, RateLimit]]] = None, pool_size: int = 20):
+        """
+        Args:
+            rate_limits: Limits per provider and method (default: DEFAULT_RATE_LIMITS)
+            pool_size: Maximum pooled connections per provider
+        """
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self.pool_size = pool_size
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._clients: Dict[tuple, Any] = {}
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+    
+    def rate_limiter(self, provider: str) -> RateLimiter:
+        """Return the shared RateLimiter for a provider"""
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                limiter = self._limiters[provider] = RateLimiter(provider, self.rate_limits.get(provider, {}))
+            return limiter
+    
+    def _get_or_create(self, key: tuple, factory):
+        """Return the client cached under `key`, building it with `factory` on first use"""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+    
+    def slack_client(self, token: str):
+        """
+        Return the shared async Slack client for a bot token
+        
+        The client needs an event loop for its connection pool; call `bind_session`
+        from async code before using it.
+        """
+        return self._get_or_create(("slack", token), lambda: AsyncWebClient(token=token))
+    
+    def jira_client(self, server: str, email: str, api_token: str):
+        """
+        Return the shared Jira client for a server and account
+        
+        The client's own 429 retries are disabled because `RateLimiter.call` handles
+        them for every caller at once, and its connection pool is sized for
+        concurrent worker threads.
+        """
+        def build():
+            client = JIRA(server=server, basic_auth=(email, api_token), max_retries=0)
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            client._session.mount("https://", adapter)
+            client._session.mount("http://", adapter)
+            return client
+        
+        return self._get_or_create(("jira", server, email), build)
+    
+    def notion_client(self, api_key: str):
+        """Return the shared async Notion client for an integration token"""
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        return self._get_or_create(
+            ("notion", api_key), lambda: AsyncClient(auth=api_key, client=httpx.AsyncClient(limits=limits))
+        )
+    
+    def smtp_pool(
+        self,
+        hostname: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        start_tls: bool = True,
+        size: int = 4
+    ) -> SMTPConnectionPool:
+        """Return the shared SMTP connection pool for a server and account"""
+        return self._get_or_create(
+            ("smtp", hostname, port, username),
+            lambda: SMTPConnectionPool(hostname, port, username, password, start_tls=start_tls, size=size)
+        )
+    
+    async def session(self) -> aiohttp.ClientSession:
+        """Return the pooled aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+            self._sessions[loop] = session
+        return session
+    
+    async def bind_session(self, client: Any):
+        """
+        Point a Slack client at the pooled session of the running event loop
+        
+        Without a session the Slack SDK opens and closes a new connection for every
+        request. Clients other than AsyncWebClient (e.g. test doubles) are left alone.
+        """
+        if not isinstance(client, AsyncWebClient):
+            return
+        session = await self.session()
+        if client.session is not session:
+            client.session = session
+    
+    async def close(self):
+        """Close the pooled session and SMTP connections of the running event loop"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+        with self._lock:
+            pools = [client for client in self._clients.values() if isinstance(client, SMTPConnectionPool)]
+        for pool in pools:
+            await pool.close()
+
+_default_registry: Optional[ClientRegistry] = None
+
+def get_default_client_registry() -> ClientRegistry:
+    """Return the process-wide client registry"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ClientRegistry()
+    return _default_registry
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_WIDE = "*"
+
+class RateLimit(BaseModel):
+    """Sustained request rate and burst size for one token bucket"""
+    rate: float  # Requests per second
+    burst: int = 1  # Requests that may be sent back to back before the rate applies
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    
+    Callers reserve tokens up front and then sleep for however long the reservation
+    takes to become valid, so concurrent callers are spaced out instead of all waking
+    at once. A Retry-After from the server pauses the whole bucket: no tokens are
+    added while it is paused, and requests reserved meanwhile are spaced at the rate
+    from the end of the pause.
+    """
+    
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket
+        
+        Args:
+            tokens: Number of tokens to take
+        
+        Returns:
+            Seconds to wait before the request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Time spent paused earns no tokens
+            refill_from = max(self._updated, min(self._paused_until, now))
+            self._tokens = min(self.limit.burst, self._tokens + (now - refill_from) * self.limit.rate)
+            self._updated = now
+            self._tokens -= tokens
+            deficit = -self._tokens / self.limit.rate if self._tokens < 0 else 0.0
+            return max(self._paused_until - now, 0.0) + deficit
+    
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds` and drop any saved-up burst beyond one request"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 1.0)
+
+class RateLimiter:
+    """
+    Per-provider rate limiter with a provider-wide bucket and one bucket per API method
+    
+    Limits are keyed by method name (e.g. "conversations.history"); the "*" entry
+    applies to every request to the provider. Methods without a configured limit only
+    go through the provider-wide bucket. A `scope` gives a method one bucket per
+    resource, for limits such as Slack's one message per second per channel.
+    """
+    
+    def __init__(
+        self,
+        provider: str,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        max_retries: int = 3,
+        default_backoff: float = 1.0
+    ):
+        """
+        Args:
+            provider: Provider name, used in log messages
+            limits: Rate limits keyed by method name, with "*" for the whole provider
+            max_retries: Times a rate-limited request is retried before giving up
+            default_backoff: Seconds to back off on a 429 without a Retry-After header
+        """
+        self.provider = provider
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.default_backoff = default_backoff
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def _bucket(self, method: str, scope: Optional[str] = None) -> Optional[TokenBucket]:
+        """Return the bucket for a method (and scope), creating it on first use"""
+        limit = self.limits.get(method)
+        if limit is None:
+            return None
+        
+        key = (method, scope)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(limit)
+            return bucket
+    
+    def _buckets_for(self, method: str, scope: Optional[str]):
+        """The provider-wide bucket and the method's bucket, where configured"""
+        buckets = [self._bucket(PROVIDER_WIDE), self._bucket(method, scope) if method != PROVIDER_WIDE else None]
+        return [bucket for bucket in buckets if bucket is not None]
+    
+    async def acquire(self, method: str = PROVIDER_WIDE, scope: Optional[str] = None):
+        """
+        Wait until a request to `method` is allowed
+        
+        Args:
+            method: API method name
+            scope: Optional resource the method's limit applies to (e.g. a channel id)
+        """
+        wait = max((bucket.reserve() for bucket in self._buckets_for(method, scope)), default=0.0)
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def backoff(self, method: str, seconds: float, scope: Optional[str] = None):
+        """
+        Pause all requests to `method` and the provider after a rate-limit response
+        
+        Args:
+            method: API method that was rate limited
+            seconds: How long the server asked us to wait
+            scope: Optional resource the method's limit applies to
+        """
+        logger.warning(f"{self.provider} rate limited on {method}; backing off for {seconds:.1f}s")
+        for bucket in self._buckets_for(method, scope):
+            bucket.pause(seconds)
+    
+    async def call(
+        self,
+        method: str,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        scope: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Call an async API function under the rate limit, retrying 429 responses
+        
+        A 429 pauses the shared buckets for the Retry-After period, so every other
+        caller of the same provider backs off too instead of hitting the limit again.
+        
+        Args:
+            method: API method name used to pick the bucket
+            func: Async callable making the request
+            *args: Positional arguments for the callable
+            scope: Optional resource the method's limit applies to
+            **kwargs: Keyword arguments for the callable
+        
+        Returns:
+            Whatever the callable returns
+        """
+        attempt = 0
+        while True:
+            await self.acquire(method, scope)
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = retry_after(e, self.default_backoff * 2 ** attempt)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.backoff(method, delay, scope)
+
+def retry_after(error: Exception, default: float) -> Optional[float]:
+    """
+    Return how long to wait before retrying a failed request
+    
+    Understands the errors raised by the Slack, Jira and Notion SDKs.
+    
+    Args:
+        error: Exception raised by an SDK call
+        default: Delay to use for a 429 without a Retry-After header
+    
+    Returns:
+        Seconds to wait, or None if the error is not a rate-limit response
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return default
+    
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,265 @@
+import asyncio
+import inspect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from .rate_limiter import retry_after
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+
+class ResiliencePolicy(BaseModel):
+    """Deadlines, retries, hedging and circuit-breaker settings for one provider"""
+    timeout: float = 60.0  # Seconds per attempt
+    deadline: float = 180.0  # Seconds for the whole call, retries included
+    max_retries: int = 2
+    base_delay: float = 0.5  # First retry waits up to this long (full jitter), doubling each time
+    max_delay: float = 8.0
+    # Send a duplicate request when an attempt is slower than this percentile of recent
+    # successful latencies (e.g. 95); None disables hedging
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = 20  # Successful calls needed before hedging starts
+    failure_threshold: int = 5  # Consecutive failed attempts that open the circuit
+    reset_timeout: float = 60.0  # Seconds the circuit stays open before a probe is let through
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    
+    Closed, it lets every call through. After ``failure_threshold`` failures in a row
+    it opens and rejects calls outright for ``reset_timeout`` seconds; then it lets a
+    single probe through (half-open) and closes again if the probe succeeds.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, name: str = "circuit"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the reset timeout has passed"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            return self._state
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in the half-open state only one probe is allowed"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        with self._lock:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        """Close the circuit and reset the failure count"""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probing = False
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit at the threshold or after a failed probe"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+    
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+    
+    def record(self, seconds: float):
+        """Add a latency sample"""
+        self._samples.append(seconds)
+    
+    def percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """The given percentile of the window, or None with fewer than `min_samples` samples"""
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is worth retrying: timeouts, dropped connections, 408/409/429 and 5xx"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return isinstance(status, int) and (status in (408, 409, 429) or status >= 500)
+
+class ResilientCaller:
+    """
+    Runs calls to one provider under a ResiliencePolicy
+    
+    Every attempt gets a timeout, and the call as a whole a deadline. Transient
+    failures are retried with jittered exponential backoff (or the server's
+    Retry-After); other errors are raised at once. With hedging enabled, an attempt
+    that is slower than usual gets a duplicate request and the first answer wins.
+    Failed attempts feed a circuit breaker, and while it is open calls raise
+    CircuitOpenError immediately, so callers can fall back without waiting.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        policy: Optional[ResiliencePolicy] = None,
+        retryable: Callable[[BaseException], bool] = is_transient
+    ):
+        """
+        Args:
+            name: Provider name, used in log messages
+            policy: Timeouts, retries, hedging and breaker settings (default: ResiliencePolicy())
+            retryable: Decides which errors are transient
+        """
+        self.name = name
+        self.policy = policy or ResiliencePolicy()
+        self.retryable = retryable
+        self.breaker = CircuitBreaker(self.policy.failure_threshold, self.policy.reset_timeout, name=name)
+        self.latencies = LatencyTracker()
+    
+    @property
+    def available(self) -> bool:
+        """False while the circuit is open, i.e. calls would fail immediately"""
+        return self.breaker.state != CircuitBreaker.OPEN
+    
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Call an async function under the policy
+        
+        Args:
+            func: Async callable making the request
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+            
+        Returns:
+            Whatever the callable returns
+            
+        Raises:
+            CircuitOpenError: If the circuit is open
+            asyncio.TimeoutError: If the deadline passes before an attempt succeeds
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.policy.deadline
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit is open; not calling")
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"{self.name} call missed its {self.policy.deadline}s deadline")
+            
+            started = loop.time()
+            try:
+                result = await self._attempt(func, args, kwargs, min(self.policy.timeout, remaining))
+            except Exception as e:
+                if not self.retryable(e):
+                    self.breaker.record_success()  # The provider answered; the request was at fault
+                    raise
+                self.breaker.record_failure()
+                delay = self._backoff(e, attempt)
+                if attempt >= self.policy.max_retries or loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                logger.warning(f"{self.name} call failed ({e!r}); retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            self.breaker.record_success()
+            self.latencies.record(loop.time() - started)
+            return result
+    
+    def _backoff(self, error: BaseException, attempt: int) -> float:
+        """Retry-After if the server sent one, otherwise full-jitter exponential backoff"""
+        ceiling = min(self.policy.max_delay, self.policy.base_delay * 2 ** attempt)
+        server_delay = retry_after(error, None) if isinstance(error, Exception) else None
+        return server_delay if server_delay is not None else random.uniform(0, ceiling)
+    
+    async def _attempt(self, func: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict, timeout: float) -> Any:
+        """
+        One attempt, with a hedged duplicate if it runs past the hedge delay
+        
+        The request that loses the race is cancelled, or closed if it already returned,
+        so a streamed response does not keep its connection open.
+        """
+        hedge_after = None
+        if self.policy.hedge_percentile is not None:
+            hedge_after = self.latencies.percentile(self.policy.hedge_percentile, self.policy.hedge_min_samples)
+        if hedge_after is None or hedge_after >= timeout:
+            return await asyncio.wait_for(func(*args, **kwargs), timeout)
+        
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + timeout
+        tasks = [asyncio.ensure_future(func(*args, **kwargs))]
+        winner: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                logger.info(f"{self.name} call slower than p{self.policy.hedge_percentile:g} ({hedge_after:.2f}s); hedging")
+                tasks.append(asyncio.ensure_future(func(*args, **kwargs)))
+            
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(expires - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError(f"{self.name} attempt timed out after {timeout}s")
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            # A loser may have answered anyway (at the same time, or before its cancellation landed)
+            for task in tasks:
+                if task is not winner and not task.cancelled() and task.exception() is None:
+                    await _release(task.result(), self.name)
+
+async def _release(result: Any, name: str):
+    """Close a response nobody will read, e.g. the losing stream of a hedged request"""
+    close = getattr(result, "aclose", None) or getattr(result, "close", None)
+    if close is None:
+        return
+    try:
+        closed = close()
+        if inspect.isawaitable(closed):
+            await closed
+    except Exception as e:
+        logger.warning(f"Error closing an abandoned {name} response: {e!r}")
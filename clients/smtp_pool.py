@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated, reusable SMTP connections
+    
+    Connecting, STARTTLS and login cost several round trips, so connections are kept
+    open between messages and handed out again. An idle connection is checked with a
+    NOOP before reuse if it has been idle for ``health_check_after`` seconds (servers
+    drop idle sessions), and it is retired after ``max_messages`` messages, which
+    many providers cap per session. At most ``size`` connections are open at once.
+    """
+    
+    def __init__(
+        self,
+        hostname: str,
+        port: int = 587,
+        username: str = "",
+        password: str = "",
+        start_tls: bool = True,
+        size: int = 4,
+        timeout: float = 30.0,
+        health_check_after: float = 15.0,
+        max_messages: int = 100
+    ):
+        """
+        Args:
+            hostname: SMTP server
+            port: SMTP port
+            username: Login name; no login without one
+            password: Login password
+            start_tls: Upgrade the connection with STARTTLS
+            size: Most connections open at once
+            timeout: Seconds for each SMTP command
+            health_check_after: Idle seconds after which a connection is NOOP-checked before reuse
+            max_messages: Messages sent over one connection before it is replaced
+        """
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.max_messages = max_messages
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []  # (connection, idle since)
+        self._sent: Dict[int, int] = {}  # Messages sent per open connection, by id
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connections_opened = 0
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Borrow a connected, logged-in SMTP client
+        
+        The connection goes back to the pool afterwards unless it broke or reached
+        ``max_messages``. Count messages with `record_sent`.
+        
+        Yields:
+            aiosmtplib.SMTP ready for send_message
+        """
+        self._bind_loop()
+        async with self._slots:
+            smtp = await self._checkout()
+            healthy = False
+            try:
+                yield smtp
+                healthy = True
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # The server rejected the message; aiosmtplib has already reset the session
+                healthy = True
+                raise
+            finally:
+                if healthy and smtp.is_connected and not self.exhausted(smtp):
+                    self._idle.append((smtp, time.monotonic()))
+                else:
+                    await self._retire(smtp)
+    
+    def record_sent(self, smtp: aiosmtplib.SMTP, messages: int = 1):
+        """Count messages sent over a borrowed connection towards its ``max_messages``"""
+        self._sent[id(smtp)] = self._sent.get(id(smtp), 0) + messages
+    
+    def exhausted(self, smtp: aiosmtplib.SMTP) -> bool:
+        """Whether a connection has sent its ``max_messages`` and should be given back"""
+        return self._sent.get(id(smtp), 0) >= self.max_messages
+    
+    async def close(self):
+        """Close every idle connection opened by the running event loop"""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._retire(smtp) for smtp, _ in idle))
+    
+    def _bind_loop(self):
+        """Start over when used from a new event loop; connections belong to the loop that opened them"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.size)
+            self._idle = []
+            self._sent = {}
+    
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        """Most recently used healthy idle connection, or a new one"""
+        while self._idle:
+            smtp, idle_since = self._idle.pop()
+            if not smtp.is_connected:
+                self._sent.pop(id(smtp), None)
+                continue
+            if time.monotonic() - idle_since >= self.health_check_after:
+                try:
+                    await smtp.noop()
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.info(f"Dropping stale SMTP connection to {self.hostname}: {e}")
+                    await self._retire(smtp)
+                    continue
+            return smtp
+        return await self._connect()
+    
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Open, secure and log in a new connection"""
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        self.connections_opened += 1
+        return smtp
+    
+    async def _retire(self, smtp: aiosmtplib.SMTP):
+        """Close a connection politely, or just drop it if the server is gone"""
+        self._sent.pop(id(smtp), None)
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     TIMEZONE: str = os.getenv("TIMEZONE", "UTC")
+    STATE_DIR: str = os.getenv("STATE_DIR", ".autopm")  # Local state (watermarks, caches)
     
     # Slack settings
     SLACK_BOT_TOKEN: str = os.getenv("SLACK_BOT_TOKEN", "")
@@ -30,8 +31,27 @@ class Settings(BaseSettings):
     # OpenAI settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     
+    # Summarizer settings
+    SUMMARIZER_BACKEND: str = os.getenv("SUMMARIZER_BACKEND", "openai")  # "openai" or "extractive"
+    
     # Digest settings
     DIGEST_SCHEDULE: str = os.getenv("DIGEST_SCHEDULE", "0 17 * * 1-5")  # Weekdays at 5 PM
+    # When set, the digest's summaries are prepared through the OpenAI Batch API on this
+    # schedule (e.g. "0 5 * * 1-5") and collected at digest time
+    DIGEST_PREPARE_SCHEDULE: str = os.getenv("DIGEST_PREPARE_SCHEDULE", "")
+    BATCH_COLLECT_WAIT_SECONDS: float = float(os.getenv("BATCH_COLLECT_WAIT_SECONDS", "300"))
+    # Comma-separated notifier:target pairs; every destination is sent to concurrently
+    DIGEST_DESTINATIONS: str = os.getenv("DIGEST_DESTINATIONS", "slack:#autopm-digests,email:team@example.com")
+    # An unfinished digest run (crash, failed deliveries) is resumed by attempts within this window
+    RUN_RESUME_WINDOW_HOURS: float = float(os.getenv("RUN_RESUME_WINDOW_HOURS", "12"))
+    # Journaled runs (with their checkpointed updates) are deleted this long after their last change
+    RUN_RETENTION_DAYS: float = float(os.getenv("RUN_RETENTION_DAYS", "14"))
+    
+    # Keep at most this many of the most relevant updates per digest (0: keep every update)
+    RELEVANCE_MAX_UPDATES: int = int(os.getenv("RELEVANCE_MAX_UPDATES", "0"))
+    
+    # Fetch settings
+    FETCH_TIMEOUT_SECONDS: float = float(os.getenv("FETCH_TIMEOUT_SECONDS", "120"))  # Per-source deadline
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,13 @@
+import asyncio
+import functools
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
-from pydantic import BaseModel
+from typing import AsyncIterator, Dict, List, Any, Callable, Optional, Union
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel, Field, field_validator
+
+from clients.client_registry import ClientRegistry, get_default_client_registry
+from config.settings import settings
+from storage.state_store import BaseStateStore, get_default_state_store
 
 class Update(BaseModel):
     """Represents an update from a source (Slack, Jira, etc.)"""
@@ -10,27 +16,206 @@ class Update(BaseModel):
     author: str = ""
     timestamp: datetime
     url: str = ""
-    metadata: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @field_validator("timestamp")
+    @classmethod
+    def _normalize_timestamp(cls, value: datetime) -> datetime:
+        """Store every timestamp as an aware UTC datetime so updates always sort together"""
+        return to_utc(value)
+    
+    @classmethod
+    def trusted(
+        cls,
+        source: str,
+        content: str,
+        timestamp: Union[datetime, float],
+        author: str = "",
+        url: str = "",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "Update":
+        """
+        Build an Update from fetcher output without running validation
+        
+        Fetchers already produce well-typed values, so this builds the model with
+        `model_construct`, skipping pydantic's validation, and only normalizes the
+        timestamp. Use the regular constructor for untrusted input.
+        
+        Args:
+            source: Source identifier, e.g. "slack:C123"
+            content: Update text
+            timestamp: Epoch seconds or a datetime (naive datetimes are taken as UTC)
+            author: Author name or id
+            url: Link back to the update
+            metadata: Source-specific details
+            
+        Returns:
+            Update instance
+        """
+        if isinstance(timestamp, datetime):
+            timestamp = to_utc(timestamp)
+        else:
+            timestamp = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        
+        return cls.model_construct(
+            source=source,
+            content=content,
+            author=author,
+            timestamp=timestamp,
+            url=url,
+            metadata=metadata if metadata is not None else {}
+        )
+    
+    @property
+    def epoch(self) -> float:
+        """Timestamp as UTC epoch seconds"""
+        return self.timestamp.timestamp()
 
 class BaseFetcher(ABC):
     """Abstract base class for all fetchers"""
     
     def __init__(self, config: Dict):
         self.config = config
+        self.timeout = self.config.get("timeout", settings.FETCH_TIMEOUT_SECONDS)
+        self.executor = None  # Worker pool for blocking SDK calls (None = default pool)
+        self.lookback_days = self.config.get("lookback_days", 1)
+        self.stream_page_size = self.config.get("stream_page_size", 500)
+        self.state_store: BaseStateStore = self.config.get("state_store") or get_default_state_store()
+        # Clients and rate limits are shared process-wide so concurrent jobs stay under provider limits
+        self.clients: ClientRegistry = self.config.get("client_registry") or get_default_client_registry()
+        self.rate_limiter = self.clients.rate_limiter(self.get_source_name())
+        self._pending_state: Dict[str, Dict[str, Any]] = {}
     
     @abstractmethod
-    async def fetch_updates(self, since: datetime = None) -> List[Update]:
+    async def fetch_updates(self, since: datetime = None, full_resync: bool = False) -> List[Update]:
         """
         Fetch updates from the source
         
+        Without an explicit `since`, each partition (channel, project, database, ...)
+        is fetched from its stored watermark. Watermarks reached during the fetch are
+        staged and only persisted by `commit_watermarks`.
+        
         Args:
             since: Only fetch updates after this datetime
+            full_resync: Ignore stored watermarks and fetch the whole lookback window
             
         Returns:
             List of Update objects
         """
         pass
     
+    async def stream_updates(self, since: datetime = None, full_resync: bool = False) -> AsyncIterator[List[Update]]:
+        """
+        Yield updates page by page, newest first
+        
+        No page may contain an update newer than one already yielded, so the streams of
+        several sources can be merged by timestamp with `UpdateStreamMerger`. This
+        default adapter fetches everything with `fetch_updates` and yields it sorted, in
+        pages of ``stream_page_size``; fetchers that can order their results while
+        paginating override it to yield as pages arrive.
+        
+        Args:
+            since: Only fetch updates after this datetime
+            full_resync: Ignore stored watermarks and fetch the whole lookback window
+            
+        Yields:
+            Lists of Update objects, newest first
+        """
+        updates = await self.fetch_updates(since=since, full_resync=full_resync)
+        updates.sort(key=lambda update: update.timestamp, reverse=True)
+        for start in range(0, len(updates), self.stream_page_size):
+            yield updates[start:start + self.stream_page_size]
+    
     def get_source_name(self) -> str:
         """Return a human-readable name for the source"""
         return self.__class__.__name__.replace("Fetcher", "").lower()
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking SDK call in the fetcher's worker pool so it does not stall the event loop
+        
+        Args:
+            func: The blocking callable
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+            
+        Returns:
+            Whatever the callable returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+    
+    def close(self):
+        """Shut down the fetcher's own worker pool, if it has one"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+    
+    @property
+    def watermark_namespace(self) -> str:
+        """State store namespace holding this source's watermarks"""
+        return f"watermarks:{self.get_source_name()}"
+    
+    def resolve_since(self, key: str, full_resync: bool = False) -> datetime:
+        """
+        Return the start of the fetch window for a partition
+        
+        The window starts at the partition's watermark, but never further back than
+        `lookback_days`.
+        
+        Args:
+            key: Partition key (channel id, project key, database id, ...)
+            full_resync: Ignore the stored watermark
+            
+        Returns:
+            UTC datetime to fetch from
+        """
+        floor = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        if full_resync:
+            return floor
+        
+        watermark = self.state_store.get(self.watermark_namespace, key)
+        if watermark is None:
+            return floor
+        return max(floor, datetime.fromtimestamp(watermark, tz=timezone.utc))
+    
+    def advance_watermark(self, key: str, timestamp: Union[datetime, float]):
+        """Stage a new watermark for a partition; it only moves forward"""
+        epoch = timestamp if isinstance(timestamp, (int, float)) else to_epoch(timestamp)
+        pending = self._pending_state.setdefault(self.watermark_namespace, {})
+        if epoch > pending.get(key, float("-inf")):
+            pending[key] = epoch
+    
+    def stage_state(self, namespace: str, key: str, value: Any):
+        """Stage an arbitrary state value to be persisted with the watermarks"""
+        self._pending_state.setdefault(namespace, {})[key] = value
+    
+    def commit_watermarks(self):
+        """Persist all staged watermarks; call once the fetched updates have been delivered"""
+        for namespace, items in self._pending_state.items():
+            self.state_store.set_many(namespace, items)
+        self._pending_state = {}
+    
+    def discard_watermarks(self):
+        """Drop staged watermarks so the next run fetches the same window again"""
+        self._pending_state = {}
+    
+    def staged_state(self) -> Dict[str, Dict[str, Any]]:
+        """Staged, uncommitted watermarks and state values, e.g. to checkpoint a run"""
+        return {namespace: dict(items) for namespace, items in self._pending_state.items()}
+    
+    def restore_staged_state(self, state: Dict[str, Dict[str, Any]]):
+        """Stage values saved with `staged_state` again, e.g. when resuming a run after a restart"""
+        for namespace, items in state.items():
+            self._pending_state.setdefault(namespace, {}).update(items)
+
+def to_utc(value: datetime) -> datetime:
+    """Return an aware UTC datetime, treating naive datetimes as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if value.utcoffset() == timedelta(0):
+        return value
+    return value.astimezone(timezone.utc)
+
+def to_epoch(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive datetimes as UTC"""
+    return to_utc(value).timestamp()
@@ -1,14 +1,21 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from jira import JIRA
-from jira.exceptions import JIRAError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from datetime import datetime, tzinfo
 
-from .base_fetcher import BaseFetcher, Update
+import pytz
+
+from .base_fetcher import BaseFetcher, Update, to_utc
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Only the fields that are turned into Update objects are requested
+SEARCH_FIELDS = ["summary", "status", "assignee", "reporter", "updated", "comment", "priority", "issuetype"]
+
+JIRA_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+
 class JiraFetcher(BaseFetcher):
     """Fetches updates from Jira issues"""
     
@@ -17,84 +24,160 @@ class JiraFetcher(BaseFetcher):
         self.jira = self._initialize_jira_client()
         self.projects = self.config.get("projects", [])
         self.lookback_days = self.config.get("lookback_days", 7)  # Default to 7 days for Jira
+        self.page_size = self.config.get("page_size", 100)  # Jira Cloud caps pages at 100
+        self.max_workers = self.config.get("max_workers", 4)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jira")
+        self.base_url = self.jira.client_info()
+        self._timezone = None  # The account's profile timezone, looked up on first search
     
-    def _initialize_jira_client(self) -> JIRA:
-        """Initialize and return Jira client"""
+    def _initialize_jira_client(self):
+        """Return the shared Jira client for the configured account"""
         if not all([settings.JIRA_SERVER, settings.JIRA_EMAIL, settings.JIRA_API_TOKEN]):
             raise ValueError("Missing required Jira configuration")
-            
-        return JIRA(
-            server=settings.JIRA_SERVER,
-            basic_auth=(settings.JIRA_EMAIL, settings.JIRA_API_TOKEN)
-        )
+        
+        return self.clients.jira_client(settings.JIRA_SERVER, settings.JIRA_EMAIL, settings.JIRA_API_TOKEN)
     
-    async def fetch_updates(self, since: datetime = None) -> List[Update]:
+    async def fetch_updates(self, since: datetime = None, full_resync: bool = False) -> List[Update]:
         """
         Fetch updated Jira issues
         
+        All result pages are fetched; when `projects` is set each project is searched as
+        its own shard so shards page independently and keep their own watermark.
+        A failed search fails the whole fetch, so the source is reported as failed and
+        no shard's watermark moves. JQL only compares whole minutes, so issues updated
+        at or before `since` are dropped here; otherwise the issue that set the
+        watermark would be reported again on every run.
+        
         Args:
-            since: Only fetch issues updated after this datetime
-            
+            since: Only fetch issues updated after this datetime (default: each shard's watermark)
+            full_resync: Ignore stored watermarks and fetch the whole lookback window
+        
         Returns:
             List of Update objects
+        
+        Raises:
+            JIRAError: If any page of any shard could not be fetched
         """
-        if not since:
-            since = datetime.utcnow() - timedelta(days=self.lookback_days)
-            
+        shards = [(project, [project]) for project in self.projects] or [("*", [])]
+        shard_since = {key: to_utc(since) if since else self.resolve_since(key, full_resync) for key, _ in shards}
+        timezone = await self._account_timezone()
+        results = await asyncio.gather(
+            *(self._search_all(self._build_jql(shard_since[key], projects, timezone)) for key, projects in shards)
+        )
+        
         updates = []
+        seen = set()
+        for (key, _), issues in zip(shards, results):
+            shard_updates = []
+            for issue in issues:
+                if issue["key"] in seen or _parse_jira_time(issue["fields"]["updated"]) <= shard_since[key]:
+                    continue
+                seen.add(issue["key"])
+                shard_updates.append(self._issue_to_update(issue, shard_since[key]))
+            updates.extend(shard_updates)
+            
+            if shard_updates:
+                self.advance_watermark(key, max(update.timestamp for update in shard_updates))
         
-        # Build JQL query
+        return updates
+    
+    async def _account_timezone(self) -> tzinfo:
+        """The Jira account's profile timezone, which JQL reads dates in"""
+        if self._timezone is None:
+            myself = await self.rate_limiter.call("myself", self._run_blocking, self.jira.myself)
+            try:
+                self._timezone = pytz.timezone(myself.get("timeZone") or "UTC")
+            except pytz.UnknownTimeZoneError:
+                logger.warning(f"Unknown Jira timezone {myself.get('timeZone')!r}, assuming UTC")
+                self._timezone = pytz.utc
+        return self._timezone
+    
+    def _build_jql(self, since: datetime, projects: List[str], timezone: tzinfo = pytz.utc) -> str:
+        """Build the JQL query for one shard; `since` is written in the account's timezone"""
         jql_parts = [
-            "updated >= '" + since.strftime('%Y-%m-%d %H:%M') + "'"
+            "updated >= '" + since.astimezone(timezone).strftime('%Y-%m-%d %H:%M') + "'"
         ]
         
-        if self.projects:
-            projects_str = ", ".join(f'"{p}"' for p in self.projects)
+        if projects:
+            projects_str = ", ".join(f'"{p}"' for p in projects)
             jql_parts.append(f"project in ({projects_str})")
         
-        jql = " AND ".join(jql_parts)
+        # A stable order keeps startAt pagination consistent across pages
+        return " AND ".join(jql_parts) + " ORDER BY updated DESC, key ASC"
+    
+    async def _search_all(self, jql: str) -> List[Dict[str, Any]]:
+        """
+        Fetch every page of a JQL search
+        
+        The first page reports the total; the remaining pages are then fetched in
+        parallel on the worker pool.
         
-        try:
-            # Fetch issues updated since the given time
-            issues = self.jira.search_issues(
-                jql,
-                maxResults=50,  # Adjust based on needs
-                fields="summary,description,status,assignee,updated,comment"
-            )
-            
-            for issue in issues:
-                # Get issue details
-                issue_url = f"{self.jira.client_info()}/browse/{issue.key}"
-                assignee = getattr(issue.fields.assignee, 'displayName', 'Unassigned')
-                status = getattr(issue.fields.status, 'name', 'Unknown')
-                
-                # Get comments
-                comments = []
-                if hasattr(issue.fields, 'comment') and hasattr(issue.fields.comment, 'comments'):
-                    comments = [
-                        f"{comment.author.displayName} commented: {comment.body}"
-                        for comment in issue.fields.comment.comments
-                        if comment.updated and datetime.strptime(comment.updated, '%Y-%m-%dT%H:%M:%S.%f%z') >= since
-                    ]
-                
-                # Create update for the issue
-                update = Update(
-                    source=f"jira:{issue.key}",
-                    content=f"{issue.key}: {issue.fields.summary}\nStatus: {status}\n{'; '.join(comments)}",
-                    author=getattr(issue.fields.reporter, 'displayName', 'Unknown'),
-                    timestamp=datetime.strptime(issue.fields.updated, '%Y-%m-%dT%H:%M:%S.%f%z'),
-                    url=issue_url,
-                    metadata={
-                        "key": issue.key,
-                        "status": status,
-                        "assignee": assignee,
-                        "priority": getattr(issue.fields, 'priority', 'Unspecified'),
-                        "issue_type": getattr(issue.fields.issuetype, 'name', 'Unknown')
-                    }
-                )
-                updates.append(update)
-                
-        except JIRAError as e:
-            logger.error(f"Error fetching Jira updates: {e}")
-            
-        return updates
+        Args:
+            jql: The JQL query
+        
+        Returns:
+            Raw issue dicts from all pages
+        """
+        first_page = await self._search_page(jql, 0)
+        
+        issues = list(first_page.get("issues", []))
+        total = first_page.get("total", len(issues))
+        if not issues:
+            return issues
+        
+        # The server may cap maxResults below page_size, so step by what it actually returned
+        step = len(issues)
+        pages = await asyncio.gather(
+            *(self._search_page(jql, start_at) for start_at in range(step, total, step))
+        )
+        for page in pages:
+            issues.extend(page.get("issues", []))
+        
+        return issues
+    
+    async def _search_page(self, jql: str, start_at: int) -> Dict[str, Any]:
+        """Fetch one page of search results as raw JSON"""
+        return await self.rate_limiter.call(
+            "search",
+            self._run_blocking,
+            self.jira.search_issues,
+            jql,
+            startAt=start_at,
+            maxResults=self.page_size,
+            fields=SEARCH_FIELDS,
+            json_result=True
+        )
+    
+    def _issue_to_update(self, issue: Dict[str, Any], since: datetime) -> Update:
+        """Convert a raw issue dict into an Update"""
+        key = issue["key"]
+        fields = issue.get("fields") or {}
+        status = (fields.get("status") or {}).get("name", "Unknown")
+        assignee = (fields.get("assignee") or {}).get("displayName", "Unassigned")
+        
+        # Get comments made since the given time
+        comments = []
+        for comment in (fields.get("comment") or {}).get("comments", []):
+            updated = comment.get("updated")
+            if updated and _parse_jira_time(updated) >= since:
+                author = (comment.get("author") or {}).get("displayName", "Unknown")
+                comments.append(f"{author} commented: {comment.get('body', '')}")
+        
+        return Update.trusted(
+            source=f"jira:{key}",
+            content=f"{key}: {fields.get('summary', '')}\nStatus: {status}\n{'; '.join(comments)}",
+            author=(fields.get("reporter") or {}).get("displayName", "Unknown"),
+            timestamp=_parse_jira_time(fields["updated"]),
+            url=f"{self.base_url}/browse/{key}",
+            metadata={
+                "key": key,
+                "status": status,
+                "assignee": assignee,
+                "priority": (fields.get("priority") or {}).get("name", "Unspecified"),
+                "issue_type": (fields.get("issuetype") or {}).get("name", "Unknown")
+            }
+        )
+
+def _parse_jira_time(value: str) -> datetime:
+    """Parse a Jira timestamp such as 2024-01-31T09:15:00.000+0000"""
+    return datetime.strptime(value, JIRA_TIME_FORMAT)
@@ -1,10 +1,11 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-from notion_client import Client
+from typing import AsyncIterator, Dict, List, Optional, Any
+from datetime import datetime
 
-from .base_fetcher import BaseFetcher, Update
+from .base_fetcher import BaseFetcher, Update, to_utc
 from config.settings import settings
+from storage.content_cache import ContentCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,91 +17,226 @@ class NotionFetcher(BaseFetcher):
         self.client = self._initialize_notion_client()
         self.database_id = settings.NOTION_DATABASE_ID
         self.lookback_days = self.config.get("lookback_days", 3)
+        self.page_size = self.config.get("page_size", 100)  # Notion caps pages at 100
+        self.max_concurrency = self.config.get("max_concurrency", 8)
+        self.preview_blocks = self.config.get("preview_blocks", 5)
+        self.block_depth = self.config.get("block_depth", 0)  # 0 = top-level blocks only
+        self.content_cache = self._initialize_content_cache()
     
-    def _initialize_notion_client(self) -> Client:
-        """Initialize and return Notion client"""
+    def _initialize_notion_client(self):
+        """Return the shared Notion client for the configured integration"""
         if not settings.NOTION_API_KEY:
             raise ValueError("Missing required Notion API key")
-            
-        return Client(auth=settings.NOTION_API_KEY)
+        
+        return self.clients.notion_client(settings.NOTION_API_KEY)
+    
+    def _initialize_content_cache(self) -> Optional[ContentCache]:
+        """Initialize the page-content cache, unless disabled with use_content_cache=False"""
+        if "content_cache" in self.config:
+            return self.config["content_cache"]
+        if not self.config.get("use_content_cache", True):
+            return None
+        
+        return ContentCache(
+            namespace="notion_blocks",
+            max_entries=self.config.get("cache_max_entries", 5000),
+            ttl_seconds=self.config.get("cache_ttl_days", 30) * 86400
+        )
     
-    async def fetch_updates(self, since: datetime = None) -> List[Update]:
+    async def fetch_updates(self, since: datetime = None, full_resync: bool = False) -> List[Update]:
         """
         Fetch updated Notion pages from the configured database
         
+        Every page of query results is read. Block previews are fetched concurrently
+        (at most ``max_concurrency`` requests in flight) while later result pages are
+        still being queried. A failed query fails the whole fetch, so the source is
+        reported as failed and the watermark does not move.
+        
         Args:
-            since: Only fetch pages updated after this datetime
-            
+            since: Only fetch pages updated after this datetime (default: the database's watermark)
+            full_resync: Ignore the stored watermark and fetch the whole lookback window
+        
         Returns:
             List of Update objects
+        
+        Raises:
+            APIResponseError: If a page of query results could not be fetched
         """
-        if not since:
-            since = datetime.utcnow() - timedelta(days=self.lookback_days)
-            
-        updates = []
+        since = to_utc(since) if since else self.resolve_since(self.database_id, full_resync)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = []
+        hits_before = self.content_cache.stats.hits if self.content_cache else 0
+        misses_before = self.content_cache.stats.misses if self.content_cache else 0
         
         try:
-            # Query the database for recently updated pages
-            response = self.client.databases.query(
-                database_id=self.database_id,
-                filter={
+            async for pages in self._iter_database_pages(since, semaphore):
+                tasks.extend(asyncio.ensure_future(self._page_to_update(page, semaphore)) for page in pages)
+            
+            updates = list(await asyncio.gather(*tasks))
+            if updates:
+                self.advance_watermark(self.database_id, max(update.timestamp for update in updates))
+            
+            if self.content_cache:
+                logger.info(
+                    f"Notion content cache: {self.content_cache.stats.hits - hits_before} hits, "
+                    f"{self.content_cache.stats.misses - misses_before} misses "
+                    f"(lifetime hit rate {self.content_cache.stats.hit_rate:.0%})"
+                )
+            return updates
+        
+        except BaseException:
+            # Stop the previews still in flight before the error is reported
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    async def _iter_database_pages(self, since: datetime, semaphore: asyncio.Semaphore) -> AsyncIterator[List[Dict]]:
+        """Follow ``next_cursor`` through the database query results"""
+        cursor = None
+        while True:
+            query = {
+                "database_id": self.database_id,
+                "filter": {
                     "timestamp": "last_edited_time",
                     "last_edited_time": {
                         "after": since.isoformat()
                     }
                 },
-                sorts=[{
-                    "property": "last_edited_time",
+                "sorts": [{
+                    "timestamp": "last_edited_time",
                     "direction": "descending"
-                }]
-            )
+                }],
+                "page_size": self.page_size
+            }
+            if cursor:
+                query["start_cursor"] = cursor
+            
+            async with semaphore:
+                response = await self.rate_limiter.call(
+                    "databases.query", self.client.databases.query, **query
+                )
+            
+            yield response.get("results", [])
             
-            for page in response.get("results", []):
-                # Get page properties
-                page_id = page["id"]
-                page_url = page["url"]
-                last_edited = page["last_edited_time"]
-                
-                # Get page title (handles different title property types)
-                title = "Untitled"
-                for prop_name, prop_value in page.get("properties", {}).items():
-                    if prop_value.get("type") == "title" and prop_value.get("title"):
-                        title = " ".join([t.get("plain_text", "") for t in prop_value["title"]])
-                        break
-                
-                # Get page content
+            cursor = response.get("next_cursor")
+            if not response.get("has_more") or not cursor:
+                break
+    
+    async def _page_to_update(self, page: Dict[str, Any], semaphore: asyncio.Semaphore) -> Update:
+        """Build an Update for a database page, including a short content preview"""
+        page_id = page["id"]
+        last_edited = page["last_edited_time"]
+        
+        # Get page title (handles different title property types)
+        title = "Untitled"
+        for prop_name, prop_value in page.get("properties", {}).items():
+            if prop_value.get("type") == "title" and prop_value.get("title"):
+                title = " ".join([t.get("plain_text", "") for t in prop_value["title"]])
+                break
+        
+        # Get page content; an unchanged page is served from the cache without any block requests
+        cache_key = f"{page_id}:{last_edited}:{self.preview_blocks}:{self.block_depth}"
+        content_blocks = self.content_cache.get(cache_key) if self.content_cache else None
+        if content_blocks is None:
+            try:
+                content_blocks = await self._fetch_preview(page_id, semaphore)
+                if self.content_cache:
+                    self.content_cache.set(cache_key, content_blocks)
+            except Exception as e:
+                logger.warning(f"Could not fetch content for page {page_id}: {e}")
                 content_blocks = []
-                try:
-                    block_children = self.client.blocks.children.list(block_id=page_id)
-                    for block in block_children.get("results", []):
-                        block_type = block.get("type")
-                        block_content = block.get(block_type, {})
-                        
-                        # Extract text content from the block
-                        if "rich_text" in block_content and block_content["rich_text"]:
-                            text = " ".join([rt.get("plain_text", "") for rt in block_content["rich_text"]])
-                            if text.strip():
-                                content_blocks.append(f"{block_type.upper()}: {text}")
-                except Exception as e:
-                    logger.warning(f"Could not fetch content for page {page_id}: {e}")
-                
-                # Create update
-                update = Update(
-                    source=f"notion:{page_id}",
-                    content=f"{title}\n\n" + "\n".join(content_blocks[:5]),  # First 5 blocks as preview
-                    author=page.get("created_by", {}).get("id", "unknown"),
-                    timestamp=datetime.fromisoformat(last_edited.rstrip('Z')),  # Remove 'Z' for timezone handling
-                    url=page_url,
-                    metadata={
-                        "page_id": page_id,
-                        "created_time": page.get("created_time", ""),
-                        "last_edited_time": last_edited,
-                        "properties": list(page.get("properties", {}).keys())
-                    }
+        
+        return Update.trusted(
+            source=f"notion:{page_id}",
+            content=f"{title}\n\n" + "\n".join(content_blocks),
+            author=page.get("created_by", {}).get("id", "unknown"),
+            timestamp=datetime.fromisoformat(last_edited.replace('Z', '+00:00')),
+            url=page["url"],
+            metadata={
+                "page_id": page_id,
+                "created_time": page.get("created_time", ""),
+                "last_edited_time": last_edited,
+                "properties": list(page.get("properties", {}).keys())
+            }
+        )
+    
+    async def _fetch_preview(self, page_id: str, semaphore: asyncio.Semaphore) -> List[str]:
+        """
+        Collect up to ``preview_blocks`` lines of text from a page
+        
+        Top-level blocks are read first; if they do not fill the preview and
+        ``block_depth`` allows it, child blocks are walked breadth-first, one level
+        at a time, with each level's requests issued concurrently.
+        
+        Args:
+            page_id: The Notion page id
+            semaphore: Shared limit on in-flight requests
+        
+        Returns:
+            Text lines in the form "TYPE: text"
+        """
+        lines: List[str] = []
+        level = [page_id]
+        
+        for depth in range(self.block_depth + 1):
+            children = await asyncio.gather(
+                *(self._list_children(block_id, self.preview_blocks - len(lines), semaphore) for block_id in level)
+            )
+            
+            next_level = []
+            for blocks in children:
+                for block in blocks:
+                    text = _block_text(block)
+                    if text and len(lines) < self.preview_blocks:
+                        lines.append(text)
+                    if block.get("has_children"):
+                        next_level.append(block["id"])
+            
+            if len(lines) >= self.preview_blocks or not next_level:
+                break
+            level = next_level
+        
+        return lines
+    
+    async def _list_children(self, block_id: str, wanted: int, semaphore: asyncio.Semaphore) -> List[Dict]:
+        """
+        List a block's children, requesting only as many as are needed for `wanted` text blocks
+        
+        Further pages are only requested when the blocks seen so far did not contain
+        enough text.
+        """
+        blocks: List[Dict] = []
+        found = 0
+        cursor = None
+        while found < wanted:
+            params = {"block_id": block_id, "page_size": max(wanted - found, 1)}
+            if cursor:
+                params["start_cursor"] = cursor
+            
+            async with semaphore:
+                response = await self.rate_limiter.call(
+                    "blocks.children.list", self.client.blocks.children.list, **params
                 )
-                updates.append(update)
-                
-        except Exception as e:
-            logger.error(f"Error fetching Notion updates: {e}")
             
-        return updates
+            results = response.get("results", [])
+            blocks.extend(results)
+            found += sum(1 for block in results if _block_text(block))
+            
+            cursor = response.get("next_cursor")
+            if not response.get("has_more") or not cursor:
+                break
+        
+        return blocks
+
+def _block_text(block: Dict[str, Any]) -> str:
+    """Extract "TYPE: text" from a block, or an empty string if it has no text"""
+    block_type = block.get("type")
+    block_content = block.get(block_type) or {}
+    
+    if "rich_text" in block_content and block_content["rich_text"]:
+        text = " ".join([rt.get("plain_text", "") for rt in block_content["rich_text"]])
+        if text.strip():
+            return f"{block_type.upper()}: {text}"
+    return ""
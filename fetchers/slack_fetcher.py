@@ -1,10 +1,13 @@
+import asyncio
+import heapq
+import itertools
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
-from .base_fetcher import BaseFetcher, Update
+from .base_fetcher import BaseFetcher, Update, to_epoch, to_utc
+from .stream_merge import UpdateStreamMerger
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -14,94 +17,359 @@ class SlackFetcher(BaseFetcher):
     
     def __init__(self, config: Optional[Dict] = None):
         super().__init__(config or {})
-        self.client = WebClient(token=settings.SLACK_BOT_TOKEN)
+        self.client = self.clients.slack_client(settings.SLACK_BOT_TOKEN)
         self.channels = self.config.get("channels", [])
         self.lookback_days = self.config.get("lookback_days", 1)
+        self.page_size = self.config.get("page_size", 200)  # Slack recommends <= 200 per page
+        self.max_concurrency = self.config.get("max_concurrency", 8)
+        self.thread_concurrency = self.config.get("thread_concurrency", 4)
+        # Threads are polled for new replies until they have been quiet this long
+        self.thread_lookback_days = self.config.get("thread_lookback_days", 7)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread_semaphore: Optional[asyncio.Semaphore] = None
     
-    async def fetch_updates(self, since: datetime = None) -> List[Update]:
+    async def fetch_updates(self, since: datetime = None, full_resync: bool = False) -> List[Update]:
         """
         Fetch messages from configured Slack channels
         
         Args:
             since: Only fetch messages after this datetime
-            
+            full_resync: Ignore stored channel and thread watermarks
+        
         Returns:
-            List of Update objects
+            List of Update objects, newest first
         """
-        if not since:
-            since = datetime.utcnow() - timedelta(days=self.lookback_days)
-        
         updates = []
+        async for page in self.stream_updates(since, full_resync):
+            updates.extend(page)
+        return updates
+    
+    async def stream_updates(
+        self, since: datetime = None, full_resync: bool = False
+    ) -> AsyncIterator[List[Update]]:
+        """
+        Crawl all configured channels concurrently and yield updates newest first
         
-        for channel_id in self.channels:
-            try:
-                # Fetch channel history
-                response = self.client.conversations_history(
-                    channel=channel_id,
-                    oldest=since.timestamp(),
-                    limit=100  # Adjust based on needs
-                )
+        Each channel is its own newest-first stream, and the channel streams are merged
+        by timestamp. At most ``max_concurrency`` Slack requests are in flight at any time.
+        
+        A channel's history is only read back to the start of the previous run's window,
+        so a thread is discovered from its parent message if it gets its first replies
+        before the run after the one that saw the parent. Threads with replies are then
+        remembered and polled directly until they have been quiet for
+        ``thread_lookback_days``.
+        
+        Args:
+            since: Only fetch messages after this datetime (default: each channel's watermark)
+            full_resync: Ignore stored channel and thread watermarks
+        
+        Yields:
+            Lists of Update objects, newest first
+        
+        Raises:
+            SlackApiError: After the other channels are done, if any channel failed
+        """
+        await self.clients.bind_session(self.client)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._thread_semaphore = asyncio.Semaphore(self.thread_concurrency)
+        
+        merger = UpdateStreamMerger(
+            {
+                channel_id: self._stream_channel(channel_id, since, full_resync)
+                for channel_id in self.channels
+            },
+            page_size=self.stream_page_size
+        )
+        async for page in merger:
+            yield page
+        
+        # The merger drops a failed channel; fail the source so it is reported and its watermarks discarded
+        if merger.failed:
+            raise merger.errors[merger.failed[0]]
+    
+    async def _stream_channel(
+        self, channel_id: str, since: Optional[datetime], full_resync: bool
+    ) -> AsyncIterator[List[Update]]:
+        """
+        Yield one channel's messages and new thread replies, newest first
+        
+        Known threads older than the history window are polled while the history is
+        read. A reply can be newer than anything else in the channel, and a thread's
+        newest reply is only known once its parent has been read or its poll is done,
+        so nothing is released before then. From there on a thread's replies are never
+        newer than its ``latest_reply``, so updates are released as the thread crawls
+        finish instead of waiting for the slowest one.
+        """
+        channel_since = to_utc(since) if since else self.resolve_since(channel_id, full_resync)
+        history_since = self._history_since(channel_id, channel_since, full_resync)
+        history = self._iter_history_pages(channel_id, history_since)
+        history_read = asyncio.ensure_future(history.__anext__())
+        history_done = False
+        # Thread crawl -> its latest_reply; polls have no known bound until they finish
+        threads: Dict[asyncio.Future, float] = {
+            asyncio.ensure_future(self._crawl_thread(channel_id, thread_ts, oldest)): float("inf")
+            for thread_ts, oldest in self._known_threads(channel_id, history_since, channel_since, full_resync)
+        }
+        buffer: List[Tuple[float, int, Update]] = []
+        seq = itertools.count()
+        latest_ts = None
+        
+        try:
+            while history_read or threads:
+                pending = set(threads) | ({history_read} if history_read else set())
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
                 
-                for message in response.get("messages", []):
-                    # Skip bot messages and thread replies (we'll handle threads separately)
-                    if message.get("subtype") == "bot_message" or "thread_ts" in message:
+                for task in done:
+                    if task is not history_read:
+                        for update in task.result():
+                            heapq.heappush(buffer, (-update.epoch, next(seq), update))
+                        del threads[task]
+                        continue
+                    
+                    history_read = None
+                    try:
+                        messages = task.result()
+                    except StopAsyncIteration:
+                        history_done = True
                         continue
-                        
-                    # Create update for the message
-                    update = Update(
-                        source=f"slack:{channel_id}",
-                        content=message.get("text", ""),
-                        author=message.get("user", "unknown"),
-                        timestamp=datetime.fromtimestamp(float(message.get("ts", 0))),
-                        url=self._get_message_link(channel_id, message.get("ts")),
-                        metadata={
-                            "channel": channel_id,
-                            "thread_ts": message.get("thread_ts"),
-                            "reactions": message.get("reactions", [])
-                        }
-                    )
-                    updates.append(update)
                     
-                    # If this message has a thread, fetch thread replies
-                    if "thread_ts" in message:
-                        thread_updates = await self._fetch_thread_replies(channel_id, message["thread_ts"], since)
-                        updates.extend(thread_updates)
-                        
-            except SlackApiError as e:
-                logger.error(f"Error fetching Slack updates from channel {channel_id}: {e}")
+                    page, new_threads = self._process_messages(channel_id, messages, channel_since, full_resync)
+                    for update in page:
+                        heapq.heappush(buffer, (-update.epoch, next(seq), update))
+                    for thread_ts, oldest, latest_reply in new_threads:
+                        crawl = asyncio.ensure_future(self._crawl_thread(channel_id, thread_ts, oldest, latest_reply))
+                        threads[crawl] = float(latest_reply)
+                    if messages:
+                        latest_ts = max(latest_ts or 0.0, max(float(m.get("ts", 0)) for m in messages))
+                    history_read = asyncio.ensure_future(history.__anext__())
+                
+                if not history_done:
+                    continue
+                
+                bound = max(threads.values(), default=float("-inf"))
+                released = []
+                while buffer and -buffer[0][0] >= bound:
+                    released.append(heapq.heappop(buffer)[2])
+                if released:
+                    yield released
+            
+            if buffer:
+                yield [heapq.heappop(buffer)[2] for _ in range(len(buffer))]
+            
+            # History comes newest first, so only advance once every page was read
+            if history_done:
+                if latest_ts:
+                    self.advance_watermark(channel_id, latest_ts)
+                self.stage_state("slack_windows", channel_id, to_epoch(channel_since))
+        finally:
+            unfinished = [task for task in [history_read, *threads] if task is not None]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            await history.aclose()
+    
+    async def _crawl_thread(
+        self, channel_id: str, thread_ts: str, oldest: str, latest_reply: Optional[str] = None
+    ) -> List[Update]:
+        """
+        Fetch a thread's replies newer than `oldest` and stage its reply watermark
         
+        Without `latest_reply` (a poll of a known thread) the watermark is only
+        rewritten if new replies were found, so quiet threads age out of the state store.
+        """
+        updates = []
+        async with self._thread_semaphore:
+            async for messages in self._iter_reply_pages(channel_id, thread_ts, oldest):
+                updates.extend(self._process_replies(channel_id, thread_ts, messages, oldest))
+                if latest_reply is None:
+                    replies = [m["ts"] for m in messages if m.get("ts") != thread_ts and float(m["ts"]) > float(oldest)]
+                    latest_reply = max(replies, key=float, default=None)
+        if latest_reply is not None:
+            self.stage_state("slack_threads", self._thread_key(channel_id, thread_ts), latest_reply)
         return updates
     
-    async def _fetch_thread_replies(self, channel_id: str, thread_ts: str, since: datetime) -> List[Update]:
-        """Fetch replies to a thread"""
+    def _history_since(self, channel_id: str, channel_since: datetime, full_resync: bool) -> datetime:
+        """
+        How far back to read a channel's history
+        
+        Back to the start of the previous run's window, so that threads whose parent
+        was read last time but which had no replies yet are still discovered.
+        """
+        previous = None if full_resync else self.state_store.get("slack_windows", channel_id)
+        if previous is None:
+            return channel_since
+        floor = datetime.now(timezone.utc) - timedelta(days=self.thread_lookback_days)
+        return min(channel_since, max(datetime.fromtimestamp(previous, tz=timezone.utc), floor))
+    
+    def _known_threads(
+        self, channel_id: str, history_since: datetime, channel_since: datetime, full_resync: bool
+    ) -> List[Tuple[str, str]]:
+        """
+        Threads to poll for new replies
+        
+        Returns:
+            (thread_ts, oldest) for every thread with a stored reply watermark whose parent
+            is older than the history window (newer ones are checked from the history)
+        """
+        prefix = self._thread_key(channel_id, "")
+        history_ts = to_epoch(history_since)
+        since_ts = to_epoch(channel_since)
+        threads = []
+        for key, watermark in self.state_store.items("slack_threads", prefix).items():
+            thread_ts = key[len(prefix):]
+            if float(thread_ts) > history_ts:
+                continue
+            oldest = since_ts if full_resync else max(float(watermark), since_ts)
+            threads.append((thread_ts, f"{oldest:.6f}"))
+        return threads
+    
+    async def _iter_history_pages(self, channel_id: str, since: datetime) -> AsyncIterator[List[Dict]]:
+        """Follow ``response_metadata.next_cursor`` through a channel's history"""
+        cursor = None
+        while True:
+            async with self._semaphore:
+                response = await self.rate_limiter.call(
+                    "conversations.history",
+                    self.client.conversations_history,
+                    channel=channel_id,
+                    oldest=str(to_epoch(since)),
+                    limit=self.page_size,
+                    cursor=cursor
+                )
+            
+            yield response.get("messages", [])
+            
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+    
+    async def _iter_reply_pages(self, channel_id: str, thread_ts: str, oldest: str) -> AsyncIterator[List[Dict]]:
+        """Follow ``response_metadata.next_cursor`` through the replies of a thread newer than `oldest`"""
+        cursor = None
+        while True:
+            async with self._semaphore:
+                response = await self.rate_limiter.call(
+                    "conversations.replies",
+                    self.client.conversations_replies,
+                    channel=channel_id,
+                    ts=thread_ts,
+                    oldest=oldest,
+                    limit=self.page_size,
+                    cursor=cursor
+                )
+            
+            yield response.get("messages", [])
+            
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+    
+    def _process_messages(
+        self, channel_id: str, messages: List[Dict], since: datetime, full_resync: bool = False
+    ) -> Tuple[List[Update], List[Tuple[str, str, str]]]:
+        """
+        Convert one page of channel history into Update objects
+        
+        Returns:
+            Tuple of (updates, threads) where threads lists (thread_ts, oldest, latest_reply)
+            for every thread that has replies newer than its stored watermark
+        """
         updates = []
-        try:
-            response = self.client.conversations_replies(
-                channel=channel_id,
-                ts=thread_ts
+        candidates = []
+        since_ts = to_epoch(since)
+        
+        for message in messages:
+            # Skip bot messages and replies broadcast to the channel (the thread crawler picks those up)
+            if message.get("subtype") == "bot_message":
+                continue
+            if message.get("thread_ts") and message.get("thread_ts") != message.get("ts"):
+                continue
+            
+            if message.get("reply_count") and message.get("latest_reply"):
+                candidates.append(message)
+            
+            # Older top-level messages are only scanned for thread activity
+            if float(message.get("ts", 0)) <= since_ts:
+                continue
+            
+            # Create update for the message
+            update = Update.trusted(
+                source=f"slack:{channel_id}",
+                content=message.get("text", ""),
+                author=message.get("user", "unknown"),
+                timestamp=float(message.get("ts", 0)),
+                url=self._get_message_link(channel_id, message.get("ts")),
+                metadata={
+                    "channel": channel_id,
+                    "thread_ts": message.get("thread_ts"),
+                    "reactions": message.get("reactions", []),
+                    "reply_count": message.get("reply_count", 0)
+                }
             )
+            updates.append(update)
+        
+        threads = []
+        watermarks = {}
+        if candidates and not full_resync:
+            watermarks = self.state_store.get_many(
+                "slack_threads",
+                [self._thread_key(channel_id, message["ts"]) for message in candidates]
+            )
+        
+        for message in candidates:
+            watermark = watermarks.get(self._thread_key(channel_id, message["ts"]))
+            latest_reply = message["latest_reply"]
+            if watermark and float(latest_reply) <= float(watermark):
+                continue  # No new replies since the last crawl
             
-            for message in response.get("messages", [])[1:]:  # Skip the first message (already processed)
-                if float(message.get("ts", 0)) > since.timestamp():
-                    update = Update(
-                        source=f"slack:{channel_id}:thread",
-                        content=message.get("text", ""),
-                        author=message.get("user", "unknown"),
-                        timestamp=datetime.fromtimestamp(float(message.get("ts", 0))),
-                        url=self._get_message_link(channel_id, message.get("ts")),
-                        metadata={
-                            "channel": channel_id,
-                            "thread_ts": thread_ts,
-                            "is_thread_reply": True
-                        }
-                    )
-                    updates.append(update)
-                    
-        except SlackApiError as e:
-            logger.error(f"Error fetching thread replies for {channel_id}/{thread_ts}: {e}")
+            oldest = max(float(watermark or 0), since_ts)
+            if float(latest_reply) <= oldest:
+                continue
+            threads.append((message["ts"], f"{oldest:.6f}", latest_reply))
+        
+        return updates, threads
+    
+    def _process_replies(self, channel_id: str, thread_ts: str, messages: List[Dict], oldest: str) -> List[Update]:
+        """Convert one page of thread replies into Update objects"""
+        updates = []
+        
+        for message in messages:
+            # The parent message is always returned, and `oldest` is inclusive
+            if message.get("ts") == thread_ts or float(message.get("ts", 0)) <= float(oldest):
+                continue
+            if message.get("subtype") == "bot_message":
+                continue
             
+            update = Update.trusted(
+                source=f"slack:{channel_id}:thread",
+                content=message.get("text", ""),
+                author=message.get("user", "unknown"),
+                timestamp=float(message.get("ts", 0)),
+                url=self._get_message_link(channel_id, message.get("ts")),
+                metadata={
+                    "channel": channel_id,
+                    "thread_ts": thread_ts,
+                    "is_thread_reply": True,
+                    "reactions": message.get("reactions", [])
+                }
+            )
+            updates.append(update)
+        
         return updates
     
+    def commit_watermarks(self):
+        """Persist channel and thread watermarks and stop polling threads that have gone quiet"""
+        super().commit_watermarks()
+        
+        # A thread's watermark is only rewritten when it gets new replies
+        cutoff = time.time() - timedelta(days=self.thread_lookback_days).total_seconds()
+        self.state_store.prune("slack_threads", cutoff)
+    
+    @staticmethod
+    def _thread_key(channel_id: str, thread_ts: str) -> str:
+        """State store key for a thread's reply watermark"""
+        return f"{channel_id}:{thread_ts}"
+    
     def _get_message_link(self, channel_id: str, ts: str) -> str:
         """Generate a direct link to a Slack message"""
         return f"https://slack.com/app_redirect?channel={channel_id}&message={ts}"
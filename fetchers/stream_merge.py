@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .base_fetcher import Update
+
+logger = logging.getLogger(__name__)
+
+class UpdateStreamMerger:
+    """
+    Merge several newest-first streams of update pages into one newest-first stream
+    
+    Every input stream must yield pages that never contain an update newer than one it
+    yielded before (a history API walked newest first does this naturally). An update
+    is released as soon as no stream can still produce a newer one, so output starts
+    once every stream has delivered its first page instead of after the last one.
+    
+    Each stream reads at most one page ahead while it still has ``page_size`` updates
+    waiting to be released, so the merge itself buffers in proportion to the number of
+    streams. A stream may buffer internally before it can yield (a Slack channel holds
+    its updates until its threads are known), and `AutoPM.fetch_all_updates` collects
+    the merged output into one list.
+    
+    A stream that raises or misses its deadline is closed and dropped; the merge goes
+    on with the remaining streams and the failure is recorded in `report`.
+    """
+    
+    def __init__(
+        self,
+        streams: Dict[str, AsyncIterator[List[Update]]],
+        timeouts: Optional[Dict[str, float]] = None,
+        page_size: int = 500
+    ):
+        """
+        Args:
+            streams: Async iterators of update pages, keyed by source name
+            timeouts: Seconds each source may take in total (default: no deadline)
+            page_size: Maximum number of updates per merged page
+        """
+        self.streams = streams
+        self.timeouts = timeouts or {}
+        self.page_size = page_size
+        self.report: Dict[str, Dict[str, Any]] = {
+            name: {"success": True, "count": 0, "latency_seconds": 0.0, "error": None}
+            for name in streams
+        }
+        # The exception each failed stream raised (TimeoutError when it missed its deadline)
+        self.errors: Dict[str, BaseException] = {}
+    
+    @property
+    def failed(self) -> List[str]:
+        """Names of the streams that raised or timed out"""
+        return [name for name, report in self.report.items() if not report["success"]]
+    
+    def __aiter__(self) -> AsyncIterator[List[Update]]:
+        return self._merge()
+    
+    async def _merge(self) -> AsyncIterator[List[Update]]:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadlines = {
+            name: loop.time() + timeout for name, timeout in self.timeouts.items() if timeout is not None
+        }
+        
+        heap: List[tuple] = []  # (-epoch, seq, source, update): newest update on top
+        seq = itertools.count()
+        buffered = {name: 0 for name in self.streams}
+        # Upper bound (epoch) on anything a stream may still yield; unknown until its first page
+        frontier = {name: float("inf") for name in self.streams}
+        reads: Dict[str, asyncio.Future] = {
+            name: asyncio.ensure_future(stream.__anext__()) for name, stream in self.streams.items()
+        }
+        
+        def finish(name: str, error: Optional[str] = None):
+            frontier.pop(name, None)
+            report = self.report[name]
+            report["latency_seconds"] = round(time.perf_counter() - started, 3)
+            if error:
+                report["success"] = False
+                report["error"] = error
+        
+        try:
+            while reads:
+                timeout = None
+                if any(name in deadlines for name in reads):
+                    timeout = max(min(deadlines[name] for name in reads if name in deadlines) - loop.time(), 0)
+                done, _ = await asyncio.wait(reads.values(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                for name, task in list(reads.items()):
+                    if task in done:
+                        del reads[name]
+                        try:
+                            page = task.result()
+                        except StopAsyncIteration:
+                            finish(name)
+                            continue
+                        except Exception as e:
+                            logger.error(f"Error streaming updates from {name}: {e}", exc_info=True)
+                            self.errors[name] = e
+                            finish(name, str(e))
+                            await self._close(name)
+                            continue
+                        
+                        for update in page:
+                            epoch = update.epoch
+                            heapq.heappush(heap, (-epoch, next(seq), name, update))
+                            frontier[name] = min(frontier[name], epoch)
+                        buffered[name] += len(page)
+                        self.report[name]["count"] += len(page)
+                    
+                    elif name in deadlines and loop.time() >= deadlines[name]:
+                        del reads[name]
+                        logger.error(f"Timed out streaming updates from {name} after {self.timeouts[name]}s")
+                        await self._cancel(task)
+                        self.errors[name] = asyncio.TimeoutError(f"{name} timed out after {self.timeouts[name]}s")
+                        finish(name, f"timed out after {self.timeouts[name]}s")
+                        await self._close(name)
+                
+                # Release everything at least as new as the newest update any stream may still yield
+                bound = max(frontier.values(), default=float("-inf"))
+                released = []
+                while heap and -heap[0][0] >= bound:
+                    _, _, name, update = heapq.heappop(heap)
+                    buffered[name] -= 1
+                    released.append(update)
+                
+                for name in frontier:
+                    if name not in reads and buffered[name] < self.page_size:
+                        reads[name] = asyncio.ensure_future(self.streams[name].__anext__())
+                
+                for start in range(0, len(released), self.page_size):
+                    yield released[start:start + self.page_size]
+            
+            remaining = [heapq.heappop(heap)[3] for _ in range(len(heap))]
+            for start in range(0, len(remaining), self.page_size):
+                yield remaining[start:start + self.page_size]
+        
+        finally:
+            for name, task in reads.items():
+                await self._cancel(task)
+                await self._close(name)
+    
+    @staticmethod
+    async def _cancel(task: asyncio.Future):
+        """Cancel a pending read and wait until the stream has stopped running"""
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    
+    async def _close(self, name: str):
+        """Close a stream so it can release its resources"""
+        aclose = getattr(self.streams[name], "aclose", None)
+        if aclose is None:
+            return
+        try:
+            await aclose()
+        except Exception as e:
+            logger.warning(f"Error closing update stream {name}: {e}")
@@ -9,8 +9,9 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -27,14 +28,23 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import local modules
+from clients.client_registry import get_default_client_registry
 from config.settings import settings
+from fetchers.base_fetcher import Update
 from fetchers.slack_fetcher import SlackFetcher
 from fetchers.jira_fetcher import JiraFetcher
 from fetchers.notion_fetcher import NotionFetcher
+from fetchers.stream_merge import UpdateStreamMerger
+from processors.deduplicator import NearDuplicateCollapser
+from processors.relevance_scorer import RelevanceScorer
+from summarizers.base_summarizer import BaseSummarizer, DigestSummary
+from summarizers.extractive_summarizer import ExtractiveSummarizer
 from summarizers.openai_summarizer import OpenAISummarizer
+from notifiers.broadcaster import Broadcaster, DeliveryResult, Destination
 from notifiers.slack_notifier import SlackNotifier
 from notifiers.email_notifier import EmailNotifier
 from scheduler.digest_scheduler import DigestScheduler
+from storage.run_journal import JournalRun, RunJournal
 
 class AutoPM:
     """Main AutoPM application class"""
@@ -42,9 +52,31 @@ class AutoPM:
     def __init__(self):
         """Initialize the AutoPM application"""
         self.fetchers = self._initialize_fetchers()
-        self.summarizer = OpenAISummarizer()
+        self.processors = self._initialize_processors()
+        self.summarizer = self._initialize_summarizer()
         self.notifiers = self._initialize_notifiers()
+        self.destinations = Destination.parse_list(settings.DIGEST_DESTINATIONS)
+        self.broadcaster = Broadcaster(self.notifiers)
+        self.journal = RunJournal(resume_window=settings.RUN_RESUME_WINDOW_HOURS * 3600)
         self.scheduler = DigestScheduler()
+        self.last_fetch_report: Dict[str, Dict[str, Any]] = {}
+    
+    def _initialize_processors(self) -> List[Any]:
+        """Near-duplicate collapsing, plus relevance selection if RELEVANCE_MAX_UPDATES is set"""
+        processors = [NearDuplicateCollapser()]
+        if settings.RELEVANCE_MAX_UPDATES > 0:
+            processors.append(RelevanceScorer({"max_updates": settings.RELEVANCE_MAX_UPDATES}))
+            logger.info(f"Keeping at most {settings.RELEVANCE_MAX_UPDATES} of the most relevant updates per digest")
+        return processors
+    
+    def _initialize_summarizer(self) -> BaseSummarizer:
+        """Initialize the summarizer selected by SUMMARIZER_BACKEND"""
+        if settings.SUMMARIZER_BACKEND == "extractive":
+            logger.info("Using the local extractive summarizer")
+            return ExtractiveSummarizer()
+        if settings.SUMMARIZER_BACKEND != "openai":
+            logger.warning(f"Unknown SUMMARIZER_BACKEND {settings.SUMMARIZER_BACKEND!r}; using OpenAI")
+        return OpenAISummarizer()
     
     def _initialize_fetchers(self) -> Dict[str, Any]:
         """Initialize and configure data fetchers"""
@@ -115,126 +147,382 @@ class AutoPM:
         
         return notifiers
     
-    async def generate_digest(self) -> str:
+    def _record_fetch_report(self, merger: UpdateStreamMerger) -> Dict[str, Dict[str, Any]]:
+        """Log the outcome of a merged fetch and drop the watermarks of failed sources"""
+        for source, report in merger.report.items():
+            if report["success"]:
+                logger.info(f"Fetched {report['count']} updates from {source} in {report['latency_seconds']}s")
+            else:
+                self.fetchers[source].discard_watermarks()
+                logger.error(f"Fetching updates from {source} failed: {report['error']}")
+        return merger.report
+    
+    async def fetch_all_updates(self, full_resync: bool = False) -> Tuple[List[Any], Dict[str, Dict[str, Any]]]:
+        """
+        Fetch updates from all sources concurrently
+        
+        Every source fetches under its own deadline, so total fetch time is bounded by
+        the slowest source rather than the sum of all of them. Sources that fail or time
+        out are left out and have their staged watermarks discarded. The sources' pages
+        are merged newest first as they arrive, so the window is never sorted as a whole.
+        
+        Args:
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            
+        Returns:
+            Tuple of (all updates newest first, per-source report)
+        """
+        merger = UpdateStreamMerger(
+            {source: fetcher.stream_updates(full_resync=full_resync) for source, fetcher in self.fetchers.items()},
+            timeouts={source: fetcher.timeout for source, fetcher in self.fetchers.items()}
+        )
+        all_updates = []
+        async for page in merger:
+            all_updates.extend(page)
+        
+        return all_updates, self._record_fetch_report(merger)
+    
+    async def prepare_updates(self, full_resync: bool = False) -> List[Update]:
+        """
+        Fetch updates from all sources and run them through the processors
+        
+        Args:
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            
+        Returns:
+            The updates to summarize, newest first
+        """
+        # Fetch updates from all sources; the merged list is already sorted newest first
+        all_updates, self.last_fetch_report = await self.fetch_all_updates(full_resync)
+        
+        # Collapse cross-posts and other near-duplicates, then (if enabled) keep the most
+        # relevant updates that fit the token budget, before they reach the model
+        for processor in self.processors:
+            all_updates = processor.process(all_updates)
+        return all_updates
+    
+    async def prepare_digest_batch(self, batch_job: str = "daily_digest"):
+        """
+        Submit the next digest's summarization to the OpenAI Batch API ahead of time
+        
+        Runs hours before the digest so the cheaper batch has time to finish. The
+        fetch watermarks are left where they are, so the digest run fetches the same
+        window again plus anything newer; only the newer updates need live completions.
+        
+        Args:
+            batch_job: Name the digest run collects the batch under
+        """
+        if not isinstance(self.summarizer, OpenAISummarizer):
+            logger.info("Batch preparation only applies to the OpenAI summarizer; skipping")
+            return
+        
+        try:
+            all_updates = await self.prepare_updates()
+            await self.summarizer.submit_batch(all_updates, job=batch_job)
+        except Exception as e:
+            logger.error(f"Error preparing digest batch: {e}", exc_info=True)
+        finally:
+            self._finish_fetch_cycle(False)
+    
+    async def generate_digest(self, full_resync: bool = False, batch_job: Optional[str] = None) -> str:
         """
         Generate a digest by fetching updates from all sources and summarizing them
         
+        Only updates since each source's last committed watermark are fetched, unless
+        `full_resync` is set.
+        
+        Args:
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            batch_job: Collect the batch prepared under this name first (see prepare_digest_batch)
+            
         Returns:
             str: Formatted digest content
         """
-        logger.info("Starting digest generation...")
+        summary = await self.generate_summary(full_resync, batch_job)
+        return summary.to_markdown()
+    
+    async def generate_summary(self, full_resync: bool = False, batch_job: Optional[str] = None) -> DigestSummary:
+        """
+        Fetch updates from all sources and summarize them
         
-        # Fetch updates from all sources
-        all_updates = []
-        for source, fetcher in self.fetchers.items():
-            try:
-                updates = await fetcher.fetch_updates()
-                logger.info(f"Fetched {len(updates)} updates from {source}")
-                all_updates.extend(updates)
-            except Exception as e:
-                logger.error(f"Error fetching updates from {source}: {e}", exc_info=True)
+        Args:
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            batch_job: Collect the batch prepared under this name first (see prepare_digest_batch)
+            
+        Returns:
+            DigestSummary for the notifiers to render
+        """
+        logger.info("Starting digest generation...")
+        all_updates = await self.prepare_updates(full_resync)
+        return await self.summarize_updates(all_updates, batch_job)
+    
+    async def summarize_updates(self, all_updates: List[Update], batch_job: Optional[str] = None) -> DigestSummary:
+        """
+        Summarize prepared updates
         
-        # Sort updates by timestamp (newest first)
-        all_updates.sort(key=lambda x: x.timestamp, reverse=True)
+        Args:
+            all_updates: Updates from prepare_updates
+            batch_job: Collect the batch prepared under this name first (see prepare_digest_batch)
+            
+        Returns:
+            DigestSummary for the notifiers to render
+        """
+        if batch_job and isinstance(self.summarizer, OpenAISummarizer):
+            # Finished batch results land in the extraction cache and are reused below
+            if await self.summarizer.collect_batch(batch_job, wait=settings.BATCH_COLLECT_WAIT_SECONDS) is None:
+                await self.summarizer.cancel_batch(batch_job)
         
         # Generate summary
         summary = await self.summarizer.summarize(all_updates)
         
-        # Format the digest
-        digest = summary.to_markdown()
-        
         logger.info("Digest generation complete")
-        return digest
+        return summary
     
-    async def send_digest(self, digest_content: str, notifier_types: List[str] = None) -> Dict[str, Dict]:
+    async def send_digest(
+        self,
+        digest_content: str,
+        notifier_types: List[str] = None,
+        summary: Optional[DigestSummary] = None,
+        destinations: Optional[List[Destination]] = None,
+        on_result: Optional[Callable[[DeliveryResult], None]] = None
+    ) -> Dict[str, Dict]:
         """
-        Send the digest using the specified notifiers
+        Send the digest to all of its destinations concurrently
         
         Args:
             digest_content: The formatted digest content to send
             notifier_types: List of notifier types to use (default: all available)
+            summary: The summary behind the content, for notifiers with rich formatting
+            destinations: Where to send the digest (default: DIGEST_DESTINATIONS)
+            on_result: Called with each destination's result as soon as it is known
             
         Returns:
-            Dict containing the results from each notifier
+            Dict of results keyed by destination (e.g. "slack:#autopm-digests"), with timings
         """
-        if notifier_types is None:
-            notifier_types = list(self.notifiers.keys())
-        
-        results = {}
-        
-        for notifier_type in notifier_types:
-            if notifier_type in self.notifiers:
-                try:
-                    if notifier_type == "slack":
-                        result = await self.notifiers[notifier_type].send(
-                            content=digest_content,
-                            channel="#autopm-digests"
-                        )
-                    elif notifier_type == "email":
-                        result = await self.notifiers[notifier_type].send(
-                            content=digest_content,
-                            subject=f"AutoPM Digest - {datetime.now().strftime('%Y-%m-%d')}",
-                            to_emails=["team@example.com"],
-                            is_html=False
-                        )
-                    else:
-                        result = await self.notifiers[notifier_type].send(content=digest_content)
-                    
-                    results[notifier_type] = {
-                        "success": result.success,
-                        "message": result.message,
-                        "details": result.details
-                    }
-                    logger.info(f"Sent digest via {notifier_type}: {result.message}")
-                except Exception as e:
-                    error_msg = f"Error sending digest via {notifier_type}: {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    results[notifier_type] = {
-                        "success": False,
-                        "message": error_msg,
-                        "details": {"error": str(e)}
-                    }
+        if destinations is None:
+            destinations = self.resolve_destinations(notifier_types)
         
-        return results
+        results = await self.broadcaster.broadcast(
+            digest_content,
+            destinations,
+            summary,
+            options={"email": {"subject": f"AutoPM Digest - {datetime.now().strftime('%Y-%m-%d')}"}},
+            on_result=on_result
+        )
+        for result in results:
+            logger.info(f"Sent digest to {result.destination} in {result.seconds:.2f}s: {result.message}")
+        return {result.destination: result.model_dump(exclude={"destination"}) for result in results}
     
-    async def run_digest_cycle(self, notifier_types: List[str] = None):
+    def resolve_destinations(self, notifier_types: List[str] = None) -> List[Destination]:
+        """
+        The configured destinations of the given notifier types that have a working notifier
+        
+        Args:
+            notifier_types: List of notifier types to use (default: all available)
+            
+        Returns:
+            Destinations from DIGEST_DESTINATIONS
+        """
+        destinations = self.destinations
+        if notifier_types is not None:
+            destinations = [destination for destination in destinations if destination.notifier in notifier_types]
+        
+        unavailable = {destination.notifier for destination in destinations} - set(self.notifiers)
+        if unavailable:
+            logger.warning(f"Skipping digest destinations for unavailable notifiers: {', '.join(sorted(unavailable))}")
+            destinations = [destination for destination in destinations if destination.notifier in self.notifiers]
+        return destinations
+    
+    def _finish_fetch_cycle(self, success: bool):
+        """Persist fetch watermarks after a delivered digest, or drop them so the window is retried"""
+        for source, fetcher in self.fetchers.items():
+            try:
+                if success:
+                    fetcher.commit_watermarks()
+                else:
+                    fetcher.discard_watermarks()
+            except Exception as e:
+                logger.error(f"Error saving watermarks for {source}: {e}", exc_info=True)
+    
+    async def run_digest_cycle(
+        self,
+        notifier_types: List[str] = None,
+        full_resync: bool = False,
+        batch_job: Optional[str] = None
+    ):
         """
         Run a complete digest cycle: generate and send digest
         
         Args:
             notifier_types: List of notifier types to use (default: all available)
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            batch_job: Collect the batch prepared under this name first (see prepare_digest_batch)
         """
+        self._prune_journal()
+        
+        # A run that died part-way (or could not reach every destination) is picked up
+        # where it stopped, unless a full resync asks for fresh data
+        run = self.journal.start("digest", resume=not full_resync)
+        if run.resumed:
+            logger.info(f"Resuming digest run {run.run_id} after stages: {', '.join(run.stages) or 'none'}")
+        
         try:
             # Generate the digest
-            digest = await self.generate_digest()
+            summary, digest = await self._build_digest(run, full_resync, batch_job)
             
             # Send the digest
-            results = await self.send_digest(digest, notifier_types)
+            results = await self._deliver_digest(run, digest, summary, notifier_types)
             
-            # Log results
-            success = all(result["success"] for result in results.values())
+            # Log results; a run with nowhere to deliver has not delivered anything
+            success = bool(results) and all(result["success"] for result in results.values())
             if success:
                 logger.info("Digest cycle completed successfully")
+                self.journal.finish(run)
+            elif not results:
+                logger.warning(f"No digest destination is available; run {run.run_id} can be resumed")
             else:
-                logger.warning("Digest cycle completed with some failures")
+                logger.warning(f"Digest cycle completed with some failures; run {run.run_id} can be resumed")
+            
+            # Only move watermarks forward once the updates have reached someone
+            delivered = any(result["success"] for result in results.values())
+            self._finish_fetch_cycle(delivered)
             
-            return {"success": success, "results": results}
+            return {"success": success, "results": results, "fetch_report": self.last_fetch_report, "run_id": run.run_id}
             
         except Exception as e:
             error_msg = f"Error in digest cycle: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            return {"success": False, "error": error_msg}
+            self._finish_fetch_cycle(False)
+            return {"success": False, "error": error_msg, "run_id": run.run_id}
+    
+    def _prune_journal(self):
+        """Delete journaled runs older than RUN_RETENTION_DAYS, never ones that could still be resumed"""
+        retention = max(settings.RUN_RETENTION_DAYS * 86400, self.journal.resume_window)
+        try:
+            removed = self.journal.prune(time.time() - retention)
+            if removed:
+                logger.info(f"Pruned {removed} old digest runs from the journal")
+        except Exception as e:
+            logger.error(f"Error pruning the run journal: {e}", exc_info=True)
+    
+    async def _build_digest(
+        self,
+        run: JournalRun,
+        full_resync: bool = False,
+        batch_job: Optional[str] = None
+    ) -> Tuple[DigestSummary, str]:
+        """
+        Fetch, summarize and render the digest, reusing stages the run already checkpointed
+        
+        Args:
+            run: The journal run to checkpoint into
+            full_resync: Ignore stored watermarks and fetch every source's full lookback window
+            batch_job: Collect the batch prepared under this name first (see prepare_digest_batch)
+            
+        Returns:
+            Tuple of (summary, markdown digest)
+        """
+        fetched = self.journal.load(run, "fetched")
+        if fetched is None:
+            all_updates = await self.prepare_updates(full_resync)
+            self.journal.checkpoint(run, "fetched", {
+                "updates": [update.model_dump(mode="json") for update in all_updates],
+                "watermarks": {source: fetcher.staged_state() for source, fetcher in self.fetchers.items()},
+                "report": self.last_fetch_report
+            })
+        else:
+            # The watermarks were staged by the attempt that died; stage them again so
+            # they are committed once this attempt delivers
+            for source, state in fetched["watermarks"].items():
+                if source in self.fetchers:
+                    self.fetchers[source].restore_staged_state(state)
+            self.last_fetch_report = fetched["report"]
+        
+        summary_data = self.journal.load(run, "summary")
+        if summary_data is None:
+            if fetched is not None:
+                all_updates = [Update.model_validate(update) for update in fetched["updates"]]
+            summary = await self.summarize_updates(all_updates, batch_job)
+            self.journal.checkpoint(run, "summary", summary.model_dump(mode="json"))
+        else:
+            summary = DigestSummary.model_validate(summary_data)
+        
+        digest = self.journal.load(run, "rendered")
+        if digest is None:
+            digest = summary.to_markdown()
+            self.journal.checkpoint(run, "rendered", digest)
+        return summary, digest
+    
+    async def _deliver_digest(
+        self,
+        run: JournalRun,
+        digest: str,
+        summary: DigestSummary,
+        notifier_types: List[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        Send the digest to every destination the run has not delivered to yet
+        
+        Each delivery carries its outbox idempotency key. Deliveries that were in
+        flight when an earlier attempt died also carry the time they started, so
+        notifiers that can look back (Slack) check for the earlier copy first.
+        
+        Args:
+            run: The journal run whose outbox to use
+            digest: The formatted digest content to send
+            summary: The summary behind the content
+            notifier_types: List of notifier types to use (default: all available)
+            
+        Returns:
+            Dict of results keyed by destination, including earlier successful deliveries
+        """
+        destinations = self.resolve_destinations(notifier_types)
+        outbox = self.journal.outbox(run, [destination.label for destination in destinations])
+        results = {label: entry.result for label, entry in outbox.items() if entry.status == "delivered"}
+        if results:
+            logger.info(f"Digest already delivered to {len(results)} destinations; not sending those again")
+        
+        pending = []
+        for destination in destinations:
+            entry = outbox[destination.label]
+            if entry.status == "delivered":
+                continue
+            options = {**destination.options, "idempotency_key": entry.idempotency_key}
+            if entry.status == "sending":
+                options["delivered_after"] = entry.updated_at
+            pending.append(destination.model_copy(update={"options": options}))
+        if not pending:
+            return results
+        
+        def record(result: DeliveryResult):
+            self.journal.record_delivery(run, result.destination, result.success, result.model_dump(exclude={"destination"}))
+        
+        self.journal.mark_sending(run, [destination.label for destination in pending])
+        results.update(await self.send_digest(digest, summary=summary, destinations=pending, on_result=record))
+        return results
     
     async def schedule_digests(self):
         """Schedule periodic digests"""
+        batch_job = "daily_digest" if settings.DIGEST_PREPARE_SCHEDULE else None
+        
         # Schedule daily digests (weekdays at 5 PM)
-        await self.scheduler.schedule_digest(
+        self.scheduler.schedule_digest(
             task_id="daily_digest",
             schedule=settings.DIGEST_SCHEDULE,  # e.g., "0 17 * * 1-5" for weekdays at 5 PM
             task_func=self.run_digest_cycle,
-            notifier_types=["slack", "email"]  # Use both Slack and email by default
+            notifier_types=["slack", "email"],  # Use both Slack and email by default
+            batch_job=batch_job
         )
         
+        # Start the digest's summarization early through the Batch API
+        if batch_job:
+            self.scheduler.schedule_digest(
+                task_id="prepare_daily_digest",
+                schedule=settings.DIGEST_PREPARE_SCHEDULE,
+                task_func=self.prepare_digest_batch,
+                batch_job=batch_job
+            )
+        
         logger.info("Scheduled periodic digests")
     
     async def run(self):
@@ -257,6 +545,11 @@ class AutoPM:
             logger.error(f"Error in AutoPM: {e}", exc_info=True)
             await self.scheduler.stop()
             raise
+        finally:
+            for fetcher in self.fetchers.values():
+                fetcher.close()
+            # Close pooled connections shared by the fetchers and notifiers
+            await get_default_client_registry().close()
 
 
 async def main():
@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
+from clients.client_registry import ClientRegistry, get_default_client_registry
+from renderers.rendered_digest import RenderedDigest
+
 class NotificationResult(BaseModel):
     """Result of a notification attempt"""
     success: bool
@@ -13,6 +16,8 @@ class BaseNotifier(ABC):
     
     def __init__(self, config: Dict = None):
         self.config = config or {}
+        # Clients and rate limits are shared with the fetchers and other digest jobs
+        self.clients: ClientRegistry = self.config.get("client_registry") or get_default_client_registry()
     
     @abstractmethod
     async def send(self, content: str, **kwargs) -> NotificationResult:
@@ -28,6 +33,27 @@ class BaseNotifier(ABC):
         """
         pass
     
+    def prepare(self, digest: RenderedDigest) -> Dict[str, Any]:
+        """
+        Render a digest once for any number of sends
+        
+        The broadcaster calls this once per digest and passes the result to every
+        `send` call, so notifiers that format the digest (e.g. into Block Kit) should
+        do that work here. Renderings are cached on the digest and shared between
+        notifiers that use the same format.
+        
+        Args:
+            digest: The digest, renderable in the formats under renderers/
+            
+        Returns:
+            Keyword arguments for `send`
+        """
+        return {"content": digest.markdown}
+    
+    def destination_kwargs(self, target: str) -> Dict[str, Any]:
+        """Keyword arguments for `send` that address one destination (a channel, an address, ...)"""
+        return {}
+    
     def get_notifier_name(self) -> str:
         """Return a human-readable name for the notifier"""
         return self.__class__.__name__.replace("Notifier", "").lower()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .base_notifier import BaseNotifier
+from renderers.rendered_digest import RenderedDigest
+from summarizers.base_summarizer import DigestSummary
+
+logger = logging.getLogger(__name__)
+
+class Destination(BaseModel):
+    """Where one copy of the digest goes"""
+    notifier: str  # Notifier type, e.g. "slack" or "email"
+    target: str  # Channel, address, etc., as the notifier understands it
+    options: Dict[str, Any] = Field(default_factory=dict)  # Extra send() arguments for this destination
+    
+    @property
+    def label(self) -> str:
+        """The destination as "notifier:target", used to key results"""
+        return f"{self.notifier}:{self.target}"
+    
+    @classmethod
+    def parse_list(cls, spec: str) -> List["Destination"]:
+        """
+        Parse a comma-separated list of destinations
+        
+        Args:
+            spec: e.g. "slack:#eng-digest, slack:#leads, email:team@example.com"
+            
+        Returns:
+            Destinations in the given order
+        """
+        destinations = []
+        for entry in spec.split(","):
+            notifier, sep, target = entry.strip().partition(":")
+            if not sep or not target:
+                if entry.strip():
+                    raise ValueError(f"Invalid digest destination {entry.strip()!r}; expected notifier:target")
+                continue
+            destinations.append(cls(notifier=notifier.strip(), target=target.strip()))
+        return destinations
+
+class DeliveryResult(BaseModel):
+    """Outcome of delivering to one destination"""
+    destination: str
+    success: bool
+    message: str
+    details: Dict[str, Any] = Field(default_factory=dict)
+    queued_seconds: float = 0.0  # Waiting for the notifier's concurrency limit
+    seconds: float = 0.0  # Delivery itself
+
+class Broadcaster:
+    """
+    Delivers a digest to many destinations across notifiers at once
+    
+    Every destination is sent concurrently, limited per notifier type by
+    ``concurrency``, so a broadcast takes about as long as its slowest delivery.
+    A per-notifier ``timeouts`` entry is passed to `send` as ``request_timeout`` and
+    bounds each request a delivery makes rather than the whole delivery, so a digest
+    posted as several Slack messages is never cut off between two of them.
+    
+    Each notifier prepares the digest once (see BaseNotifier.prepare) and the result
+    is reused for all of its destinations; the formats they render are cached on one
+    RenderedDigest, so notifiers that need the same format share it.
+    """
+    
+    def __init__(self, notifiers: Dict[str, BaseNotifier], config: Dict = None):
+        self.notifiers = notifiers
+        self.config = config or {}
+        self.concurrency: Dict[str, int] = {"slack": 8, "email": 4, **self.config.get("concurrency", {})}
+        self.timeouts: Dict[str, float] = {"slack": 60.0, "email": 120.0, **self.config.get("timeouts", {})}
+        self.default_concurrency = self.config.get("default_concurrency", 4)
+        self.default_timeout = self.config.get("default_timeout", 60.0)
+    
+    async def broadcast(
+        self,
+        content: str,
+        destinations: List[Destination],
+        summary: Optional[DigestSummary] = None,
+        options: Optional[Dict[str, Dict[str, Any]]] = None,
+        on_result: Optional[Callable[[DeliveryResult], None]] = None
+    ) -> List[DeliveryResult]:
+        """
+        Send the digest to every destination
+        
+        Args:
+            content: The digest as markdown
+            destinations: Where to send it
+            summary: The summary behind the content, for notifiers with rich formatting
+            options: Extra send() arguments per notifier type, e.g. an email subject
+            on_result: Called with each result as soon as its delivery finishes
+            
+        Returns:
+            One result per destination, in the order given
+        """
+        options = options or {}
+        digest = RenderedDigest(summary, markdown=content)
+        prepared: Dict[str, Any] = {}
+        limits: Dict[str, asyncio.Semaphore] = {}
+        for notifier_type in dict.fromkeys(destination.notifier for destination in destinations):
+            notifier = self.notifiers.get(notifier_type)
+            if notifier is None:
+                continue
+            try:
+                prepared[notifier_type] = notifier.prepare(digest)
+            except Exception as e:
+                logger.error(f"Error rendering digest for {notifier_type}: {e}", exc_info=True)
+                prepared[notifier_type] = e
+            limits[notifier_type] = asyncio.Semaphore(self.concurrency.get(notifier_type, self.default_concurrency))
+        logger.debug(f"Rendered digest as {', '.join(digest.rendered_formats)}")
+        
+        async def deliver(destination: Destination) -> DeliveryResult:
+            result = await self._deliver(destination, prepared, limits, options.get(destination.notifier, {}))
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"Error recording delivery to {destination.label}: {e}", exc_info=True)
+            return result
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(deliver(destination) for destination in destinations))
+        
+        failed = [result.destination for result in results if not result.success]
+        logger.info(
+            f"Delivered digest to {len(results) - len(failed)} of {len(results)} destinations "
+            f"in {time.perf_counter() - started:.2f}s" + (f"; failed: {', '.join(failed)}" if failed else "")
+        )
+        return results
+    
+    async def _deliver(
+        self,
+        destination: Destination,
+        prepared: Dict[str, Any],
+        limits: Dict[str, asyncio.Semaphore],
+        options: Dict[str, Any]
+    ) -> DeliveryResult:
+        """Send to one destination under its notifier's concurrency limit and request timeout"""
+        notifier = self.notifiers.get(destination.notifier)
+        if notifier is None:
+            return DeliveryResult(
+                destination=destination.label,
+                success=False,
+                message=f"Notifier {destination.notifier!r} is not configured"
+            )
+        rendered = prepared[destination.notifier]
+        if isinstance(rendered, Exception):
+            return DeliveryResult(
+                destination=destination.label,
+                success=False,
+                message=f"Error rendering digest: {rendered}",
+                details={"error": str(rendered)}
+            )
+        
+        timeout = self.timeouts.get(destination.notifier, self.default_timeout)
+        kwargs = {
+            **rendered,
+            "request_timeout": timeout,
+            **options,
+            **notifier.destination_kwargs(destination.target),
+            **destination.options
+        }
+        queued = time.perf_counter()
+        async with limits[destination.notifier]:
+            started = time.perf_counter()
+            try:
+                result = await notifier.send(**kwargs)
+                success, message, details = result.success, result.message, result.details
+            except asyncio.TimeoutError:
+                success, message, details = False, f"A request timed out after {timeout:g}s", {"error": "timeout"}
+            except Exception as e:
+                logger.error(f"Error sending digest to {destination.label}: {e}", exc_info=True)
+                success, message, details = False, f"Error sending digest: {e}", {"error": str(e)}
+            finished = time.perf_counter()
+        
+        return DeliveryResult(
+            destination=destination.label,
+            success=success,
+            message=message,
+            details=details,
+            queued_seconds=round(started - queued, 4),
+            seconds=round(finished - started, 4)
+        )
@@ -1,16 +1,37 @@
+import asyncio
 import logging
-import smtplib
+from collections import deque
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, List, Optional
 
+import aiosmtplib
+from pydantic import BaseModel
+
 from .base_notifier import BaseNotifier, NotificationResult
 from config.settings import settings
+from renderers.rendered_digest import HTML, RenderedDigest
 
 logger = logging.getLogger(__name__)
 
+class PersonalizedEmail(BaseModel):
+    """One recipient's copy of a digest"""
+    to: str
+    subject: str
+    content: str
+    is_html: bool = False
+
+class _ConnectionLost(Exception):
+    """A pooled SMTP connection failed in the middle of a batch"""
+
 class EmailNotifier(BaseNotifier):
-    """Sends notifications via email"""
+    """
+    Sends notifications via email
+    
+    Mail goes through a shared pool of persistent SMTP connections, so the connect,
+    STARTTLS and login handshake is paid once per connection rather than once per
+    message, and sending never blocks the event loop.
+    """
     
     def __init__(self, config: Dict = None):
         super().__init__(config or {})
@@ -20,6 +41,16 @@ class EmailNotifier(BaseNotifier):
         self.smtp_password = self.config.get("smtp_password", "")
         self.sender_email = self.config.get("sender_email", self.smtp_username)
         self.use_tls = self.config.get("use_tls", True)
+        self.max_connections = self.config.get("max_connections", 4)
+        self.max_attempts = self.config.get("max_attempts", 2)  # Per message, when a connection drops
+        self.pool = self.clients.smtp_pool(
+            self.smtp_server,
+            self.smtp_port,
+            self.smtp_username,
+            self.smtp_password,
+            start_tls=self.use_tls,
+            size=self.max_connections
+        )
     
     async def send(self, content: str, **kwargs) -> NotificationResult:
         """
@@ -33,6 +64,10 @@ class EmailNotifier(BaseNotifier):
                 - cc_emails: List of CC emails
                 - bcc_emails: List of BCC emails
                 - is_html: Whether the content is HTML (default: False)
+                - text_content: Plain-text version of HTML content, sent as an alternative part
+                - idempotency_key: Makes the Message-ID deterministic, so mail clients and
+                  list servers treat a resent digest as the same message
+                - request_timeout: Seconds each SMTP command may take (default: the pool's)
                 
         Returns:
             NotificationResult indicating success or failure
@@ -42,6 +77,7 @@ class EmailNotifier(BaseNotifier):
         cc_emails = kwargs.get("cc_emails", [])
         bcc_emails = kwargs.get("bcc_emails", [])
         is_html = kwargs.get("is_html", False)
+        text_content = kwargs.get("text_content")
         
         if not to_emails:
             return NotificationResult(
@@ -51,31 +87,21 @@ class EmailNotifier(BaseNotifier):
             )
         
         try:
-            # Create message container
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.sender_email
-            msg['To'] = ", ".join(to_emails)
-            
-            if cc_emails:
-                msg['Cc'] = ", ".join(cc_emails)
+            msg = self._build_message(subject, content, to_emails, cc_emails, is_html, text_content)
+            if kwargs.get("idempotency_key"):
+                domain = self.sender_email.rpartition("@")[2] or "autopm.local"
+                msg['Message-ID'] = f"<{kwargs['idempotency_key']}@{domain}>"
             
             # All recipients (to + cc + bcc)
             all_recipients = to_emails + cc_emails + bcc_emails
             
-            # Attach the content as plain text or HTML
-            content_type = 'html' if is_html else 'plain'
-            msg.attach(MIMEText(content, content_type, 'utf-8'))
-            
-            # Connect to the SMTP server and send the email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                
-                if self.smtp_username and self.smtp_password:
-                    server.login(self.smtp_username, self.smtp_password)
-                
-                server.send_message(msg)
+            timeout = kwargs.get("request_timeout")
+            async with self.pool.acquire() as smtp:
+                if timeout is None:
+                    await smtp.send_message(msg, recipients=all_recipients)
+                else:
+                    await smtp.send_message(msg, recipients=all_recipients, timeout=timeout)
+                self.pool.record_sent(smtp)
             
             return NotificationResult(
                 success=True,
@@ -87,8 +113,8 @@ class EmailNotifier(BaseNotifier):
                     "subject": subject
                 }
             )
-            
-        except smtplib.SMTPException as e:
+        
+        except aiosmtplib.SMTPException as e:
             error_message = f"SMTP error sending email: {str(e)}"
             logger.error(error_message)
             return NotificationResult(
@@ -104,3 +130,100 @@ class EmailNotifier(BaseNotifier):
                 message=error_message,
                 details={"error": str(e)}
             )
+    
+    def prepare(self, digest: RenderedDigest) -> Dict[str, Any]:
+        """Send digests as HTML with the markdown as the plain-text alternative"""
+        if not digest.can_render(HTML):
+            return {"content": digest.markdown}
+        return {"content": digest.render(HTML), "is_html": True, "text_content": digest.markdown}
+    
+    def destination_kwargs(self, target: str) -> Dict[str, Any]:
+        """A destination is one address, e.g. a mailing list"""
+        return {"to_emails": [target]}
+    
+    async def send_batch(self, emails: List[PersonalizedEmail]) -> NotificationResult:
+        """
+        Send each recipient their own email over pooled connections
+        
+        Up to ``max_connections`` workers each borrow one connection and send message
+        after message over it, taking the next email from a shared queue. A refused
+        recipient only fails that email; a dropped connection is replaced and the
+        email retried, up to ``max_attempts`` times.
+        
+        Args:
+            emails: The emails to send
+            
+        Returns:
+            NotificationResult with the sent addresses and the failures by address
+        """
+        queue = deque((email, 1) for email in emails)
+        sent: List[str] = []
+        failed: Dict[str, str] = {}
+        connect_errors: List[BaseException] = []
+        
+        async def worker():
+            while queue:
+                try:
+                    async with self.pool.acquire() as smtp:
+                        while queue and not self.pool.exhausted(smtp):
+                            email, attempt = queue.popleft()
+                            try:
+                                msg = self._build_message(email.subject, email.content, [email.to], [], email.is_html)
+                                await smtp.send_message(msg, recipients=[email.to])
+                            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                                failed[email.to] = str(e)
+                                continue
+                            except (aiosmtplib.SMTPException, OSError) as e:
+                                if attempt < self.max_attempts:
+                                    queue.append((email, attempt + 1))
+                                else:
+                                    failed[email.to] = str(e)
+                                raise _ConnectionLost() from e
+                            self.pool.record_sent(smtp)
+                            sent.append(email.to)
+                except _ConnectionLost:
+                    continue  # The pool has dropped the connection; borrow a fresh one
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    # Could not connect or log in; leave the rest to the other workers
+                    connect_errors.append(e)
+                    return
+        
+        workers = max(min(self.max_connections, len(emails)), 1)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        for email, _ in queue:
+            failed[email.to] = str(connect_errors[-1]) if connect_errors else "not sent"
+        
+        if failed:
+            logger.error(f"Failed to email {len(failed)} of {len(emails)} recipients")
+        return NotificationResult(
+            success=not failed,
+            message=f"Emailed {len(sent)} of {len(emails)} recipients",
+            details={"sent": sent, "failed": failed, "smtp_server": self.smtp_server}
+        )
+    
+    def _build_message(
+        self,
+        subject: str,
+        content: str,
+        to_emails: List[str],
+        cc_emails: List[str],
+        is_html: bool,
+        text_content: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Build the MIME message; BCC recipients only go in the envelope"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.sender_email
+        msg['To'] = ", ".join(to_emails)
+        
+        if cc_emails:
+            msg['Cc'] = ", ".join(cc_emails)
+        
+        # Clients show the last alternative they support, so plain text goes first
+        if is_html and text_content:
+            msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
+        
+        # Attach the content as plain text or HTML
+        content_type = 'html' if is_html else 'plain'
+        msg.attach(MIMEText(content, content_type, 'utf-8'))
+        return msg
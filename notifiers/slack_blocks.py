@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Tuple
+
+# Slack's documented limits: 50 blocks per message, 3000 characters of text per
+# section block and 150 per header block
+MAX_BLOCKS = 50
+MAX_SECTION_CHARS = 3000
+MAX_HEADER_CHARS = 150
+# Keep each message well under the 40k-character text limit so it renders in one screen
+MAX_MESSAGE_CHARS = 12000
+
+_FENCE = "```"
+
+Block = Dict[str, Any]
+
+def pack_messages(
+    blocks: List[Tuple[Block, bool]],
+    max_blocks: int = MAX_BLOCKS,
+    max_chars: int = MAX_MESSAGE_CHARS
+) -> List[List[Block]]:
+    """
+    Pack blocks into as few messages as the limits allow
+    
+    Blocks marked keep_with_next start a new message together with the block after
+    them, so a section header never ends a message.
+    
+    Args:
+        blocks: (block, keep_with_next) pairs in display order
+        max_blocks: Most blocks per message
+        max_chars: Most text characters per message
+    
+    Returns:
+        The blocks of each message, in order
+    """
+    units: List[List[Block]] = []
+    pending: List[Block] = []
+    for block, keep_with_next in blocks:
+        pending.append(block)
+        if not keep_with_next:
+            units.append(pending)
+            pending = []
+    if pending:
+        units.append(pending)
+    
+    messages: List[List[Block]] = []
+    current: List[Block] = []
+    chars = 0
+    for unit in units:
+        size = sum(block_chars(block) for block in unit)
+        if current and (len(current) + len(unit) > max_blocks or chars + size > max_chars):
+            messages.append(current)
+            current, chars = [], 0
+        current.extend(unit)
+        chars += size
+    if current:
+        messages.append(current)
+    
+    # A divider is only useful between blocks of the same message
+    for message in messages:
+        while message and message[-1]["type"] == "divider":
+            message.pop()
+        while message and message[0]["type"] == "divider":
+            message.pop(0)
+    return [message for message in messages if message]
+
+def pack_text(pieces: List[str], limit: int, separator: str = "\n\n") -> List[str]:
+    """
+    Join pieces greedily into chunks of at most `limit` characters
+    
+    Pieces are only split when one is longer than `limit` by itself (see split_text).
+    
+    Args:
+        pieces: Text pieces in order, e.g. list items or paragraphs
+        limit: Most characters per chunk
+        separator: Text placed between pieces in the same chunk
+    
+    Returns:
+        The chunks, in order
+    """
+    parts: List[str] = []
+    for piece in pieces:
+        parts.extend([piece] if len(piece) <= limit else split_text(piece, limit))
+    return _join(parts, limit, separator)
+
+def split_text(text: str, limit: int) -> List[str]:
+    """
+    Split text into chunks of at most `limit` characters along its structure
+    
+    Paragraphs are preferred as break points, then lines, then words; a word longer
+    than the limit is cut. A code block that spans two chunks is closed at the end of
+    the first and reopened at the start of the next, so both render as code.
+    
+    Args:
+        text: Markdown or mrkdwn text
+        limit: Most characters per chunk
+    
+    Returns:
+        The chunks, in order
+    """
+    if len(text) <= limit:
+        return [text] if text else []
+    # Leave room to close and reopen a code fence
+    budget = max(limit - 2 * (len(_FENCE) + 1), 1)
+    
+    chunks = _split(text, budget, ("\n\n", "\n", " "))
+    fenced: List[str] = []
+    open_fence = False
+    for chunk in chunks:
+        if open_fence:
+            chunk = _FENCE + "\n" + chunk
+        open_fence = chunk.count(_FENCE) % 2 == 1
+        fenced.append(chunk + "\n" + _FENCE if open_fence else chunk)
+    return fenced
+
+def _split(text: str, limit: int, separators: Tuple[str, ...]) -> List[str]:
+    """Split on the first separator, recursing into pieces that are still too long"""
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+    
+    separator, rest = separators[0], separators[1:]
+    pieces: List[str] = []
+    for piece in text.split(separator):
+        pieces.extend(_split(piece, limit, rest) if len(piece) > limit else [piece])
+    
+    return _join(pieces, limit, separator)
+
+def _join(pieces: List[str], limit: int, separator: str) -> List[str]:
+    """Greedily join pieces that each fit the limit into as few chunks as possible"""
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(separator) + len(piece) <= limit:
+            current += separator + piece
+        else:
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def block_chars(block: Block) -> int:
+    """Characters of text in a block"""
+    if block["type"] == "context":
+        return sum(len(element.get("text", "")) for element in block["elements"])
+    return len(block.get("text", {}).get("text", ""))
+
+def block_text(block: Block) -> str:
+    """Plain-text fallback for a block, used for notifications and search"""
+    if block["type"] == "context":
+        return " ".join(element.get("text", "") for element in block["elements"])
+    return block.get("text", {}).get("text", "")
@@ -1,20 +1,48 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from slack_sdk import WebClient
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from slack_sdk.errors import SlackApiError
 
 from .base_notifier import BaseNotifier, NotificationResult
+from .slack_blocks import MAX_BLOCKS, MAX_MESSAGE_CHARS, MAX_SECTION_CHARS, block_text, pack_messages, split_text
 from config.settings import settings
+from renderers.rendered_digest import BLOCK_KIT, RenderedDigest
+from summarizers.base_summarizer import DigestSummary
 
 logger = logging.getLogger(__name__)
 
+# Message metadata event that marks a posted digest with its delivery's idempotency key
+DIGEST_EVENT_TYPE = "autopm_digest"
+
+# Channel ids (public, private and direct message); names are lowercase, so anything else is a name
+_CHANNEL_ID = re.compile(r"[CGD][A-Z0-9]+")
+
 class SlackNotifier(BaseNotifier):
-    """Sends notifications to Slack channels"""
+    """
+    Sends notifications to Slack channels
+    
+    Long content is split into several messages: the first goes to the channel and the
+    rest are replies in its thread. Digest summaries are posted as Block Kit sections
+    packed along section and item boundaries; plain text is split at paragraph, line
+    and word boundaries.
+    
+    Thread replies are posted one after another, paced by the shared rate limiter.
+    Slack orders messages by the time it receives them, so a reply is only sent once
+    the one before it has been accepted.
+    """
     
     def __init__(self, config: Dict = None):
         super().__init__(config or {})
-        self.client = WebClient(token=settings.SLACK_BOT_TOKEN)
+        self.client = self.clients.slack_client(settings.SLACK_BOT_TOKEN)
+        self.rate_limiter = self.clients.rate_limiter("slack")
         self.default_channel = self.config.get("default_channel", "#general")
+        self.max_blocks = self.config.get("max_blocks", MAX_BLOCKS)
+        self.max_message_chars = self.config.get("max_message_chars", MAX_MESSAGE_CHARS)
+        self.max_text_chars = self.config.get("max_text_chars", MAX_SECTION_CHARS)  # Per plain-text message
+        self.request_timeout = self.config.get("request_timeout")  # Seconds per API request (None: the client's)
+        self._channel_ids: Optional[Dict[str, str]] = None  # Channel name -> id, listed once
+        self._channel_ids_lock = asyncio.Lock()
     
     async def send(self, content: str, **kwargs) -> NotificationResult:
         """
@@ -25,42 +53,62 @@ class SlackNotifier(BaseNotifier):
             **kwargs: Additional arguments:
                 - channel: The channel to send to (defaults to default_channel)
                 - thread_ts: Optional timestamp of a thread to reply to
-                
+                - summary: Optional DigestSummary to post as Block Kit instead of `content`
+                - messages: Payloads already built with `build_messages`
+                - idempotency_key: Key attached to the first message as metadata
+                - delivered_after: Epoch time an earlier, interrupted attempt with the same
+                  key started; if that attempt's message is in the channel it is not posted again
+                - request_timeout: Seconds each API request may take (default: request_timeout);
+                  a digest split into several messages makes several requests
+            
         Returns:
             NotificationResult indicating success or failure
         """
         channel = kwargs.get("channel", self.default_channel)
         thread_ts = kwargs.get("thread_ts")
+        summary: Optional[DigestSummary] = kwargs.get("summary")
+        timeout = kwargs.get("request_timeout", self.request_timeout)
         
         try:
-            # Split long messages into chunks if needed (Slack has a limit of ~4000 chars per message)
-            max_length = 3000  # Conservative limit to account for formatting
-            chunks = [content[i:i+max_length] for i in range(0, len(content), max_length)]
+            await self.clients.bind_session(self.client)
+            messages = kwargs.get("messages") or self.build_messages(RenderedDigest(summary, markdown=content))
             
-            # Send the first chunk
-            response = self.client.chat_postMessage(
-                channel=channel,
-                text=chunks[0],
-                thread_ts=thread_ts,
-                mrkdwn=True
-            )
+            idempotency_key = kwargs.get("idempotency_key")
+            if idempotency_key and kwargs.get("delivered_after") is not None:
+                earlier = await self._find_delivered(channel, idempotency_key, kwargs["delivered_after"], timeout)
+                if earlier is not None:
+                    logger.info(f"Digest was already posted to {channel} at {earlier['ts']}; not posting again")
+                    return NotificationResult(
+                        success=True,
+                        message=f"Message already in {channel}",
+                        details={"channel": channel, "thread_ts": earlier["ts"], "deduplicated": True}
+                    )
+            if idempotency_key:
+                messages = [
+                    {**messages[0], "metadata": {"event_type": DIGEST_EVENT_TYPE, "event_payload": {"idempotency_key": idempotency_key}}},
+                    *messages[1:]
+                ]
             
-            # If there are more chunks, send them as thread replies
-            thread_ts = response["ts"]
-            for chunk in chunks[1:]:
-                self.client.chat_postMessage(
-                    channel=channel,
-                    text=chunk,
-                    thread_ts=thread_ts,
-                    mrkdwn=True
-                )
+            # The first message opens the thread (unless we were asked to reply in one)
+            response = await self._post(channel, messages[0], thread_ts, timeout)
+            thread_ts = thread_ts or response["ts"]
+            
+            await self._post_replies(channel, thread_ts, messages[1:], timeout)
             
             return NotificationResult(
                 success=True,
                 message=f"Message sent to {channel}",
-                details={"channel": channel, "thread_ts": thread_ts}
+                details={"channel": channel, "thread_ts": thread_ts, "messages": len(messages)}
+            )
+        
+        except asyncio.TimeoutError:
+            error_message = f"A Slack request timed out after {timeout:g}s"
+            logger.error(error_message)
+            return NotificationResult(
+                success=False,
+                message=error_message,
+                details={"error": "timeout", "channel": channel}
             )
-            
         except SlackApiError as e:
             error_message = f"Error sending Slack message: {e.response['error']}"
             logger.error(error_message)
@@ -77,3 +125,148 @@ class SlackNotifier(BaseNotifier):
                 message=error_message,
                 details={"error": str(e), "channel": channel}
             )
+    
+    def prepare(self, digest: RenderedDigest) -> Dict[str, Any]:
+        """Build the digest's messages once for every channel it goes to"""
+        return {"content": digest.markdown, "messages": self.build_messages(digest)}
+    
+    def destination_kwargs(self, target: str) -> Dict[str, Any]:
+        """A destination is a channel name or id"""
+        return {"channel": target}
+    
+    def build_messages(self, digest: RenderedDigest) -> List[Dict[str, Any]]:
+        """
+        Split a digest into chat.postMessage payloads
+        
+        Args:
+            digest: The digest; posted as Block Kit if it has a summary, else as its markdown
+            
+        Returns:
+            Payloads with "text" (and "blocks" for a summary), in posting order
+        """
+        if not digest.can_render(BLOCK_KIT):
+            return [{"text": chunk, "mrkdwn": True} for chunk in split_text(digest.markdown, self.max_text_chars) or [""]]
+        
+        messages = pack_messages(digest.render(BLOCK_KIT), self.max_blocks, self.max_message_chars)
+        payloads = []
+        for part, blocks in enumerate(messages, 1):
+            # Notifications and clients without Block Kit show `text` instead
+            text = block_text(blocks[0])
+            if len(messages) > 1:
+                text = f"{text} ({part}/{len(messages)})"
+            payloads.append({"text": text, "blocks": blocks})
+        return payloads
+    
+    async def _call(self, method: str, func: Callable[..., Awaitable[Any]], timeout: Optional[float], **kwargs) -> Any:
+        """Make one API request under the rate limit; `timeout` bounds the request, not the wait for the limit"""
+        async def request(**request_kwargs):
+            return await asyncio.wait_for(func(**request_kwargs), timeout)
+        
+        return await self.rate_limiter.call(method, request, **kwargs)
+    
+    async def _post(
+        self, channel: str, payload: Dict[str, Any], thread_ts: Optional[str], timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Post one message under the rate limit"""
+        return await self._call(
+            "chat.postMessage",
+            self.client.chat_postMessage,
+            timeout,
+            scope=channel,
+            channel=channel,
+            thread_ts=thread_ts,
+            **payload
+        )
+    
+    async def _find_delivered(
+        self, channel: str, idempotency_key: str, after: float, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look for a digest message an earlier attempt already posted
+        
+        Reading history needs a channel id, so a channel name is resolved first. If the
+        channel cannot be resolved or read, nothing is found and the digest is posted again.
+        
+        Args:
+            channel: Channel the digest goes to, by name or id
+            idempotency_key: Key the earlier attempt attached to its first message
+            after: Epoch time the earlier attempt started
+            timeout: Seconds the history request may take
+            
+        Returns:
+            The earlier message, or None if there is none
+        """
+        try:
+            channel_id = await self._channel_id(channel)
+            if channel_id is None:
+                logger.warning(f"Could not check {channel} for an earlier digest: no such channel")
+                return None
+            response = await self._call(
+                "conversations.history",
+                self.client.conversations_history,
+                timeout,
+                channel=channel_id,
+                oldest=f"{after - 60:.6f}",  # Allow for clock skew with Slack
+                include_all_metadata=True,
+                limit=200
+            )
+        except SlackApiError as e:
+            logger.warning(f"Could not check {channel} for an earlier digest: {e.response['error']}")
+            return None
+        for message in response.get("messages", []):
+            metadata = message.get("metadata") or {}
+            if (
+                metadata.get("event_type") == DIGEST_EVENT_TYPE
+                and metadata.get("event_payload", {}).get("idempotency_key") == idempotency_key
+            ):
+                return message
+        return None
+    
+    async def _channel_id(self, channel: str) -> Optional[str]:
+        """
+        The id of a channel given by id or by name (with or without "#")
+        
+        The workspace's channels are listed with ``conversations.list`` the first time a
+        name is looked up and kept for the notifier's lifetime.
+        """
+        if _CHANNEL_ID.fullmatch(channel):
+            return channel
+        async with self._channel_ids_lock:
+            if self._channel_ids is None:
+                channel_ids = {}
+                cursor = None
+                while True:
+                    response = await self._call(
+                        "conversations.list",
+                        self.client.conversations_list,
+                        self.request_timeout,
+                        types="public_channel,private_channel",
+                        exclude_archived=True,
+                        limit=1000,
+                        cursor=cursor
+                    )
+                    channel_ids.update((c["name"], c["id"]) for c in response.get("channels", []))
+                    cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                    if not cursor:
+                        break
+                self._channel_ids = channel_ids
+        return self._channel_ids.get(channel.lstrip("#"))
+    
+    async def _post_replies(
+        self,
+        channel: str,
+        thread_ts: str,
+        payloads: List[Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Post thread replies one after another so they read in order
+        
+        Args:
+            channel: Channel the thread is in
+            thread_ts: Timestamp of the thread's parent message
+            payloads: Reply payloads in the order they should read
+            timeout: Seconds each request may take
+        """
+        for payload in payloads:
+            await self._post(channel, payload, thread_ts, timeout)
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from fetchers.base_fetcher import Update
+
+class BaseProcessor(ABC):
+    """Abstract base class for processing steps that run between fetching and summarization"""
+    
+    def __init__(self, config: Dict = None):
+        self.config = config or {}
+    
+    @abstractmethod
+    def process(self, updates: List[Update]) -> List[Update]:
+        """
+        Process a list of updates
+        
+        Args:
+            updates: Updates from all sources, newest first
+            
+        Returns:
+            The processed updates, in the same order
+        """
+        pass
+    
+    def get_processor_name(self) -> str:
+        """Return a human-readable name for the processor"""
+        return self.__class__.__name__.replace("Processor", "").lower()
@@ -0,0 +1,159 @@
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+from fetchers.base_fetcher import Update
+from .base_processor import BaseProcessor
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+_MASK32 = 0xFFFFFFFF
+
+class NearDuplicateCollapser(BaseProcessor):
+    """
+    Collapses near-duplicate updates (cross-posts, copied announcements) into one
+    
+    Each update's content gets a MinHash signature over word shingles. Exact copies
+    (the same signature) are grouped by hash in one pass. The remaining signatures are
+    split into bands (locality-sensitive hashing), and only updates that share a whole
+    band are compared, which keeps the pass roughly linear in the number of updates.
+    Candidates whose estimated Jaccard similarity reaches ``threshold`` are clustered
+    with union-find, and each cluster keeps one representative with the other copies'
+    URLs and sources in its metadata.
+    
+    Messages too short to fingerprint ("+1", "lgtm") only collapse when the same author
+    posts the same text again in the same thread.
+    """
+    
+    def __init__(self, config: Dict = None):
+        super().__init__(config or {})
+        self.threshold = self.config.get("threshold", 0.6)  # Estimated Jaccard similarity of shingle sets
+        self.shingle_size = self.config.get("shingle_size", 2)
+        # Texts with fewer shingles than this are only collapsed when they match exactly
+        self.min_shingles = self.config.get("min_shingles", 4)
+        self.num_perm = self.config.get("num_perm", 64)
+        self.bands = self.config.get("bands", 16)
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        
+        rng = np.random.default_rng(self.config.get("seed", 1))
+        # Multiply-shift hash family: (a * x + b) mod 2**64, top 32 bits; `a` must be odd
+        self._a = rng.integers(0, 2 ** 63, size=self.num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=self.num_perm, dtype=np.uint64)
+    
+    def process(self, updates: List[Update]) -> List[Update]:
+        """
+        Collapse near-duplicate updates
+        
+        Args:
+            updates: Updates from all sources, newest first
+            
+        Returns:
+            One update per cluster of near-duplicates, in input order. Representatives
+            of clusters list the other copies under ``metadata["duplicate_urls"]`` and
+            ``metadata["duplicate_sources"]``.
+        """
+        if len(updates) < 2:
+            return list(updates)
+        
+        signatures = [self._signature(update.content) for update in updates]
+        parent = list(range(len(updates)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        # Exact copies join the first one seen; only that one takes part in the LSH pass
+        first_seen: Dict[Hashable, int] = {}
+        distinct = []
+        for i, (update, signature) in enumerate(zip(updates, signatures)):
+            key = self._exact_key(update, signature)
+            if key is None:
+                continue
+            first = first_seen.setdefault(key, i)
+            if first != i:
+                parent[i] = first
+            elif not isinstance(signature, str):
+                distinct.append(i)
+        
+        for bucket in self._candidate_buckets(signatures, distinct):
+            for position, i in enumerate(bucket):
+                for j in bucket[position + 1:]:
+                    if find(i) != find(j) and self._is_duplicate(signatures[i], signatures[j]):
+                        parent[find(j)] = find(i)
+        
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(updates)):
+            clusters[find(i)].append(i)
+        if len(clusters) == len(updates):
+            return list(updates)
+        
+        representatives = {}
+        for members in clusters.values():
+            # Keep the most complete copy; on ties, the earliest one (the original post)
+            keep = max(members, key=lambda i: (len(updates[i].content), -updates[i].epoch))
+            duplicates = [updates[i] for i in members if i != keep]
+            representatives[keep] = self._collapse(updates[keep], duplicates) if duplicates else updates[keep]
+        
+        logger.info(f"Collapsed {len(updates) - len(clusters)} near-duplicate updates")
+        return [representatives[i] for i in range(len(updates)) if i in representatives]
+    
+    def _signature(self, content: str):
+        """
+        MinHash signature of an update's content
+        
+        Content with fewer than ``min_shingles`` shingles gets its normalized text
+        instead, since a handful of words gives an unreliable similarity estimate.
+        """
+        words = _WORD.findall(content.lower())
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 0))}
+        if len(shingles) < self.min_shingles:
+            return " ".join(words)
+        
+        # Python's string hash is stable within a process, which is all an in-run index needs
+        hashes = np.fromiter((hash(s) & _MASK32 for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) >> np.uint64(32)).min(axis=0)
+    
+    @staticmethod
+    def _exact_key(update: Update, signature) -> Optional[Hashable]:
+        """
+        Hashable key shared by exact copies, or None for empty content
+        
+        Short texts are keyed by author and thread too, so the same one-word reply from
+        different people or in different threads is kept.
+        """
+        if isinstance(signature, str):
+            if not signature:
+                return None
+            return ("text", update.author, update.metadata.get("thread_ts"), signature)
+        return ("minhash", signature.tobytes())
+    
+    def _candidate_buckets(self, signatures: List, indices: List[int]) -> List[List[int]]:
+        """Group the given update indices (MinHash signatures only) by shared signature band"""
+        rows = self.num_perm // self.bands
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for i in indices:
+            signature = signatures[i]
+            for band in range(self.bands):
+                buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(i)
+        
+        return [bucket for bucket in buckets.values() if len(bucket) > 1]
+    
+    def _is_duplicate(self, a, b) -> bool:
+        """Whether two MinHash signatures estimate a similarity of at least ``threshold``"""
+        return float(np.mean(a == b)) >= self.threshold
+    
+    @staticmethod
+    def _collapse(representative: Update, duplicates: List[Update]) -> Update:
+        """Return a copy of the representative that lists its duplicates' URLs and sources"""
+        metadata = dict(representative.metadata)
+        metadata["duplicate_urls"] = [u.url for u in duplicates if u.url and u.url != representative.url]
+        metadata["duplicate_sources"] = [u.source for u in duplicates]
+        return representative.model_copy(update={"metadata": metadata})
@@ -0,0 +1,178 @@
+import heapq
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from fetchers.base_fetcher import Update
+from summarizers.token_counter import TokenCounter
+from .base_processor import BaseProcessor
+
+logger = logging.getLogger(__name__)
+
+# Signal weights by lowercased Jira field value; unknown values score 0
+JIRA_PRIORITY_WEIGHTS = {"highest": 1.0, "blocker": 1.0, "critical": 1.0, "high": 0.7, "medium": 0.35, "low": 0.1, "lowest": 0.0}
+JIRA_STATUS_WEIGHTS = {"blocked": 0.8, "done": 0.5, "closed": 0.4, "resolved": 0.4, "in review": 0.4, "in progress": 0.3, "to do": 0.1}
+JIRA_ISSUE_TYPE_WEIGHTS = {"incident": 0.8, "bug": 0.4, "epic": 0.5, "story": 0.3, "task": 0.2, "sub-task": 0.1, "subtask": 0.1}
+
+# Tokens each update costs in the prompt beyond its content (number, source, timestamp)
+LINE_OVERHEAD_TOKENS = 12
+
+class DroppedUpdate(BaseModel):
+    """An update left out of the digest and why"""
+    source: str
+    url: str = ""
+    score: float
+    reason: str  # "max_updates", "token_budget" or "source_quota"
+
+class SelectionReport(BaseModel):
+    """What the relevance scorer kept and dropped in one run"""
+    kept: int = 0
+    dropped: int = 0
+    tokens: int = 0  # Estimated prompt tokens of the kept updates
+    dropped_by_reason: Dict[str, int] = Field(default_factory=dict)
+    dropped_by_source: Dict[str, int] = Field(default_factory=dict)
+    top_dropped: List[DroppedUpdate] = Field(default_factory=list)  # Highest-scoring dropped updates
+
+class RelevanceScorer(BaseProcessor):
+    """
+    Keeps the most relevant updates within a count and token budget
+    
+    Each update is scored from its recency (relative to the newest update, with an
+    exponential half-life) and the signals its source provides in `Update.metadata`:
+    reactions and reply counts for Slack, priority, status and issue type for Jira.
+    Very short messages ("thanks!", "+1") are penalized.
+    
+    Selection pops updates off a max-heap by score and keeps each one that still fits
+    the ``token_budget``. An update too long for what is left is dropped, but a shorter
+    one with a lower score can still fit, so tokens are counted for every popped update.
+    Selection stops early once ``max_updates`` are kept, or once the remaining budget is
+    too small for any update. Per-source quotas cap the share of the budget one source
+    (by prefix, e.g. "slack") may take. Kept updates stay in input order. `last_report`
+    records what was dropped, and drops are logged as warnings.
+    """
+    
+    def __init__(self, config: Dict = None):
+        super().__init__(config or {})
+        self.max_updates = self.config.get("max_updates", 400)
+        self.token_budget = self.config.get("token_budget", 80000)
+        # Largest share of the token budget each source prefix may use
+        self.source_quotas: Dict[str, float] = self.config.get("source_quotas", {"slack": 0.6})
+        self.max_update_tokens = self.config.get("max_update_tokens", 600)  # Matches the prompt builder's cap
+        self.half_life_hours = self.config.get("half_life_hours", 24.0)
+        self.weights: Dict[str, float] = {
+            "recency": 1.0,
+            "reactions": 0.3,
+            "replies": 0.4,
+            "priority": 1.0,
+            "status": 0.6,
+            "issue_type": 0.5,
+            "short": -0.5,
+            **self.config.get("weights", {})
+        }
+        self.report_examples = self.config.get("report_examples", 10)
+        self.token_counter = TokenCounter(self.config.get("model", "gpt-4-turbo-preview"))
+        self.last_report = SelectionReport()
+    
+    def process(self, updates: List[Update]) -> List[Update]:
+        """
+        Select the most relevant updates
+        
+        Args:
+            updates: Updates from all sources, newest first
+            
+        Returns:
+            The selected updates, in input order
+        """
+        if not updates:
+            self.last_report = SelectionReport()
+            return []
+        
+        newest = max(update.epoch for update in updates)
+        heap = [(-self.score(update, newest), index) for index, update in enumerate(updates)]
+        heapq.heapify(heap)
+        
+        report = SelectionReport()
+        quotas = {prefix: share * self.token_budget for prefix, share in self.source_quotas.items()}
+        spent: Dict[str, int] = {}
+        kept: List[int] = []
+        while heap:
+            negative_score, index = heapq.heappop(heap)
+            update = updates[index]
+            reason, final = None, False
+            if len(kept) >= self.max_updates:
+                reason, final = "max_updates", True
+            elif self.token_budget - report.tokens <= LINE_OVERHEAD_TOKENS:
+                # Not even an empty update fits any more
+                reason, final = "token_budget", True
+            else:
+                tokens = self.estimate_tokens(update)
+                prefix = update.source.split(":", 1)[0]
+                if report.tokens + tokens > self.token_budget:
+                    reason = "token_budget"
+                elif prefix in quotas and spent.get(prefix, 0) + tokens > quotas[prefix]:
+                    reason = "source_quota"
+                else:
+                    kept.append(index)
+                    report.tokens += tokens
+                    spent[prefix] = spent.get(prefix, 0) + tokens
+                    continue
+            
+            self._record_drop(report, update, -negative_score, reason)
+            if final:
+                # Everything left on the heap is dropped for the same reason
+                for negative_score, index in sorted(heap):
+                    self._record_drop(report, updates[index], -negative_score, reason)
+                break
+        
+        report.kept = len(kept)
+        self.last_report = report
+        if report.dropped:
+            logger.warning(
+                f"Relevance selection kept {report.kept} of {len(updates)} updates (~{report.tokens} tokens); "
+                f"dropped {report.dropped_by_reason} by source {report.dropped_by_source}"
+            )
+        return [updates[index] for index in sorted(kept)]
+    
+    def score(self, update: Update, newest: Optional[float] = None) -> float:
+        """
+        Relevance score of one update
+        
+        Args:
+            update: The update to score
+            newest: Epoch of the newest update in the run (default: the update's own)
+            
+        Returns:
+            Higher is more relevant
+        """
+        weights = self.weights
+        metadata: Dict[str, Any] = update.metadata or {}
+        age_hours = max((newest if newest is not None else update.epoch) - update.epoch, 0) / 3600
+        score = weights["recency"] * 0.5 ** (age_hours / self.half_life_hours)
+        
+        reactions = sum(reaction.get("count", 1) for reaction in metadata.get("reactions") or [])
+        score += weights["reactions"] * math.log1p(reactions)
+        score += weights["replies"] * math.log1p(metadata.get("reply_count") or 0)
+        
+        score += weights["priority"] * JIRA_PRIORITY_WEIGHTS.get(str(metadata.get("priority", "")).lower(), 0.0)
+        score += weights["status"] * JIRA_STATUS_WEIGHTS.get(str(metadata.get("status", "")).lower(), 0.0)
+        score += weights["issue_type"] * JIRA_ISSUE_TYPE_WEIGHTS.get(str(metadata.get("issue_type", "")).lower(), 0.0)
+        
+        if len(update.content.split()) < 4:
+            score += weights["short"]
+        return score
+    
+    def estimate_tokens(self, update: Update) -> int:
+        """Prompt tokens an update is expected to take, capped like the prompt builder caps content"""
+        return min(self.token_counter.count(update.content), self.max_update_tokens) + LINE_OVERHEAD_TOKENS
+    
+    def _record_drop(self, report: SelectionReport, update: Update, score: float, reason: str):
+        """Count a dropped update in the report, keeping the highest-scoring ones as examples"""
+        report.dropped += 1
+        report.dropped_by_reason[reason] = report.dropped_by_reason.get(reason, 0) + 1
+        prefix = update.source.split(":", 1)[0]
+        report.dropped_by_source[prefix] = report.dropped_by_source.get(prefix, 0) + 1
+        # Drops are recorded in descending score order, so the first ones are the top ones
+        if len(report.top_dropped) < self.report_examples:
+            report.top_dropped.append(DroppedUpdate(source=update.source, url=update.url, score=round(score, 4), reason=reason))
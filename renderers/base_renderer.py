@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, List
+
+from summarizers.base_summarizer import SECTIONS, DigestSummary, SummaryItem
+
+DIGEST_TITLE = "Project Update Digest"
+SECTION_TITLES = dict(zip(SECTIONS, ("Progress", "Blockers", "Next Steps")))
+
+def format_timestamp(timestamp: datetime) -> str:
+    """The digest's generation time as shown in every format"""
+    return timestamp.strftime('%Y-%m-%d %H:%M %Z')
+
+class BaseRenderer(ABC):
+    """Abstract base class for digest renderers"""
+    
+    # Name the rendering is cached under, e.g. "markdown" or "html"
+    format: str = ""
+    
+    @abstractmethod
+    def render(self, summary: DigestSummary) -> Any:
+        """
+        Render a digest summary
+        
+        Args:
+            summary: The digest to render
+            
+        Returns:
+            The rendered digest, e.g. a string or Block Kit blocks
+        """
+        pass
+
+class TemplateRenderer(BaseRenderer):
+    """
+    Renders a digest as text from a document, section, item and source template
+    
+    Templates are format strings bound once when the class is defined, and every item
+    is converted to the format once, in a single pass over the summary.
+    Subclasses set the templates and `inline`, which escapes item text and converts
+    its markdown emphasis and links.
+    """
+    
+    # Placeholders: title, generated_at, sections
+    document_template: Callable[..., str] = "{title}\n{generated_at}\n{sections}".format
+    # Placeholders: title, items
+    section_template: Callable[..., str] = "\n{title}\n{items}\n".format
+    # Placeholders: index, content, source
+    item_template: Callable[..., str] = "{index}. {content}{source}".format
+    # Placeholders: source
+    source_template: Callable[..., str] = "\n{source}".format
+    item_separator: str = "\n"
+    
+    def render(self, summary: DigestSummary) -> str:
+        """Render the summary as one string"""
+        sections: List[str] = []
+        for section, title in SECTION_TITLES.items():
+            items: List[SummaryItem] = getattr(summary, section)
+            if items:
+                lines = [self.render_item(index, item) for index, item in enumerate(items, 1)]
+                sections.append(self.section_template(title=title, items=self.item_separator.join(lines)))
+        return self.document_template(
+            title=DIGEST_TITLE,
+            generated_at=format_timestamp(summary.timestamp),
+            sections="".join(sections)
+        )
+    
+    def render_item(self, index: int, item: SummaryItem) -> str:
+        """One numbered item with its source"""
+        source = self.source_template(source=self.inline(item.source)) if item.source else ""
+        return self.item_template(index=index, content=self.inline(item.content), source=source)
+    
+    def inline(self, text: str) -> str:
+        """Convert item text to the format; summaries are written in markdown"""
+        return text
@@ -0,0 +1,42 @@
+import html
+import re
+
+from .base_renderer import TemplateRenderer
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_CODE = re.compile(r"`([^`\n]+)`")
+_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+
+# Email clients drop <style> blocks, so every element carries its own style
+_TEXT = "color:#172b4d;font-family:-apple-system,'Segoe UI',Helvetica,Arial,sans-serif"
+_MUTED = "color:#6b778c;font-size:13px"
+
+class HtmlRenderer(TemplateRenderer):
+    """Renders the digest as an HTML email with inline CSS"""
+    
+    format = "html"
+    
+    document_template = (
+        '<!DOCTYPE html>\n'
+        '<html><head><meta charset="utf-8"><title>{title}</title></head>\n'
+        '<body style="margin:0;padding:0;background:#f4f5f7;">\n'
+        f'<div style="max-width:640px;margin:0 auto;padding:24px;background:#ffffff;{_TEXT};font-size:15px;line-height:1.5;">\n'
+        '<h1 style="margin:0 0 4px;font-size:22px;">{title}</h1>\n'
+        f'<p style="margin:0 0 8px;{_MUTED};">Generated at: {{generated_at}}</p>\n'
+        '{sections}'
+        '</div>\n'
+        '</body></html>\n'
+    ).format
+    section_template = (
+        '<h2 style="margin:24px 0 8px;padding-bottom:4px;border-bottom:1px solid #dfe1e6;font-size:18px;">{title}</h2>\n'
+        '<ol style="margin:0;padding-left:24px;">\n{items}\n</ol>\n'
+    ).format
+    item_template = '<li style="margin:0 0 8px;">{content}{source}</li>'.format
+    source_template = f'<br><span style="{_MUTED};">Source: {{source}}</span>'.format
+    
+    def inline(self, text: str) -> str:
+        """Escape the text and convert markdown bold, code and links to HTML"""
+        text = html.escape(text)
+        text = _BOLD.sub(r"<strong>\1</strong>", text)
+        text = _CODE.sub(r'<code style="font-family:Menlo,Consolas,monospace;background:#f4f5f7;">\1</code>', text)
+        return _LINK.sub(r'<a href="\2" style="color:#0052cc;">\1</a>', text)
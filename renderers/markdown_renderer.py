@@ -0,0 +1,10 @@
+from .base_renderer import TemplateRenderer
+
+class MarkdownRenderer(TemplateRenderer):
+    """Renders the digest as GitHub-flavored markdown"""
+    
+    format = "markdown"
+    
+    document_template = "# {title}\n*Generated at: {generated_at}*\n{sections}".format
+    section_template = "\n## {title}\n{items}\n".format
+    source_template = "\n*Source: {source}*".format
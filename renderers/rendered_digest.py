@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional
+
+from .base_renderer import BaseRenderer
+from .html_renderer import HtmlRenderer
+from .markdown_renderer import MarkdownRenderer
+from .slack_renderer import BlockKitRenderer, SlackMrkdwnRenderer
+from summarizers.base_summarizer import DigestSummary
+
+MARKDOWN = MarkdownRenderer.format
+SLACK_MRKDWN = SlackMrkdwnRenderer.format
+BLOCK_KIT = BlockKitRenderer.format
+HTML = HtmlRenderer.format
+
+# Renderers hold no state, so one instance of each serves every digest
+DEFAULT_RENDERERS: Dict[str, BaseRenderer] = {
+    renderer.format: renderer
+    for renderer in (MarkdownRenderer(), SlackMrkdwnRenderer(), BlockKitRenderer(), HtmlRenderer())
+}
+
+class RenderedDigest:
+    """
+    One digest and its renderings in every format asked for
+    
+    A format is rendered the first time a notifier asks for it and cached, so however
+    many destinations a digest goes to, each format is rendered at most once. The
+    broadcaster creates one per digest and hands it to every notifier's `prepare`.
+    
+    A digest that only exists as markdown (no summary) can only be rendered as markdown.
+    """
+    
+    def __init__(
+        self,
+        summary: Optional[DigestSummary] = None,
+        markdown: Optional[str] = None,
+        renderers: Optional[Dict[str, BaseRenderer]] = None
+    ):
+        """
+        Args:
+            summary: The digest to render
+            markdown: The digest already rendered as markdown, if it has been
+            renderers: Renderers by format (default: DEFAULT_RENDERERS)
+        """
+        if summary is None and markdown is None:
+            raise ValueError("A digest needs a summary or its markdown")
+        self.summary = summary
+        self.renderers = renderers if renderers is not None else DEFAULT_RENDERERS
+        self._rendered: Dict[str, Any] = {}
+        if markdown is not None:
+            self._rendered[MARKDOWN] = markdown
+    
+    def render(self, format: str) -> Any:
+        """
+        The digest in the given format, rendered on first use
+        
+        Args:
+            format: e.g. "markdown", "slack_mrkdwn", "block_kit" or "html"
+            
+        Returns:
+            The rendering; strings for text formats, (block, keep_with_next) pairs for Block Kit
+            
+        Raises:
+            ValueError: If the format is unknown or there is no summary to render
+        """
+        if format not in self._rendered:
+            if format not in self.renderers:
+                raise ValueError(f"Unknown digest format {format!r}")
+            if self.summary is None:
+                raise ValueError(f"Cannot render a markdown-only digest as {format}")
+            self._rendered[format] = self.renderers[format].render(self.summary)
+        return self._rendered[format]
+    
+    def can_render(self, format: str) -> bool:
+        """Whether `render` can produce the format"""
+        return format in self._rendered or (self.summary is not None and format in self.renderers)
+    
+    @property
+    def markdown(self) -> str:
+        """The digest as markdown"""
+        return self.render(MARKDOWN)
+    
+    @property
+    def rendered_formats(self) -> List[str]:
+        """Formats rendered (or given) so far"""
+        return list(self._rendered)
@@ -0,0 +1,78 @@
+import re
+from typing import List, Tuple
+
+from .base_renderer import DIGEST_TITLE, SECTION_TITLES, TemplateRenderer, format_timestamp
+from notifiers.slack_blocks import MAX_HEADER_CHARS, MAX_SECTION_CHARS, Block, pack_text
+from summarizers.base_summarizer import DigestSummary, SummaryItem
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+
+def to_mrkdwn(text: str) -> str:
+    """Escape Slack control characters and convert markdown bold and links to mrkdwn"""
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = _BOLD.sub(r"*\1*", text)
+    return _LINK.sub(r"<\2|\1>", text)
+
+class SlackMrkdwnRenderer(TemplateRenderer):
+    """Renders the digest as Slack mrkdwn text"""
+    
+    format = "slack_mrkdwn"
+    
+    document_template = "*{title}*\n_Generated at: {generated_at}_\n{sections}".format
+    section_template = "\n*{title}*\n{items}\n".format
+    source_template = "\n_Source: {source}_".format
+    
+    def inline(self, text: str) -> str:
+        """Escape the text and convert markdown bold and links to mrkdwn"""
+        return to_mrkdwn(text)
+
+class BlockKitRenderer(SlackMrkdwnRenderer):
+    """
+    Renders the digest as Block Kit blocks
+    
+    Items are rendered as mrkdwn lines and grouped into section blocks of up to
+    MAX_SECTION_CHARS characters, never splitting an item unless it is longer than
+    a whole block on its own. The result is packed into messages by the notifier
+    (see slack_blocks.pack_messages).
+    """
+    
+    format = "block_kit"
+    
+    def render(self, summary: DigestSummary) -> List[Tuple[Block, bool]]:
+        """
+        Render the summary as blocks
+        
+        Args:
+            summary: The digest to render
+            
+        Returns:
+            (block, keep_with_next) pairs; headers are kept with the block that follows them
+        """
+        blocks: List[Tuple[Block, bool]] = [
+            (_header(DIGEST_TITLE), True),
+            (_context(f"Generated at: {format_timestamp(summary.timestamp)}"), False),
+        ]
+        for section, title in SECTION_TITLES.items():
+            items: List[SummaryItem] = getattr(summary, section)
+            if not items:
+                continue
+            blocks.append(({"type": "divider"}, True))
+            blocks.append((_header(title), True))
+            lines = [self.render_item(index, item) for index, item in enumerate(items, 1)]
+            blocks.extend((_section(text), False) for text in pack_text(lines, MAX_SECTION_CHARS, separator="\n"))
+        return blocks
+
+def _header(text: str) -> Block:
+    """Header block, truncated to Slack's header limit"""
+    if len(text) > MAX_HEADER_CHARS:
+        text = text[:MAX_HEADER_CHARS - 1] + "…"
+    return {"type": "header", "text": {"type": "plain_text", "text": text, "emoji": True}}
+
+def _section(text: str) -> Block:
+    """Section block with mrkdwn text"""
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+def _context(text: str) -> Block:
+    """Context block with one line of mrkdwn text"""
+    return {"type": "context", "elements": [{"type": "mrkdwn", "text": text}]}
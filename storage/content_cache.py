@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from pydantic import BaseModel
+
+from config.settings import settings
+
+class CacheStats(BaseModel):
+    """Hit/miss counters for a ContentCache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class ContentCache:
+    """
+    Disk-backed key/value cache with LRU, TTL and size-based eviction
+    
+    Entries live in a SQLite database shared by all namespaces; each namespace is
+    evicted independently. Values must be JSON-serializable.
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.namespace = namespace
+        self.path = path or os.path.join(settings.STATE_DIR, "cache.db")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)"
+            )
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value, refreshing its LRU position
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            The cached value, or None on a miss or an expired entry
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self.stats.evictions += 1
+                row = None
+            
+            if row is None:
+                self.stats.misses += 1
+                return None
+            
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+        
+        self.stats.hits += 1
+        return json.loads(row[0])
+    
+    def set(self, key: str, value: Any):
+        """
+        Store a value and evict least recently used entries beyond the configured limits
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, len(payload), now, now)
+            )
+            self._evict()
+    
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+    
+    def _evict(self):
+        """Drop expired entries, then LRU entries over the count and size limits (lock must be held)"""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds)
+            )
+            self.stats.evictions += max(cursor.rowcount, 0)
+        
+        if self.max_entries is not None:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries)
+            )
+            self.stats.evictions += max(cursor.rowcount, 0)
+        
+        if self.max_bytes is not None:
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            
+            stale = []
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at ASC", (self.namespace,)
+            ):
+                if total <= self.max_bytes:
+                    break
+                stale.append((self.namespace, key))
+                total -= size
+            
+            self._conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", stale)
+            self.stats.evictions += len(stale)
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
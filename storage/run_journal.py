@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+from pydantic import BaseModel, Field
+
+from config.settings import settings
+
+class JournalRun(BaseModel):
+    """One digest run recorded in the journal"""
+    run_id: str
+    job: str
+    started_at: float
+    resumed: bool = False  # Picked up from an earlier, unfinished attempt
+    stages: List[str] = Field(default_factory=list)  # Checkpointed stages, in the order they were written
+
+class OutboxEntry(BaseModel):
+    """Delivery of a run's digest to one destination"""
+    destination: str
+    idempotency_key: str
+    status: str = "pending"  # "pending", "sending", "delivered" or "failed"
+    attempts: int = 0
+    updated_at: float = 0.0
+    result: Dict[str, Any] = Field(default_factory=dict)
+
+class RunJournal:
+    """
+    Durable journal of digest runs, stage checkpoints and deliveries
+    
+    Each run checkpoints the output of every expensive stage (fetched updates, the
+    summary, the rendered digest) as JSON in a local SQLite database, and keeps an
+    outbox with one row per destination. A run that did not finish, because the
+    process died or some deliveries failed, is resumed by the next attempt within
+    ``resume_window`` seconds: completed stages are loaded instead of recomputed and
+    only destinations without a successful delivery are sent again.
+    
+    Every outbox row has an idempotency key derived from the run and destination,
+    which notifiers attach to what they send so a delivery that was in flight during a
+    crash can be recognized instead of repeated.
+    """
+    
+    def __init__(self, path: Optional[str] = None, resume_window: float = 12 * 3600):
+        """
+        Args:
+            path: SQLite database path (default: journal.db under STATE_DIR)
+            resume_window: Seconds after its start during which an unfinished run is resumed
+        """
+        self.path = path or os.path.join(settings.STATE_DIR, "journal.db")
+        self.resume_window = resume_window
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS runs_open ON runs (job, status, started_at);
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    run_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, stage)
+                );
+                CREATE TABLE IF NOT EXISTS outbox (
+                    run_id TEXT NOT NULL,
+                    destination TEXT NOT NULL,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT NOT NULL DEFAULT '{}',
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, destination)
+                );
+                """
+            )
+    
+    def start(self, job: str, resume: bool = True) -> JournalRun:
+        """
+        Resume the job's latest unfinished run, or start a new one
+        
+        Args:
+            job: Name of the recurring job, e.g. "digest"
+            resume: Whether an unfinished run may be resumed
+            
+        Returns:
+            The run, with `resumed` set and its checkpointed stages listed
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = None
+            if resume:
+                row = self._conn.execute(
+                    "SELECT run_id, started_at FROM runs WHERE job = ? AND status = 'running' AND started_at >= ? "
+                    "ORDER BY started_at DESC LIMIT 1",
+                    (job, now - self.resume_window)
+                ).fetchone()
+            # Older unfinished runs will not be resumed any more
+            self._conn.execute(
+                "UPDATE runs SET status = 'abandoned', updated_at = ? WHERE job = ? AND status = 'running' AND run_id != ?",
+                (now, job, row[0] if row else "")
+            )
+            if row is not None:
+                stages = [stage for stage, in self._conn.execute(
+                    "SELECT stage FROM checkpoints WHERE run_id = ? ORDER BY created_at", (row[0],)
+                )]
+                return JournalRun(run_id=row[0], job=job, started_at=row[1], resumed=True, stages=stages)
+            
+            run = JournalRun(run_id=f"{job}-{int(now)}-{uuid.uuid4().hex[:8]}", job=job, started_at=now)
+            self._conn.execute(
+                "INSERT INTO runs (run_id, job, status, started_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (run.run_id, job, now, now)
+            )
+            return run
+    
+    def checkpoint(self, run: JournalRun, stage: str, value: Any):
+        """
+        Record the output of a completed stage
+        
+        Args:
+            run: The run the stage belongs to
+            stage: Stage name, e.g. "fetched" or "summary"
+            value: JSON-serializable stage output
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, value, created_at) VALUES (?, ?, ?, ?)",
+                (run.run_id, stage, json.dumps(value), now)
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run.run_id))
+        if stage not in run.stages:
+            run.stages.append(stage)
+    
+    def load(self, run: JournalRun, stage: str) -> Optional[Any]:
+        """The checkpointed output of a stage, or None if the stage has not completed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM checkpoints WHERE run_id = ? AND stage = ?", (run.run_id, stage)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def outbox(self, run: JournalRun, destinations: Iterable[str]) -> Dict[str, OutboxEntry]:
+        """
+        The run's outbox entries for the given destinations, adding any that are missing
+        
+        Args:
+            run: The run delivering the digest
+            destinations: Destination labels, e.g. "slack:#general"
+            
+        Returns:
+            Entries keyed by destination
+        """
+        destinations = list(destinations)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (run_id, destination, idempotency_key, status, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?)",
+                [(run.run_id, destination, idempotency_key(run.run_id, destination), now) for destination in destinations]
+            )
+            rows = self._conn.execute(
+                "SELECT destination, idempotency_key, status, attempts, updated_at, result FROM outbox WHERE run_id = ?",
+                (run.run_id,)
+            ).fetchall()
+        entries = {
+            row[0]: OutboxEntry(
+                destination=row[0], idempotency_key=row[1], status=row[2], attempts=row[3], updated_at=row[4],
+                result=json.loads(row[5])
+            )
+            for row in rows
+        }
+        return {destination: entries[destination] for destination in destinations}
+    
+    def mark_sending(self, run: JournalRun, destinations: Iterable[str]):
+        """Record that deliveries are about to start, so a crash leaves them recognizably in doubt"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sending', attempts = attempts + 1, updated_at = ? "
+                "WHERE run_id = ? AND destination = ? AND status != 'delivered'",
+                [(now, run.run_id, destination) for destination in destinations]
+            )
+    
+    def record_delivery(self, run: JournalRun, destination: str, success: bool, result: Dict[str, Any]):
+        """
+        Record the outcome of a delivery
+        
+        Args:
+            run: The run delivering the digest
+            destination: Destination label
+            success: Whether the delivery succeeded
+            result: JSON-serializable details of the outcome
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, result = ?, updated_at = ? WHERE run_id = ? AND destination = ?",
+                ("delivered" if success else "failed", json.dumps(result), time.time(), run.run_id, destination)
+            )
+    
+    def finish(self, run: JournalRun, status: str = "completed"):
+        """Close a run so it is not resumed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run.run_id)
+            )
+    
+    def prune(self, older_than: float) -> int:
+        """
+        Delete runs that have not been touched since the given epoch time
+        
+        Args:
+            older_than: Epoch seconds; runs last updated before this are removed with their checkpoints and outbox
+            
+        Returns:
+            Number of runs removed
+        """
+        with self._lock, self._conn:
+            stale = [(run_id,) for run_id, in self._conn.execute(
+                "SELECT run_id FROM runs WHERE updated_at < ?", (older_than,)
+            )]
+            for table in ("checkpoints", "outbox", "runs"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", stale)
+        return len(stale)
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+def idempotency_key(run_id: str, destination: str) -> str:
+    """Stable key for delivering one run's digest to one destination"""
+    return hashlib.sha256(f"{run_id}|{destination}".encode("utf-8")).hexdigest()[:32]
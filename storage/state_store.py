@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+from config.settings import settings
+
+_default_store: Optional["BaseStateStore"] = None
+
+class BaseStateStore(ABC):
+    """Abstract base class for small, persistent key/value state (watermarks, cursors, ...)"""
+    
+    @abstractmethod
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys at once
+        
+        Args:
+            namespace: Logical group the keys belong to (e.g. "slack_threads")
+            keys: Keys to look up
+        
+        Returns:
+            Dict of the keys that were found and their values
+        """
+        pass
+    
+    @abstractmethod
+    def set_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        """
+        Store several values at once
+        
+        Args:
+            namespace: Logical group the keys belong to
+            items: Mapping of key to JSON-serializable value
+        """
+        pass
+    
+    @abstractmethod
+    def items(self, namespace: str, prefix: str = "") -> Dict[str, Any]:
+        """
+        All entries of a namespace whose keys start with a prefix
+        
+        Args:
+            namespace: Logical group to list
+            prefix: Key prefix, e.g. "C123:" for one channel's threads
+        
+        Returns:
+            Dict of matching keys and their values
+        """
+        pass
+    
+    @abstractmethod
+    def prune(self, namespace: str, older_than: float) -> int:
+        """
+        Delete entries that have not been written since the given epoch time
+        
+        Args:
+            namespace: Logical group to prune
+            older_than: Epoch seconds; entries last written before this are removed
+        
+        Returns:
+            Number of entries removed
+        """
+        pass
+    
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Look up a single key"""
+        return self.get_many(namespace, [key]).get(key, default)
+    
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Store a single value"""
+        self.set_many(namespace, {key: value})
+
+class MemoryStateStore(BaseStateStore):
+    """In-process state store, useful for tests and one-off runs"""
+    
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._written: Dict[str, Dict[str, float]] = {}
+    
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        values = self._data.get(namespace, {})
+        return {key: values[key] for key in keys if key in values}
+    
+    def set_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        now = time.time()
+        self._data.setdefault(namespace, {}).update(items)
+        self._written.setdefault(namespace, {}).update({key: now for key in items})
+    
+    def items(self, namespace: str, prefix: str = "") -> Dict[str, Any]:
+        return {key: value for key, value in self._data.get(namespace, {}).items() if key.startswith(prefix)}
+    
+    def prune(self, namespace: str, older_than: float) -> int:
+        written = self._written.get(namespace, {})
+        stale = [key for key, ts in written.items() if ts < older_than]
+        for key in stale:
+            del written[key]
+            self._data[namespace].pop(key, None)
+        return len(stale)
+
+class SQLiteStateStore(BaseStateStore):
+    """State store backed by a local SQLite database"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.STATE_DIR, "state.db")
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+    
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = {}
+        
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM state WHERE namespace = ? AND key IN ({placeholders})",
+                    [namespace, *batch]
+                ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        
+        return found
+    
+    def set_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        if not items:
+            return
+        
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                [(namespace, key, json.dumps(value), now) for key, value in items.items()]
+            )
+    
+    def items(self, namespace: str, prefix: str = "") -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM state WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                (namespace, len(prefix), prefix)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+    
+    def prune(self, namespace: str, older_than: float) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND updated_at < ?",
+                (namespace, older_than)
+            )
+        return cursor.rowcount
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+def get_default_state_store() -> BaseStateStore:
+    """Return the process-wide SQLite state store under STATE_DIR, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        _default_store = SQLiteStateStore()
+    return _default_store
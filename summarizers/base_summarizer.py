@@ -1,8 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Tuple, Union
 from datetime import datetime
 from pydantic import BaseModel
 
+# Digest sections, in the order they are presented
+SECTIONS = ("progress", "blockers", "next_steps")
+
+def update_field(update: Union[Dict, Any], name: str, default: Any = None) -> Any:
+    """Read a field from an Update object or an update dictionary, as summarizers accept both"""
+    if isinstance(update, dict):
+        return update.get(name, default)
+    return getattr(update, name, default)
+
 class SummaryItem(BaseModel):
     """A single summarized item (progress, blocker, or next step)"""
     content: str
@@ -17,25 +26,10 @@ class DigestSummary(BaseModel):
     next_steps: List[SummaryItem] = []
     
     def to_markdown(self) -> str:
-        """Convert the summary to markdown format"""
-        sections = [
-            "# Project Update Digest",
-            f"*Generated at: {self.timestamp.strftime('%Y-%m-%d %H:%M %Z')}*\n"
-        ]
-        
-        def add_section(title: str, items: List[SummaryItem]):
-            if items:
-                sections.append(f"## {title}")
-                for idx, item in enumerate(items, 1):
-                    source = f"\n*Source: {item.source}*" if item.source else ""
-                    sections.append(f"{idx}. {item.content}{source}")
-                sections.append("")  # Add empty line after section
-        
-        add_section("Progress", self.progress)
-        add_section("Blockers", self.blockers)
-        add_section("Next Steps", self.next_steps)
-        
-        return "\n".join(sections)
+        """Convert the summary to markdown format (see renderers/ for other formats)"""
+        # Imported here because the renderers import this module
+        from renderers.markdown_renderer import MarkdownRenderer
+        return MarkdownRenderer().render(self)
 
 class BaseSummarizer(ABC):
     """Abstract base class for all summarizers"""
@@ -55,3 +49,21 @@ class BaseSummarizer(ABC):
             DigestSummary containing the summarized information
         """
         pass
+    
+    async def summarize_stream(self, updates: List[Dict]) -> AsyncIterator[Tuple[str, SummaryItem]]:
+        """
+        Summarize a list of updates, yielding items as they become available
+        
+        The default implementation waits for `summarize`; summarizers that can produce
+        items incrementally override it.
+        
+        Args:
+            updates: List of update dictionaries to summarize
+            
+        Yields:
+            (section, item) tuples, where section is "progress", "blockers" or "next_steps"
+        """
+        summary = await self.summarize(updates)
+        for section in SECTIONS:
+            for item in getattr(summary, section):
+                yield section, item
@@ -0,0 +1,190 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .base_summarizer import SECTIONS, BaseSummarizer, DigestSummary, SummaryItem, update_field
+from .keyword_classifier import KeywordClassifier
+from .prompt_builder import clean_content
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_'-]*")
+
+# Common English function words; they would otherwise link every sentence to every other
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by can could did do
+does doing for from had has have having he her here hers him his how i if in into is it its
+just me more most my no nor not now of off on once only or other our ours out over own same she
+so some such than that the their theirs them then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you
+your yours
+""".split())
+
+class ExtractiveSummarizer(BaseSummarizer):
+    """
+    Local extractive summarizer: picks the most central sentences of the updates
+    
+    Sentences from all updates are weighted with TF-IDF and ranked with TextRank over
+    their cosine-similarity graph, then sorted into digest sections by the keyword
+    classifier. Everything runs in-process with NumPy, deterministically and without
+    network access, which makes it suitable for frequent mini-digests and as a fast path
+    when the LLM is slow or unavailable.
+    
+    The similarity graph is never materialized: with L2-normalized TF-IDF rows X, the
+    graph is X·Xᵀ, so each power-iteration step is two sparse matrix-vector products
+    (done with ``np.bincount`` over the CSR arrays) and costs O(non-zeros), not O(n²).
+    """
+    
+    def __init__(self, config: Dict = None):
+        super().__init__(config or {})
+        self.max_items = self.config.get("max_items", 5)  # Per section
+        self.min_words = self.config.get("min_words", 4)  # Shorter sentences carry too little to rank
+        self.damping = self.config.get("damping", 0.85)
+        self.max_iterations = self.config.get("max_iterations", 100)
+        self.tolerance = self.config.get("tolerance", 1e-6)
+        # Skip a sentence whose cosine similarity to one already picked is at least this
+        self.redundancy_threshold = self.config.get("redundancy_threshold", 0.7)
+        self.classifier = KeywordClassifier(self.config.get("lexicon"))
+    
+    async def summarize(self, updates: List[Any]) -> DigestSummary:
+        """
+        Summarize updates by extracting their most representative sentences
+        
+        Args:
+            updates: Update objects (or update dictionaries) to summarize
+            
+        Returns:
+            DigestSummary with up to ``max_items`` sentences per section
+        """
+        summary = DigestSummary(timestamp=datetime.now(timezone.utc))
+        sentences, owners = self._split_sentences(updates)
+        if not sentences:
+            return summary
+        
+        indptr, indices, data = self._tfidf(sentences)
+        scores = self._textrank(indptr, indices, data)
+        sections = self.classifier.classify_batch(sentences)
+        
+        picked: Dict[str, List[int]] = {section: [] for section in SECTIONS}
+        for i in np.argsort(-scores, kind="stable"):
+            section = sections[i]
+            chosen = picked.setdefault(section, [])
+            if len(chosen) >= self.max_items:
+                continue
+            if any(_cosine(indptr, indices, data, i, j) >= self.redundancy_threshold for j in chosen):
+                continue
+            chosen.append(i)
+        
+        for section in SECTIONS:
+            for i in picked[section]:
+                update = updates[owners[i]]
+                metadata = {"score": round(float(scores[i]), 6)}
+                if update_field(update, "url"):
+                    metadata["url"] = update_field(update, "url")
+                getattr(summary, section).append(
+                    SummaryItem(content=sentences[i], source=update_field(update, "source", "Unknown"), metadata=metadata)
+                )
+        
+        logger.info(f"Extracted {sum(map(len, picked.values()))} of {len(sentences)} sentences from {len(updates)} updates")
+        return summary
+    
+    def _split_sentences(self, updates: List[Any]) -> Tuple[List[str], List[int]]:
+        """
+        Split updates into cleaned sentences
+        
+        Returns:
+            Tuple of (sentences, index of the update each sentence came from)
+        """
+        sentences, owners = [], []
+        seen = set()
+        for owner, update in enumerate(updates):
+            for sentence in _SENTENCE_END.split(clean_content(update_field(update, "content", "") or "", keep_newlines=True)):
+                sentence = sentence.strip()
+                key = sentence.lower()
+                if len(sentence.split()) < self.min_words or key in seen:
+                    continue
+                seen.add(key)
+                sentences.append(sentence)
+                owners.append(owner)
+        return sentences, owners
+    
+    @staticmethod
+    def _tfidf(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        L2-normalized TF-IDF rows of the sentences in CSR form
+        
+        Returns:
+            Tuple of (indptr, column indices, values)
+        """
+        vocabulary: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[int] = []
+        for sentence in sentences:
+            row: Dict[int, int] = {}
+            for token in _TOKEN.findall(sentence.lower()):
+                if token in STOPWORDS:
+                    continue
+                column = vocabulary.setdefault(token, len(vocabulary))
+                row[column] = row.get(column, 0) + 1
+            indices.extend(row)
+            counts.extend(row.values())
+            indptr.append(len(indices))
+        
+        indptr_array = np.asarray(indptr, dtype=np.int64)
+        indices_array = np.asarray(indices, dtype=np.int64)
+        rows = np.repeat(np.arange(len(sentences)), np.diff(indptr_array))
+        
+        # Smoothed IDF, sublinear TF
+        document_frequency = np.bincount(indices_array, minlength=len(vocabulary))
+        idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+        values = (1 + np.log(np.asarray(counts, dtype=np.float64))) * idf[indices_array]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(sentences)))
+        values /= np.where(norms > 0, norms, 1)[rows]
+        return indptr_array, indices_array, values
+    
+    def _textrank(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> np.ndarray:
+        """
+        TextRank scores over the cosine-similarity graph of the TF-IDF rows
+        
+        Args:
+            indptr: CSR row pointers
+            indices: CSR column indices
+            data: CSR values (rows L2-normalized)
+            
+        Returns:
+            Score per sentence, summing to 1
+        """
+        n = len(indptr) - 1
+        rows = np.repeat(np.arange(n), np.diff(indptr))
+        columns = int(indices.max()) + 1 if len(indices) else 0
+        has_terms = np.bincount(rows, minlength=n) > 0
+        
+        def similarity_times(vector: np.ndarray) -> np.ndarray:
+            """(X·Xᵀ − I)·vector without building X·Xᵀ; the diagonal is 1 for non-empty rows"""
+            projected = np.bincount(indices, weights=data * vector[rows], minlength=columns)
+            return np.bincount(rows, weights=data * projected[indices], minlength=n) - vector * has_terms
+        
+        degree = similarity_times(np.ones(n))
+        linked = degree > 1e-12
+        scores = np.full(n, 1.0 / n)
+        for _ in range(self.max_iterations):
+            outgoing = np.where(linked, scores / np.where(linked, degree, 1), 0.0)
+            updated = (1 - self.damping) / n + self.damping * similarity_times(outgoing)
+            # Sentences without neighbours leak rank; renormalize to keep a distribution
+            updated /= updated.sum()
+            if np.abs(updated - scores).sum() < self.tolerance:
+                return updated
+            scores = updated
+        return scores
+
+def _cosine(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, i: int, j: int) -> float:
+    """Cosine similarity of two L2-normalized CSR rows"""
+    a = dict(zip(indices[indptr[i]:indptr[i + 1]].tolist(), data[indptr[i]:indptr[i + 1]].tolist()))
+    return sum(a.get(column, 0.0) * value for column, value in zip(
+        indices[indptr[j]:indptr[j + 1]].tolist(), data[indptr[j]:indptr[j + 1]].tolist()
+    ))
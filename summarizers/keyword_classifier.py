@@ -0,0 +1,149 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Weighted keywords per category. Keywords match whole words only ("will" does not
+# match "William", "next" does not match "next.js"), so inflections are listed
+# explicitly; a multi-word keyword matches across any whitespace. The first
+# category wins ties.
+DEFAULT_LEXICON: Dict[str, Dict[str, float]] = {
+    "blockers": {
+        "blocked": 3.0,
+        "blocker": 3.0,
+        "blockers": 3.0,
+        "blocking": 2.5,
+        "block": 2.0,
+        "blocks": 2.0,
+        "stuck": 2.0,
+        "can't": 2.0,
+        "cannot": 2.0,
+        "unable to": 2.0,
+        "waiting on": 1.5,
+        "failing": 1.5,
+        "failed": 1.5,
+        "broken": 1.5,
+        "outage": 1.5,
+        "issue": 1.0,
+        "issues": 1.0,
+        "problem": 1.0,
+        "problems": 1.0,
+        "bug": 1.0,
+        "bugs": 1.0,
+        "risk": 1.0,
+        "risks": 1.0,
+    },
+    "next_steps": {
+        "next step": 3.0,
+        "next steps": 3.0,
+        "action item": 3.0,
+        "action items": 3.0,
+        "todo": 2.0,
+        "todos": 2.0,
+        "to do": 2.0,
+        "need to": 2.0,
+        "plan to": 2.0,
+        "going to": 1.5,
+        "will": 1.0,
+        "next": 1.0,
+        "should": 1.0,
+        "follow up": 1.5,
+        "follow-up": 1.5,
+    },
+    "progress": {
+        "shipped": 2.0,
+        "released": 2.0,
+        "merged": 2.0,
+        "deployed": 2.0,
+        "completed": 2.0,
+        "done": 1.5,
+        "finished": 1.5,
+        "fixed": 1.5,
+        "launched": 1.5,
+    },
+}
+
+class KeywordClassifier:
+    """Sorts texts into summary sections by the summed weights of the keywords they contain"""
+    
+    def __init__(self, lexicon: Optional[Dict[str, Dict[str, float]]] = None, default: str = "progress"):
+        """
+        Args:
+            lexicon: Keyword weights per category (default: DEFAULT_LEXICON)
+            default: Category for texts that match no keyword
+        """
+        self.lexicon = DEFAULT_LEXICON if lexicon is None else lexicon
+        self.default = default
+        self.categories: List[str] = list(self.lexicon)
+        if default not in self.categories:
+            self.categories.append(default)
+        
+        # One alternation per category; a keyword listed under several categories counts for the first
+        self._weights: Dict[str, float] = {}
+        self._patterns: List[Tuple[int, "re.Pattern"]] = []
+        for category, keywords in self.lexicon.items():
+            terms = []
+            for keyword, weight in keywords.items():
+                term = _normalize(keyword)
+                if term and term not in self._weights:
+                    self._weights[term] = float(weight)
+                    terms.append(term)
+            if terms:
+                self._patterns.append((self.categories.index(category), _compile(terms)))
+    
+    def classify(self, text: str) -> str:
+        """Category of a single text"""
+        return self.classify_batch([text])[0]
+    
+    def classify_batch(self, texts: Sequence[str]) -> List[str]:
+        """
+        Categorize many texts at once
+        
+        Args:
+            texts: Texts to classify
+            
+        Returns:
+            The category of each text, in order
+        """
+        categories = []
+        for scores in self.score_batch(texts):
+            best = max(scores)
+            categories.append(self.categories[scores.index(best)] if best > 0 else self.default)
+        return categories
+    
+    def score_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Keyword scores of each text for each category
+        
+        Args:
+            texts: Texts to score
+            
+        Returns:
+            One list of scores per text, in the order of `categories`
+        """
+        weights = self._weights
+        batch = []
+        for text in texts:
+            scores = [0.0] * len(self.categories)
+            lowered = text.lower()
+            for category, pattern in self._patterns:
+                for found in pattern.findall(lowered):
+                    scores[category] += weights[_normalize(found)]
+            batch.append(scores)
+        return batch
+
+def _compile(terms: List[str]) -> "re.Pattern":
+    """
+    Compile terms into one whole-word alternation
+    
+    Longer terms are tried first, so "next steps" wins over "next". A match must end at a
+    word boundary that is not followed by ".", "-", "/" or "@" and another word character,
+    so "next" does not match "next.js" or "next-gen".
+    """
+    alternatives = [
+        re.escape(term).replace(r"\ ", r"\s+").replace("'", "['’]")
+        for term in sorted(terms, key=len, reverse=True)
+    ]
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b(?![.\-/@]\w)", re.ASCII)
+
+def _normalize(term: str) -> str:
+    """Lowercase a keyword, collapse its whitespace and straighten apostrophes"""
+    return " ".join(term.lower().replace("’", "'").split())
@@ -1,132 +1,691 @@
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple, Union
 import json
-from openai import OpenAI
+from datetime import datetime, timezone
+from openai import APIConnectionError, AsyncOpenAI
 
-from .base_summarizer import BaseSummarizer, DigestSummary, SummaryItem
+from .base_summarizer import SECTIONS, BaseSummarizer, DigestSummary, SummaryItem, update_field
+from .extractive_summarizer import ExtractiveSummarizer
+from .prompt_builder import PromptBuilder, PromptStats
+from .stream_parser import SummaryStreamParser
+from .token_counter import TokenCounter
+from clients.resilience import ResiliencePolicy, ResilientCaller, is_transient
 from config.settings import settings
+from storage.content_cache import ContentCache
+from storage.state_store import BaseStateStore, get_default_state_store
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a helpful assistant that summarizes project updates."
+
+# Bump whenever the extraction prompt changes so cached extractions are not reused
+PROMPT_VERSION = "2"
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_NAMESPACE = "openai_batches"  # State-store namespace of pending batches, keyed by job name
+BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
 class OpenAISummarizer(BaseSummarizer):
     """Summarizes updates using OpenAI's API"""
     
     def __init__(self, config: Dict = None):
         super().__init__(config or {})
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = self._initialize_openai_client()
         self.model = self.config.get("model", "gpt-4-turbo-preview")
         self.max_tokens = self.config.get("max_tokens", 4000)
+        # Prompt tokens per request; larger inputs are split into chunks and summarized map-reduce style
+        self.chunk_tokens = self.config.get("chunk_tokens", 12000)
+        self.max_concurrency = self.config.get("max_concurrency", 4)
+        self.token_counter = TokenCounter(self.model)
+        self.prompt_builder = PromptBuilder(
+            self.token_counter,
+            source_budgets=self.config.get("source_budgets"),
+            default_budget=self.config.get("default_source_budget", 400),
+            measure=self.config.get("measure_prompt_savings", False)
+        )
+        # Token counts of the most recent summarize() call's updates; the count before
+        # compaction is only taken when measure_prompt_savings is set
+        self.last_prompt_stats = PromptStats()
+        self.extraction_cache = self._initialize_extraction_cache()
+        # Deadlines, retries, hedging and the circuit breaker for every API call
+        self.resilience = ResilientCaller(
+            "openai",
+            ResiliencePolicy(**self.config.get("resilience", {})),
+            retryable=lambda e: isinstance(e, APIConnectionError) or is_transient(e)
+        )
+        # Summarizes everything locally while the circuit is open
+        self.offline_summarizer = ExtractiveSummarizer(self.config.get("offline", {}))
+        # Batch mode: pending batches are recorded here so another run can collect them
+        self.state_store: BaseStateStore = self.config.get("state_store") or get_default_state_store()
+        self.batch_completion_window = self.config.get("batch_completion_window", "24h")
+        self.batch_poll_interval = self.config.get("batch_poll_interval", 60.0)
+    
+    def _initialize_openai_client(self) -> AsyncOpenAI:
+        """
+        Initialize and return the async OpenAI client
+        
+        The client's own retries are disabled; `self.resilience` applies the retry,
+        timeout and circuit-breaker policy.
+        """
+        return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    
+    def _initialize_extraction_cache(self) -> Optional[ContentCache]:
+        """Initialize the per-update extraction cache, unless disabled with use_extraction_cache=False"""
+        if "extraction_cache" in self.config:
+            return self.config["extraction_cache"]
+        if not self.config.get("use_extraction_cache", True):
+            return None
+        
+        return ContentCache(
+            namespace="summary_extractions",
+            max_entries=None,
+            max_bytes=self.config.get("cache_max_bytes", 50 * 1024 * 1024)
+        )
     
-    async def summarize(self, updates: List[Dict]) -> DigestSummary:
+    async def summarize(self, updates: List[Any]) -> DigestSummary:
         """
         Summarize updates using OpenAI's API
         
+        Updates that fit in one prompt of ``chunk_tokens`` are summarized with a single
+        completion. Larger inputs are split into token-counted chunks that are
+        summarized concurrently (at most ``max_concurrency`` requests at a time), and
+        the partial summaries are merged in a reduce pass.
+        
+        The items extracted from each update are cached by content, model and prompt
+        version, so updates seen in an earlier run (overlapping lookback windows) are
+        not sent to the model again; their cached items are merged in instead.
+        
+        Every request runs under the resilience policy (deadlines, retries, optional
+        hedging). A chunk whose request still fails gets the keyword fallback, and
+        while the circuit breaker is open the whole input goes to the local extractive
+        summarizer without any request being made.
+        
         Args:
-            updates: List of update dictionaries to summarize
+            updates: Update objects (or update dictionaries) to summarize
             
         Returns:
             DigestSummary containing the summarized information
         """
         if not updates:
-            return DigestSummary(timestamp=datetime.utcnow())
+            return DigestSummary(timestamp=datetime.now(timezone.utc))
+        if not self.resilience.available:
+            logger.warning("OpenAI circuit is open; summarizing with the local extractive summarizer")
+            return await self.offline_summarizer.summarize(updates)
         
-        # Prepare the prompt with the updates
-        prompt = self._build_prompt(updates)
+        cached, misses = self._lookup_extractions(updates)
+        partials = [cached] if cached is not None else []
+        if not misses:
+            logger.info(f"All {len(updates)} updates served from the extraction cache")
+            return cached
         
-        try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes project updates."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=self.max_tokens,
-                response_format={"type": "json_object"}
-            )
-            
-            # Parse the response
-            result = json.loads(response.choices[0].message.content)
-            
-            # Convert to DigestSummary
-            return DigestSummary(
-                timestamp=datetime.utcnow(),
-                progress=[
-                    SummaryItem(content=item["content"], source=item.get("source", ""), metadata=item.get("metadata", {}))
-                    for item in result.get("progress", [])
-                ],
-                blockers=[
-                    SummaryItem(content=item["content"], source=item.get("source", ""), metadata=item.get("metadata", {}))
-                    for item in result.get("blockers", [])
-                ],
-                next_steps=[
-                    SummaryItem(content=item["content"], source=item.get("source", ""), metadata=item.get("metadata", {}))
-                    for item in result.get("next_steps", [])
-                ]
-            )
+        chunks = self._chunk_updates(misses)
+        logger.info(
+            f"Summarizing {len(misses)} of {len(updates)} updates in {len(chunks)} chunks "
+            f"({len(updates) - len(misses)} cached)"
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        partials.extend(await asyncio.gather(*(self._summarize_chunk(chunk, semaphore) for chunk in chunks)))
+        return await self._reduce(partials, semaphore)
+    
+    async def summarize_stream(self, updates: List[Any]) -> AsyncIterator[Tuple[str, SummaryItem]]:
+        """
+        Summarize updates, yielding items as the model produces them
+        
+        The completion that produces the final items is streamed and parsed
+        incrementally, so the first items arrive seconds after the request starts
+        rather than after the whole JSON document. That is the single completion for
+        inputs that fit one prompt, or the last merge of a map-reduce run; map chunks
+        and earlier merge rounds run as in `summarize`, since their output is not final.
+        
+        If a stream fails, items already yielded stand. For a map chunk the remaining
+        updates (those no yielded item refers to) go through the heuristic fallback; for
+        a merge, the partial items not yet yielded verbatim are yielded as they are.
+        
+        Args:
+            updates: Update objects (or update dictionaries) to summarize
             
+        Yields:
+            (section, item) tuples, where section is "progress", "blockers" or "next_steps"
+        """
+        if not updates:
+            return
+        if not self.resilience.available:
+            logger.warning("OpenAI circuit is open; summarizing with the local extractive summarizer")
+            async for section_item in self.offline_summarizer.summarize_stream(updates):
+                yield section_item
+            return
+        
+        cached, misses = self._lookup_extractions(updates)
+        if not misses:
+            for section_item in _items(cached):
+                yield section_item
+            return
+        
+        chunks = self._chunk_updates(misses)
+        if len(chunks) == 1 and cached is None:
+            async for section_item in self._stream_chunk(chunks[0]):
+                yield section_item
+            return
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        partials = [cached] if cached is not None else []
+        partials.extend(await asyncio.gather(*(self._summarize_chunk(chunk, semaphore) for chunk in chunks)))
+        group = await self._reduce_to_group(partials, semaphore)
+        if len(group) == 1:
+            for section_item in _items(group[0]):
+                yield section_item
+            return
+        
+        async for section_item in self._stream_merge(group):
+            yield section_item
+    
+    async def _stream_chunk(self, chunk: List[Tuple[int, Any, str]]) -> AsyncIterator[Tuple[str, SummaryItem]]:
+        """Stream the summary of one chunk, caching its extractions once complete"""
+        parser = SummaryStreamParser(SECTIONS)
+        try:
+            async for delta in self._complete_stream(self._build_prompt([text for _, _, text in chunk])):
+                for section_item in parser.feed(delta):
+                    yield section_item
+            if not parser.complete:
+                raise ValueError("Stream ended before the summary was complete")
         except Exception as e:
-            logger.error(f"Error summarizing with OpenAI: {e}")
-            # Fallback to a simple summary if there's an error
-            return self._fallback_summary(updates)
-    
-    def _build_prompt(self, updates: List[Dict]) -> str:
-        """Build the prompt for the OpenAI API"""
-        updates_text = ""
-        for i, update in enumerate(updates, 1):
-            updates_text += f"""
-            --- Update {i} ---
-            Source: {update.get('source', 'Unknown')}
-            Timestamp: {update.get('timestamp', 'Unknown')}
-            Content: {update.get('content', '')}
-            """
-        
-        return f"""
-        I need you to analyze the following project updates and extract key information.
-        For each update, identify:
-        1. Progress made (what was accomplished)
-        2. Blockers or issues encountered
-        3. Next steps or action items
-        
-        Format your response as a JSON object with the following structure:
-        {{
-            "progress": [
-                {{"content": "Brief description of progress", "source": "Source of the update"}},
-                ...
+            logger.error(f"Error streaming summary from OpenAI: {e}")
+            covered = {ref for items in parser.result.values() for item in items for ref in item.get("updates") or []}
+            remaining = [update for index, update, _ in chunk if index not in covered]
+            for section_item in _items(self._fallback_summary(remaining)):
+                yield section_item
+            return
+        
+        self._store_extractions(chunk, parser.result)
+    
+    async def _stream_merge(self, group: List[DigestSummary]) -> AsyncIterator[Tuple[str, SummaryItem]]:
+        """Stream the merge of the final group of partial summaries"""
+        partial_json = "\n".join(self._summary_json(partial) for partial in group)
+        parser = SummaryStreamParser(SECTIONS)
+        yielded = set()
+        try:
+            async for delta in self._complete_stream(self._build_reduce_prompt(partial_json)):
+                for section, item in parser.feed(delta):
+                    yielded.add((section, item.content))
+                    yield section, item
+            if not parser.complete:
+                raise ValueError("Stream ended before the merged summary was complete")
+        except Exception as e:
+            logger.error(f"Error streaming merged summary from OpenAI: {e}")
+            for section, item in _items(_concat(group)):
+                if (section, item.content) not in yielded:
+                    yield section, item
+    
+    async def summarize_batch(self, updates: List[Any], job: str = "digest", timeout: float = 24 * 3600) -> DigestSummary:
+        """
+        Summarize updates through the OpenAI Batch API
+        
+        The map stage is submitted as a batch (cheaper, higher-throughput, but with
+        no latency guarantee) and polled until it finishes; the chunk results are then
+        reduced with regular completions. If the batch does not finish within `timeout`
+        it is cancelled and the updates are summarized synchronously.
+        
+        Args:
+            updates: Update objects (or update dictionaries) to summarize
+            job: Name the pending batch is recorded under
+            timeout: Seconds to wait for the batch
+            
+        Returns:
+            DigestSummary containing the summarized information
+        """
+        cached, _ = self._lookup_extractions(updates)
+        if await self.submit_batch(updates, job) is None:
+            return await self.summarize(updates)
+        
+        partials = await self.collect_batch(job, wait=timeout)
+        if partials is None:
+            logger.warning(f"Batch for {job} did not finish within {timeout}s; summarizing synchronously")
+            await self.cancel_batch(job)
+            return await self.summarize(updates)
+        
+        if cached is not None:
+            partials.insert(0, cached)
+        return await self._reduce(partials, asyncio.Semaphore(self.max_concurrency))
+    
+    async def submit_batch(self, updates: List[Any], job: str = "digest") -> Optional[str]:
+        """
+        Submit the map stage for updates as an OpenAI batch
+        
+        Chunks are built as in `summarize` (updates already in the extraction cache are
+        left out) and written as one JSONL request per chunk. The batch id and chunk
+        layout are kept in the state store under `job`, so the results can be collected
+        later by another run, e.g. the scheduled digest. A batch still pending for the
+        same job is cancelled first.
+        
+        Args:
+            updates: Update objects (or update dictionaries) to summarize
+            job: Name to record the batch under
+            
+        Returns:
+            The batch id, or None if every update was already cached
+        """
+        await self.cancel_batch(job)
+        _, misses = self._lookup_extractions(updates)
+        if not misses:
+            return None
+        
+        chunks = self._chunk_updates(misses)
+        requests = "\n".join(
+            json.dumps({
+                "custom_id": f"chunk-{number}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self._completion_body(self._build_prompt([text for _, _, text in chunk]))
+            })
+            for number, chunk in enumerate(chunks)
+        )
+        upload = await self.resilience.call(
+            self.client.files.create, file=(f"autopm-{job}.jsonl", requests.encode("utf-8")), purpose="batch"
+        )
+        batch = await self.resilience.call(
+            self.client.batches.create,
+            input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.batch_completion_window,
+            metadata={"job": job}
+        )
+        
+        self.state_store.set(BATCH_NAMESPACE, job, {
+            "batch_id": batch.id,
+            "submitted_at": time.time(),
+            # Enough of each update to cache its extraction or fall back if its chunk fails
+            "updates": [
+                {"source": update_field(update, "source", ""), "content": update_field(update, "content", ""), "url": update_field(update, "url", "")}
+                for update in misses
             ],
-            "blockers": [
-                {{"content": "Description of blocker", "source": "Source of the update"}},
-                ...
+            "chunks": [[index for index, _, _ in chunk] for chunk in chunks]
+        })
+        logger.info(f"Submitted batch {batch.id} for {job}: {len(misses)} updates in {len(chunks)} requests")
+        return batch.id
+    
+    async def collect_batch(self, job: str = "digest", wait: float = 0.0) -> Optional[List[DigestSummary]]:
+        """
+        Collect the results of the batch submitted for `job`
+        
+        Polls every ``batch_poll_interval`` seconds for up to `wait` seconds. Results are
+        written to the extraction cache, so a later `summarize` over the same updates
+        only sends what the batch did not cover. Chunks that failed in the batch get the
+        keyword fallback.
+        
+        Args:
+            job: Name the batch was submitted under
+            wait: Seconds to keep polling an unfinished batch
+            
+        Returns:
+            One partial summary per chunk, or None if no batch is pending for `job` or
+            it has not finished in time
+        """
+        record = self.state_store.get(BATCH_NAMESPACE, job)
+        if not record:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + wait
+        while True:
+            batch = await self.resilience.call(self.client.batches.retrieve, record["batch_id"])
+            if batch.status in BATCH_FINAL_STATUSES:
+                break
+            if loop.time() + self.batch_poll_interval > give_up:
+                logger.info(f"Batch {record['batch_id']} for {job} is still {batch.status}")
+                return None
+            await asyncio.sleep(self.batch_poll_interval)
+        
+        rows = {}
+        if batch.output_file_id:
+            output = await self.resilience.call(self.client.files.content, batch.output_file_id)
+            for line in output.text.splitlines():
+                if line.strip():
+                    row = json.loads(line)
+                    rows[row["custom_id"]] = row
+        
+        updates = record["updates"]
+        partials = []
+        for number, indices in enumerate(record["chunks"]):
+            chunk = [(index, updates[index - 1], "") for index in indices]
+            try:
+                result = _batch_result(rows.get(f"chunk-{number}"))
+            except Exception as e:
+                logger.error(f"Batch {record['batch_id']} request chunk-{number} failed: {e}")
+                partials.append(self._fallback_summary([update for _, update, _ in chunk]))
+                continue
+            self._store_extractions(chunk, result)
+            partials.append(self._parse_summary(result))
+        
+        self.state_store.set(BATCH_NAMESPACE, job, None)
+        logger.info(f"Collected batch {record['batch_id']} for {job} ({batch.status}, {len(rows)} results)")
+        return partials
+    
+    async def cancel_batch(self, job: str = "digest"):
+        """Cancel the batch pending for `job`, if any, and forget it"""
+        record = self.state_store.get(BATCH_NAMESPACE, job)
+        if not record:
+            return
+        try:
+            await self.resilience.call(self.client.batches.cancel, record["batch_id"])
+        except Exception as e:
+            logger.warning(f"Could not cancel batch {record['batch_id']} for {job}: {e}")
+        self.state_store.set(BATCH_NAMESPACE, job, None)
+    
+    def _lookup_extractions(self, updates: List[Any]) -> Tuple[Optional[DigestSummary], List[Any]]:
+        """
+        Split updates into cached extractions and updates that still need the model
+        
+        Args:
+            updates: Update objects or dictionaries
+            
+        Returns:
+            Tuple of (summary of the cached items or None if nothing was cached, uncached updates)
+        """
+        if self.extraction_cache is None:
+            return None, list(updates)
+        
+        cached = DigestSummary(timestamp=datetime.now(timezone.utc))
+        seen = set()
+        misses = []
+        hits = 0
+        for update in updates:
+            extraction = self.extraction_cache.get(self._cache_key(update))
+            if extraction is None:
+                misses.append(update)
+                continue
+            
+            hits += 1
+            for section in SECTIONS:
+                for item in extraction.get(section, []):
+                    # An item drawn from several updates is cached under each of them
+                    key = (section, item["content"], item.get("source", ""))
+                    if key not in seen:
+                        seen.add(key)
+                        getattr(cached, section).append(SummaryItem(content=item["content"], source=item.get("source", "")))
+        
+        return (cached if hits else None), misses
+    
+    def _cache_key(self, update: Union[Dict, Any]) -> str:
+        """Hash of the update's normalized source and content, the model and the prompt version"""
+        text = " ".join(f"{update_field(update, 'source', '')}\n{update_field(update, 'content', '')}".split())
+        return hashlib.sha256(f"{self.model}\0{PROMPT_VERSION}\0{text}".encode("utf-8")).hexdigest()
+    
+    def _store_extractions(self, chunk: List[Tuple[int, Any, str]], result: Dict[str, Any]):
+        """
+        Cache the items extracted from each update of a chunk
+        
+        Items name the updates they came from in their "updates" field. If any item
+        cannot be attributed, nothing from the chunk is cached, since an update whose
+        items are missing would otherwise be cached as having none.
+        """
+        if self.extraction_cache is None:
+            return
+        
+        extracted = {index: {section: [] for section in SECTIONS} for index, _, _ in chunk}
+        for section in SECTIONS:
+            for item in result.get(section, []):
+                refs = [ref for ref in item.get("updates") or [] if ref in extracted]
+                if not refs:
+                    logger.debug("Extraction item without a valid update reference; not caching this chunk")
+                    return
+                for ref in refs:
+                    extracted[ref][section].append({"content": item["content"], "source": item.get("source", "")})
+        
+        for index, update, _ in chunk:
+            self.extraction_cache.set(self._cache_key(update), extracted[index])
+    
+    def _chunk_updates(self, updates: List[Any]) -> List[List[Tuple[int, Any, str]]]:
+        """
+        Format updates and pack them greedily into chunks that fit the prompt budget
+        
+        Updates are rendered by the prompt builder, which strips markup and applies the
+        per-source content budgets; an update that is still larger than a whole chunk on
+        its own is truncated.
+        
+        Args:
+            updates: Update objects or dictionaries
+            
+        Returns:
+            Lists of (update number, update, formatted text), one list per chunk
+        """
+        budget = self.chunk_tokens - self.token_counter.count(self._build_prompt([]))
+        if budget <= 0:
+            raise ValueError(f"chunk_tokens={self.chunk_tokens} leaves no room for updates in the prompt")
+        
+        rendered, self.last_prompt_stats = self.prompt_builder.format_updates(updates)
+        chunks: List[List[Tuple[int, Any, str]]] = []
+        current: List[Tuple[int, Any, str]] = []
+        used = 0
+        for index, (update, (text, tokens)) in enumerate(zip(updates, rendered), 1):
+            if tokens > budget:
+                text = self.token_counter.truncate(text, budget)
+                tokens = budget
+            
+            if current and used + tokens > budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append((index, update, text))
+            used += tokens
+        
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    async def _summarize_chunk(self, chunk: List[Tuple[int, Any, str]], semaphore: asyncio.Semaphore) -> DigestSummary:
+        """Summarize one chunk, falling back to the heuristic summary for that chunk only"""
+        async with semaphore:
+            try:
+                result = await self._complete(self._build_prompt([text for _, _, text in chunk]))
+            except Exception as e:
+                logger.error(f"Error summarizing with OpenAI: {e}")
+                # Fallback to a simple summary if there's an error
+                return self._fallback_summary([update for _, update, _ in chunk])
+        
+        self._store_extractions(chunk, result)
+        return self._parse_summary(result)
+    
+    async def _reduce(self, partials: List[DigestSummary], semaphore: asyncio.Semaphore) -> DigestSummary:
+        """
+        Merge partial summaries into one
+        
+        Partials are grouped so that each merge prompt fits ``chunk_tokens``; the groups
+        are merged concurrently and the results reduced again until one summary is left.
+        If a merge request fails, that group's items are concatenated instead so no
+        summarized output is lost.
+        
+        Args:
+            partials: Summaries of the individual chunks
+            semaphore: Shared limit on in-flight requests
+            
+        Returns:
+            The merged DigestSummary
+        """
+        return await self._merge_group(await self._reduce_to_group(partials, semaphore), semaphore)
+    
+    async def _reduce_to_group(self, partials: List[DigestSummary], semaphore: asyncio.Semaphore) -> List[DigestSummary]:
+        """
+        Merge partial summaries until the rest fit in a single merge prompt
+        
+        Args:
+            partials: Summaries of the individual chunks
+            semaphore: Shared limit on in-flight requests
+            
+        Returns:
+            Partials for the final merge; a single summary if no merge is needed or none fits
+        """
+        budget = self.chunk_tokens - self.token_counter.count(self._build_reduce_prompt(""))
+        while len(partials) > 1:
+            groups: List[List[DigestSummary]] = [[]]
+            used = 0
+            for partial in partials:
+                tokens = self.token_counter.count(self._summary_json(partial))
+                if groups[-1] and used + tokens > budget:
+                    groups.append([])
+                    used = 0
+                groups[-1].append(partial)
+                used += tokens
+            
+            if len(groups) == 1:
+                return groups[0]
+            if len(groups) == len(partials):
+                # No two partials fit in one merge prompt; concatenating is all that is left
+                return [_concat(partials)]
+            
+            partials = list(await asyncio.gather(*(self._merge_group(group, semaphore) for group in groups)))
+        
+        return partials
+    
+    async def _merge_group(self, group: List[DigestSummary], semaphore: asyncio.Semaphore) -> DigestSummary:
+        """Merge a group of partial summaries with one completion"""
+        if len(group) == 1:
+            return group[0]
+        
+        partial_json = "\n".join(self._summary_json(partial) for partial in group)
+        async with semaphore:
+            try:
+                return self._parse_summary(await self._complete(self._build_reduce_prompt(partial_json)))
+            except Exception as e:
+                logger.error(f"Error merging partial summaries with OpenAI: {e}")
+                return _concat(group)
+    
+    def _completion_body(self, prompt: str) -> Dict[str, Any]:
+        """Parameters of a JSON-mode chat completion, as sent directly or in a batch file"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
             ],
-            "next_steps": [
-                {{"content": "Description of next step", "source": "Source of the update"}},
-                ...
-            ]
-        }}
+            "temperature": 0.3,
+            "max_tokens": self.max_tokens,
+            "response_format": {"type": "json_object"}
+        }
+    
+    async def _complete(self, prompt: str) -> Dict[str, Any]:
+        """
+        Run one JSON-mode chat completion
+        
+        Args:
+            prompt: The user prompt
+            
+        Returns:
+            The parsed JSON object from the response
+        """
+        response = await self.resilience.call(self.client.chat.completions.create, **self._completion_body(prompt))
         
-        Updates to analyze:
-        {updates_text}
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise ValueError(f"Completion was cut off at max_tokens={self.max_tokens}")
+        return json.loads(choice.message.content)
+    
+    async def _complete_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Run one JSON-mode chat completion, streaming the response
         
-        Be concise but informative. Group similar items together. Include the source for each item.
+        Args:
+            prompt: The user prompt
+            
+        Yields:
+            Pieces of the response text as they arrive
         """
+        stream = await self.resilience.call(
+            self.client.chat.completions.create, stream=True, **self._completion_body(prompt)
+        )
+        
+        chunks = stream.__aiter__()
+        while True:
+            # A stream that stalls counts against the provider like a timed-out request
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), self.resilience.policy.timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                self.resilience.breaker.record_failure()
+                raise
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                yield choice.delta.content
+            if choice.finish_reason == "length":
+                raise ValueError(f"Completion was cut off at max_tokens={self.max_tokens}")
     
-    def _fallback_summary(self, updates: List[Dict]) -> DigestSummary:
+    @staticmethod
+    def _parse_summary(result: Dict[str, Any]) -> DigestSummary:
+        """Convert the model's JSON output to a DigestSummary"""
+        return DigestSummary(
+            timestamp=datetime.now(timezone.utc),
+            **{
+                section: [
+                    SummaryItem(content=item["content"], source=item.get("source", ""), metadata=item.get("metadata", {}))
+                    for item in result.get(section, [])
+                ]
+                for section in SECTIONS
+            }
+        )
+    
+    @staticmethod
+    def _summary_json(summary: DigestSummary) -> str:
+        """Compact JSON of a summary's items, as fed back to the model"""
+        return json.dumps({
+            section: [{"content": item.content, "source": item.source} for item in getattr(summary, section)]
+            for section in SECTIONS
+        })
+    
+    def _build_prompt(self, update_texts: List[str]) -> str:
+        """Build the prompt for the OpenAI API from formatted updates"""
+        return self.prompt_builder.build(update_texts)
+    
+    def _build_reduce_prompt(self, partial_json: str) -> str:
+        """Build the prompt that merges partial summaries"""
+        return self.prompt_builder.build_reduce(partial_json)
+    
+    def _fallback_summary(self, updates: List[Any]) -> DigestSummary:
         """Generate a simple summary without using the API"""
-        summary = DigestSummary(timestamp=datetime.utcnow())
+        summary = DigestSummary(timestamp=datetime.now(timezone.utc))
         
         for update in updates:
-            source = update.get("source", "Unknown")
-            content = update.get("content", "")
+            source = update_field(update, "source", "Unknown")
+            content = update_field(update, "content", "")
+            lowered = content.lower()
             
             # Simple heuristic: if content mentions "block" or "issue", it's a blocker
-            if any(word in content.lower() for word in ["block", "issue", "problem", "can't", "cannot"]):
+            if any(word in lowered for word in ["block", "issue", "problem", "can't", "cannot"]):
                 summary.blockers.append(SummaryItem(content=content, source=source))
             # If content mentions "next" or "todo", it's a next step
-            elif any(word in content.lower() for word in ["next", "todo", "need to", "should"]):
+            elif any(word in lowered for word in ["next", "todo", "need to", "should"]):
                 summary.next_steps.append(SummaryItem(content=content, source=source))
             # Otherwise, it's progress
             else:
                 summary.progress.append(SummaryItem(content=content, source=source))
         
         return summary
+
+def _batch_result(row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Parsed JSON output of one batch result line; raises if the request did not succeed"""
+    if row is None:
+        raise ValueError("no result in the batch output")
+    if row.get("error"):
+        raise ValueError(str(row["error"]))
+    response = row.get("response") or {}
+    if response.get("status_code") != 200:
+        raise ValueError(f"status {response.get('status_code')}")
+    choice = response["body"]["choices"][0]
+    if choice.get("finish_reason") == "length":
+        raise ValueError("completion was cut off at max_tokens")
+    return json.loads(choice["message"]["content"])
+
+def _items(summary: DigestSummary) -> List[Tuple[str, SummaryItem]]:
+    """A summary's items as (section, item) tuples, section by section"""
+    return [(section, item) for section in SECTIONS for item in getattr(summary, section)]
+
+def _concat(summaries: List[DigestSummary]) -> DigestSummary:
+    """Concatenate the items of several summaries"""
+    merged = DigestSummary(timestamp=datetime.now(timezone.utc))
+    for summary in summaries:
+        for section in SECTIONS:
+            getattr(merged, section).extend(getattr(summary, section))
+    return merged
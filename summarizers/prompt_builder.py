@@ -0,0 +1,189 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .base_summarizer import update_field
+from .token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Content tokens per update, keyed by the source prefix ("slack" in "slack:#general").
+# Chat messages are short and chatty; tickets and pages carry more of their substance
+# further down.
+DEFAULT_SOURCE_BUDGETS = {
+    "slack": 300,
+    "jira": 500,
+    "notion": 600,
+}
+
+INSTRUCTIONS = (
+    "Extract the key information from the project updates below as a JSON object:\n"
+    '{"progress": [ITEM], "blockers": [ITEM], "next_steps": [ITEM]}\n'
+    'ITEM = {"content": "<one concise sentence>", "source": "<source>", "updates": [<update numbers>]}\n'
+    "progress: what was accomplished. blockers: issues in the way. next_steps: planned work and action items.\n"
+    "Group similar items, and list in \"updates\" the numbers of all the updates an item was drawn from."
+)
+
+REDUCE_INSTRUCTIONS = (
+    "Merge these partial summaries of one set of project updates into a single JSON object with the same "
+    '"progress", "blockers" and "next_steps" lists. Combine items that describe the same work, keep every '
+    "distinct item, and join the sources of merged items with commas."
+)
+
+_CODE_BLOCK = re.compile(r"```.*?(?:```|$)|\{(code|noformat)(?::[^}]*)?\}.*?(?:\{\1\}|$)", re.DOTALL)
+_INLINE_CODE = re.compile(r"`([^`\n]*)`")
+_USER_MENTION = re.compile(r"<@([UW][A-Z0-9]+)(?:\|([^>]+))?>")
+_CHANNEL_MENTION = re.compile(r"<#(C[A-Z0-9]+)(?:\|([^>]*))?>")
+_SPECIAL_MENTION = re.compile(r"<!(here|channel|everyone)(?:\|[^>]*)?>")
+_SUBTEAM_MENTION = re.compile(r"<!subteam\^[A-Z0-9]+(?:\|([^>]+))?>")
+_LINK = re.compile(r"<((?:https?|mailto):[^|>]+)(?:\|([^>]+))?>")
+_EMOJI = re.compile(r":[a-z0-9_+\-']+:")
+_EMPHASIS = re.compile(r"(?<![\w*_~])([*_~])(?=\S)(.+?)(?<=\S)\1(?![\w*_~])")
+_WHITESPACE = re.compile(r"\s+")
+_SPACES = re.compile(r"[^\S\n]+")
+_NEWLINES = re.compile(r" ?\n[\s]*")
+
+class PromptStats(BaseModel):
+    """Prompt tokens spent on update content with and without compaction"""
+    updates: int = 0
+    tokens_before: int = 0  # Verbatim content in the previous multi-line layout
+    tokens_after: int = 0   # Compacted content in the one-line layout
+    
+    @property
+    def saved_ratio(self) -> float:
+        """Fraction of the input tokens removed by compaction"""
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+class PromptBuilder:
+    """
+    Renders updates into compact, stable prompt text
+    
+    Each update becomes a single line with its number, source and minute-resolution
+    timestamp. Content is stripped of Slack mrkdwn and mention markup, emoji and code
+    blocks (which the model cannot summarize usefully but pays for in full), and cut to
+    a per-source token budget. The same update always renders to the same text, which
+    keeps prompts cache-friendly.
+    """
+    
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        source_budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = 400,
+        measure: bool = False
+    ):
+        """
+        Args:
+            token_counter: Counter for the model the prompts are sent to
+            source_budgets: Content tokens per update by source prefix (default: DEFAULT_SOURCE_BUDGETS)
+            default_budget: Content tokens per update for sources without a budget
+            measure: Also count the tokens the updates would have cost uncompacted. This
+                tokenizes every update a second time, so it is meant for checking savings,
+                not for every run
+        """
+        self.token_counter = token_counter
+        self.source_budgets = DEFAULT_SOURCE_BUDGETS if source_budgets is None else source_budgets
+        self.default_budget = default_budget
+        self.measure = measure
+    
+    def format_updates(self, updates: List[Any], start: int = 1) -> Tuple[List[Tuple[str, int]], PromptStats]:
+        """
+        Render updates for a prompt
+        
+        Args:
+            updates: Update objects or dictionaries
+            start: Number of the first update
+            
+        Returns:
+            Tuple of ((text, tokens) per update, token counts before and after compaction)
+        """
+        stats = PromptStats(updates=len(updates))
+        rendered = []
+        for index, update in enumerate(updates, start):
+            text = self.format_update(index, update)
+            tokens = self.token_counter.count(text)
+            rendered.append((text, tokens))
+            stats.tokens_after += tokens
+            if self.measure:
+                stats.tokens_before += self.token_counter.count(_verbose(index, update))
+        
+        if self.measure and updates:
+            logger.info(
+                f"Prompt input for {stats.updates} updates: {stats.tokens_before} tokens before compaction, "
+                f"{stats.tokens_after} after ({stats.saved_ratio:.0%} saved)"
+            )
+        return rendered, stats
+    
+    def format_update(self, index: int, update: Union[Dict, Any]) -> str:
+        """Render one update as a single line: "[n] source YYYY-MM-DD HH:MM | content" """
+        source = update_field(update, "source", "") or "unknown"
+        content = clean_content(update_field(update, "content", "") or "")
+        content = self._truncate(content, self.budget_for(source))
+        return f"[{index}] {source}{_format_timestamp(update_field(update, 'timestamp'))} | {content}\n"
+    
+    def budget_for(self, source: str) -> int:
+        """Content token budget for an update from `source`"""
+        return self.source_budgets.get(source.split(":", 1)[0], self.default_budget)
+    
+    def _truncate(self, content: str, budget: int) -> str:
+        """Cut content to `budget` tokens, marking the cut"""
+        if self.token_counter.count(content) <= budget:
+            return content
+        return self.token_counter.truncate(content, max(budget - 1, 0)).rstrip() + "…"
+    
+    @staticmethod
+    def build(update_texts: List[str]) -> str:
+        """Build the extraction prompt from rendered updates"""
+        return f"{INSTRUCTIONS}\n\nUpdates:\n{''.join(update_texts)}"
+    
+    @staticmethod
+    def build_reduce(partial_json: str) -> str:
+        """Build the prompt that merges partial summaries"""
+        return f"{REDUCE_INSTRUCTIONS}\n\nPartial summaries:\n{partial_json}"
+
+def clean_content(text: str, keep_newlines: bool = False) -> str:
+    """
+    Strip markup that costs tokens without carrying meaning for a summary
+    
+    Code blocks (Markdown fences and Jira {code}/{noformat}) become "[code]", mentions
+    and links keep only their readable label, emoji and emphasis markers are dropped,
+    and whitespace is collapsed to single spaces.
+    
+    Args:
+        text: Update content
+        keep_newlines: Keep line breaks (collapsed to one) instead of joining lines
+        
+    Returns:
+        The cleaned text
+    """
+    text = _CODE_BLOCK.sub(" [code] ", text)
+    text = _INLINE_CODE.sub(r"\1", text)
+    text = _USER_MENTION.sub(lambda m: "@" + (m.group(2) or "user"), text)
+    text = _CHANNEL_MENTION.sub(lambda m: "#" + (m.group(2) or "channel"), text)
+    text = _SPECIAL_MENTION.sub(r"@\1", text)
+    text = _SUBTEAM_MENTION.sub(lambda m: m.group(1) or "@team", text)
+    text = _LINK.sub(lambda m: m.group(2) or m.group(1), text)
+    text = _EMOJI.sub("", text)
+    text = _EMPHASIS.sub(r"\2", text)
+    text = text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+    if keep_newlines:
+        return _NEWLINES.sub("\n", _SPACES.sub(" ", text)).strip()
+    return _WHITESPACE.sub(" ", text).strip()
+
+def _format_timestamp(timestamp: Any) -> str:
+    """Minute-resolution timestamp with a leading space, or nothing if unknown"""
+    if isinstance(timestamp, datetime):
+        return f" {timestamp:%Y-%m-%d %H:%M}"
+    return f" {timestamp}" if timestamp else ""
+
+def _verbose(index: int, update: Union[Dict, Any]) -> str:
+    """The previous multi-line rendering with verbatim content, used to measure savings"""
+    return f"""
+            --- Update {index} ---
+            Source: {update_field(update, 'source', 'Unknown')}
+            Timestamp: {update_field(update, 'timestamp', 'Unknown')}
+            Content: {update_field(update, 'content', '')}
+            """
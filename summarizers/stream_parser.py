@@ -0,0 +1,112 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .base_summarizer import SummaryItem
+
+logger = logging.getLogger(__name__)
+
+class SummaryStreamParser:
+    """
+    Incremental parser for a streamed summary JSON object
+    
+    Expects the shape the summarizer prompts ask for, ``{"progress": [{...}, ...],
+    "blockers": [...], "next_steps": [...]}``, and emits each item as soon as its
+    closing brace arrives, without waiting for the rest of the document. Only the text
+    of the item being read is buffered.
+    
+    Anything outside the known sections (other keys, nested values) is skipped. The raw
+    item dictionaries are kept in `result` so the complete output can be cached once
+    the stream ends.
+    """
+    
+    def __init__(self, sections: Sequence[str]):
+        """
+        Args:
+            sections: Top-level keys whose array elements are summary items
+        """
+        self.sections = tuple(sections)
+        self.result: Dict[str, List[Dict[str, Any]]] = {section: [] for section in self.sections}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[List[str]] = None   # Characters of the top-level key being read
+        self._last_key: Optional[str] = None
+        self._section: Optional[str] = None     # Section whose array is open
+        self._item: Optional[List[str]] = None  # Text of the item being read
+        self._seen_root = False
+    
+    def feed(self, text: str) -> List[Tuple[str, SummaryItem]]:
+        """
+        Parse the next piece of the stream
+        
+        Args:
+            text: Characters received since the previous call
+            
+        Returns:
+            (section, item) for every item completed by this piece, in order
+        """
+        items: List[Tuple[str, SummaryItem]] = []
+        start = 0  # Start of the part of `text` that belongs to the current item
+        for position, char in enumerate(text):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_key = "".join(self._key)
+                        self._key = None
+                        continue
+                if self._key is not None:
+                    self._key.append(char)
+                continue
+            
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._item is None:
+                    self._key = []
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._seen_root = True
+                elif self._depth == 2 and char == "[" and self._last_key in self.sections:
+                    self._section = self._last_key
+                elif self._depth == 3 and char == "{" and self._section is not None:
+                    self._item = []
+                    start = position
+            elif char in "}]":
+                if self._depth == 3 and char == "}" and self._item is not None:
+                    self._item.append(text[start:position + 1])
+                    item = self._finish_item("".join(self._item))
+                    self._item = None
+                    if item is not None:
+                        items.append(item)
+                elif self._depth == 2:
+                    self._section = None
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                self._last_key = None
+        
+        if self._item is not None:
+            self._item.append(text[start:])
+        return items
+    
+    def _finish_item(self, raw: str) -> Optional[Tuple[str, SummaryItem]]:
+        """Decode one complete item object"""
+        try:
+            data = json.loads(raw)
+            item = SummaryItem(content=data["content"], source=data.get("source", ""), metadata=data.get("metadata", {}))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping malformed summary item in stream: {e}")
+            return None
+        
+        self.result[self._section].append(data)
+        return self._section, item
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level object has been closed"""
+        return self._seen_root and self._depth == 0
@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # Without tiktoken, fall back to a character-based estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text with the GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+class TokenCounter:
+    """
+    Counts prompt tokens for a model
+    
+    Uses tiktoken when it is installed and otherwise estimates one token per four
+    characters, which is close enough to size prompt chunks with some headroom.
+    """
+    
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = self._load_encoding(model)
+    
+    @staticmethod
+    def _load_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+        """Return the tokenizer for a model, or None if tiktoken is unavailable"""
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Encodings are downloaded on first use, which can fail offline
+            logger.warning(f"Could not load tokenizer for {model}, estimating token counts: {e}")
+            return None
+    
+    def count(self, text: str) -> int:
+        """Number of tokens in `text`"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut `text` down to at most `max_tokens` tokens"""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * CHARS_PER_TOKEN]
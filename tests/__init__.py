@@ -1,4 +1,4 @@
-""
+"""
 Test package for AutoPM.
 """
 
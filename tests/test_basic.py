@@ -1,7 +1,46 @@
 """Basic tests for AutoPM."""
+import asyncio
+import time
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
+from clients.client_registry import ClientRegistry
+from config.settings import settings
+from fetchers.base_fetcher import BaseFetcher, Update
+from main import AutoPM
+from notifiers.broadcaster import Destination
+from storage.run_journal import RunJournal
+from storage.state_store import MemoryStateStore
+from summarizers.base_summarizer import DigestSummary
+
+
+class FakeFetcher(BaseFetcher):
+    """Fetcher that returns fixed updates after a delay, or raises."""
+
+    def __init__(self, name, timestamps, delay=0.0, error=None, timeout=None):
+        self.name = name
+        super().__init__({"state_store": MemoryStateStore(), "client_registry": ClientRegistry(), "timeout": timeout})
+        self.timestamps = timestamps
+        self.delay = delay
+        self.error = error
+
+    def get_source_name(self):
+        return self.name
+
+    async def fetch_updates(self, since=None, full_resync=False):
+        self.advance_watermark("all", max(self.timestamps))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [Update.trusted(source=self.name, content=str(ts), timestamp=ts) for ts in self.timestamps]
+
+
+def _autopm(*fetchers):
+    autopm = AutoPM.__new__(AutoPM)
+    autopm.fetchers = {fetcher.name: fetcher for fetcher in fetchers}
+    return autopm
+
 class TestAutoPM(unittest.TestCase):
     """Test cases for AutoPM."""
 
@@ -13,5 +52,100 @@ class TestAutoPM(unittest.TestCase):
         """Test that tests are running."""
         self.assertTrue(True)
 
+
+class TestFetchFanOut(unittest.IsolatedAsyncioTestCase):
+    """Test cases for fetching every source concurrently."""
+
+    async def test_sources_are_fetched_concurrently(self):
+        """Fetch time is that of the slowest source, not the sum, and every source is reported."""
+        now = time.time()
+        autopm = _autopm(*(FakeFetcher(name, [now - i], delay=0.2) for i, name in enumerate(("a", "b", "c"))))
+
+        started = time.perf_counter()
+        updates, report = await autopm.fetch_all_updates()
+
+        self.assertLess(time.perf_counter() - started, 0.4)
+        self.assertEqual([u.source for u in updates], ["a", "b", "c"])
+        self.assertEqual({name: (r["success"], r["count"]) for name, r in report.items()}, {
+            "a": (True, 1), "b": (True, 1), "c": (True, 1)
+        })
+
+    async def test_source_past_its_deadline_is_dropped(self):
+        """A slow source is cut off at its timeout, reported as failed and keeps its old watermark."""
+        now = time.time()
+        fast, slow = FakeFetcher("fast", [now]), FakeFetcher("slow", [now], delay=5, timeout=0.1)
+
+        started = time.perf_counter()
+        updates, report = await _autopm(fast, slow).fetch_all_updates()
+
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual([u.source for u in updates], ["fast"])
+        self.assertFalse(report["slow"]["success"])
+        self.assertIn("timed out", report["slow"]["error"])
+        self.assertEqual(slow.staged_state(), {})
+        self.assertNotEqual(fast.staged_state(), {})
+
+    async def test_failed_source_is_reported_not_empty(self):
+        """A source that raises is reported as failed while the others are still fetched."""
+        now = time.time()
+        broken = FakeFetcher("broken", [now], error=RuntimeError("401 Unauthorized"))
+        autopm = _autopm(FakeFetcher("ok", [now - 1, now - 2]), broken)
+
+        updates, report = await autopm.fetch_all_updates()
+
+        self.assertEqual([u.content for u in updates], [str(now - 1), str(now - 2)])
+        self.assertEqual((report["broken"]["success"], report["broken"]["error"]), (False, "401 Unauthorized"))
+        self.assertEqual((report["ok"]["success"], report["ok"]["count"]), (True, 2))
+        self.assertEqual(broken.staged_state(), {})
+
+
+class TestDigestCycle(unittest.IsolatedAsyncioTestCase):
+    """Test cases for finishing a digest run."""
+
+    async def test_run_without_destinations_is_not_finished(self):
+        """With no destination to deliver to, the run stays resumable and no watermark is committed."""
+        fetcher = FakeFetcher("a", [time.time()])
+        autopm = _autopm(fetcher)
+        autopm.journal = RunJournal(":memory:")
+        autopm.notifiers = {}
+        autopm.destinations = Destination.parse_list("slack:#digests")
+        autopm.last_fetch_report = {}
+
+        async def build_digest(run, full_resync=False, batch_job=None):
+            await fetcher.fetch_updates()
+            return DigestSummary(timestamp=datetime.now(timezone.utc)), "# Digest"
+
+        with patch.object(autopm, "_build_digest", build_digest):
+            result = await autopm.run_digest_cycle()
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["results"], {})
+        self.assertIsNone(fetcher.state_store.get(fetcher.watermark_namespace, "all"))
+        self.assertEqual(autopm.journal.start("digest").run_id, result["run_id"])
+
+    async def test_old_runs_are_pruned(self):
+        """Each cycle deletes runs, and their checkpoints, older than the retention period."""
+        autopm = _autopm()
+        autopm.journal = RunJournal(":memory:", resume_window=0)
+        autopm.last_fetch_report = {}
+        old = autopm.journal.start("digest")
+        autopm.journal.checkpoint(old, "fetched", {"updates": []})
+        autopm.journal.finish(old)
+
+        async def build_digest(run, full_resync=False, batch_job=None):
+            return DigestSummary(timestamp=datetime.now(timezone.utc)), "# Digest"
+
+        async def deliver_digest(run, digest, summary, notifier_types=None):
+            return {"slack:#digests": {"success": True}}
+
+        with patch.object(settings, "RUN_RETENTION_DAYS", 0), \
+                patch.object(autopm, "_build_digest", build_digest), \
+                patch.object(autopm, "_deliver_digest", deliver_digest):
+            await autopm.run_digest_cycle()
+
+        self.assertIsNone(autopm.journal.load(old, "fetched"))
+        self.assertEqual(autopm.journal.prune(time.time() + 1), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
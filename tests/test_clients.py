@@ -0,0 +1,184 @@
+"""Tests for the shared rate limiter, client registry and resilience policy."""
+import asyncio
+import time
+import unittest
+
+from clients.client_registry import ClientRegistry
+from clients.rate_limiter import RateLimit, RateLimiter, TokenBucket
+from clients.resilience import CircuitOpenError, ResiliencePolicy, ResilientCaller
+
+
+class RateLimitedError(Exception):
+    """Error shaped like the SDKs' 429 errors."""
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Test cases for token-bucket limiting and Retry-After handling."""
+
+    async def test_requests_beyond_the_burst_are_spaced_at_the_rate(self):
+        """A burst goes through at once; the rest wait for new tokens."""
+        limiter = RateLimiter("test", {"method": RateLimit(rate=20.0, burst=2)})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire("method") for _ in range(4)))
+
+        # Two requests beyond the burst at 20/s take about 0.1s
+        self.assertGreater(time.perf_counter() - started, 0.08)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    async def test_retry_after_pauses_every_caller(self):
+        """A 429 is retried after Retry-After, and other callers wait as well."""
+        limiter = RateLimiter("test", {"*": RateLimit(rate=1000.0, burst=100)})
+        calls = []
+
+        async def flaky():
+            calls.append(time.perf_counter())
+            if len(calls) == 1:
+                raise RateLimitedError(0.2)
+            return "ok"
+
+        started = time.perf_counter()
+        first = asyncio.ensure_future(limiter.call("method", flaky))
+        await asyncio.sleep(0.05)
+        other = await limiter.call("other", asyncio.sleep, 0, result="done")
+
+        self.assertEqual(await first, "ok")
+        self.assertEqual(other, "done")
+        self.assertGreater(time.perf_counter() - started, 0.19)
+        self.assertGreater(calls[1] - calls[0], 0.19)
+
+    async def test_pause_does_not_put_the_bucket_into_debt(self):
+        """Requests reserved during a pause resume at the rate from its end, and it leaves no debt behind."""
+        bucket = TokenBucket(RateLimit(rate=10.0, burst=5))
+        bucket.pause(0.5)
+
+        waits = [bucket.reserve() for _ in range(3)]
+
+        for wait, expected in zip(waits, [0.5, 0.6, 0.7]):
+            self.assertAlmostEqual(wait, expected, delta=0.02)
+
+        # Once the reserved requests have gone, the bucket refills at the normal rate
+        await asyncio.sleep(0.9)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    async def test_other_errors_are_not_retried(self):
+        """Errors that are not rate-limit responses propagate immediately."""
+        limiter = RateLimiter("test")
+
+        async def broken():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await limiter.call("method", broken)
+
+
+class TestClientRegistry(unittest.IsolatedAsyncioTestCase):
+    """Test cases for sharing clients and limiters."""
+
+    async def test_clients_and_limiters_are_shared(self):
+        """The same credentials return the same client, limiter and pooled session."""
+        registry = ClientRegistry()
+        client = registry.slack_client("xoxb-test")
+
+        await registry.bind_session(client)
+
+        self.assertIs(registry.slack_client("xoxb-test"), client)
+        self.assertIsNot(registry.slack_client("xoxb-other"), client)
+        self.assertIs(registry.rate_limiter("slack"), registry.rate_limiter("slack"))
+        self.assertIs(client.session, await registry.session())
+        await registry.close()
+
+
+class TestResilientCaller(unittest.IsolatedAsyncioTestCase):
+    """Test cases for timeouts, retries, hedging and the circuit breaker."""
+
+    async def test_timed_out_attempt_is_retried(self):
+        """An attempt past its timeout is abandoned and retried."""
+        caller = ResilientCaller("test", ResiliencePolicy(timeout=0.05, base_delay=0.01))
+        calls = []
+
+        async def slow_then_fast():
+            calls.append(1)
+            await asyncio.sleep(1 if len(calls) == 1 else 0)
+            return "ok"
+
+        self.assertEqual(await caller.call(slow_then_fast), "ok")
+        self.assertEqual(len(calls), 2)
+
+    async def test_open_circuit_fails_fast_until_a_probe_succeeds(self):
+        """After repeated failures calls are rejected without running; a later probe closes it."""
+        caller = ResilientCaller(
+            "test", ResiliencePolicy(max_retries=0, failure_threshold=2, reset_timeout=0.1)
+        )
+        calls = []
+
+        async def unavailable():
+            calls.append(1)
+            raise ConnectionError("down")
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await caller.call(unavailable)
+        with self.assertRaises(CircuitOpenError):
+            await caller.call(unavailable)
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(caller.available)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(await caller.call(asyncio.sleep, 0, result="up"), "up")
+        self.assertTrue(caller.available)
+
+    async def test_slow_attempt_is_hedged(self):
+        """An attempt slower than the latency percentile gets a duplicate; the first answer wins."""
+        caller = ResilientCaller("test", ResiliencePolicy(hedge_percentile=90, hedge_min_samples=5))
+        for _ in range(5):
+            caller.latencies.record(0.02)
+        calls = []
+
+        async def first_is_stuck():
+            calls.append(1)
+            await asyncio.sleep(5 if len(calls) == 1 else 0)
+            return len(calls)
+
+        started = time.perf_counter()
+        self.assertEqual(await caller.call(first_is_stuck), 2)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    async def test_losing_hedged_stream_is_closed(self):
+        """A hedged request that also answers has its stream closed instead of leaking the connection."""
+        caller = ResilientCaller("test", ResiliencePolicy(hedge_percentile=90, hedge_min_samples=5))
+        for _ in range(5):
+            caller.latencies.record(0.01)
+        streams = []
+        both_sent = asyncio.Event()
+
+        class Stream:
+            closed = False
+
+            async def close(self):
+                self.closed = True
+
+        async def open_stream():
+            stream = Stream()
+            streams.append(stream)
+            if len(streams) == 2:
+                both_sent.set()
+            # Both requests answer in the same loop iteration
+            await both_sent.wait()
+            return stream
+
+        winner = await caller.call(open_stream)
+
+        self.assertEqual(len(streams), 2)
+        self.assertFalse(winner.closed)
+        self.assertEqual([stream.closed for stream in streams if stream is not winner], [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,438 @@
+"""Tests for the AutoPM fetchers."""
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from jira.exceptions import JIRAError
+from notion_client.errors import RequestTimeoutError
+from slack_sdk.errors import SlackApiError
+
+from clients.client_registry import ClientRegistry
+from fetchers.base_fetcher import Update, to_epoch
+from fetchers.jira_fetcher import JiraFetcher
+from fetchers.notion_fetcher import NotionFetcher
+from fetchers.slack_fetcher import SlackFetcher
+from fetchers.stream_merge import UpdateStreamMerger
+from storage.content_cache import ContentCache
+from storage.state_store import MemoryStateStore
+
+
+class FakeSlackClient:
+    """Minimal stand-in for AsyncWebClient serving paginated channel history."""
+
+    def __init__(self, pages, replies=None, delay=0.0, failing=()):
+        self.pages = pages
+        self.replies = replies or {}
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = []
+        self.history_oldest = []
+        self.reply_calls = []
+
+    async def conversations_history(self, channel, oldest, limit, cursor=None):
+        self.calls.append((channel, cursor))
+        self.history_oldest.append(float(oldest))
+        await asyncio.sleep(self.delay)
+        if channel in self.failing:
+            raise SlackApiError("channel_not_found", {"ok": False, "error": "channel_not_found"})
+        index = int(cursor or 0)
+        channel_pages = self.pages[channel]
+        next_cursor = str(index + 1) if index + 1 < len(channel_pages) else ""
+        messages = [m for m in channel_pages[index] if float(m["ts"]) > float(oldest)]
+        return {"messages": messages, "response_metadata": {"next_cursor": next_cursor}}
+
+    async def conversations_replies(self, channel, ts, oldest, limit, cursor=None):
+        self.reply_calls.append((channel, ts, oldest))
+        messages = [m for m in self.replies[ts] if m["ts"] == ts or float(m["ts"]) >= float(oldest)]
+        return {"messages": messages, "response_metadata": {"next_cursor": ""}}
+
+
+def _message(ts, text="hello", **extra):
+    return {"ts": str(ts), "text": text, "user": "U1", **extra}
+
+
+def _fetcher(channels, client, **config):
+    fetcher = SlackFetcher(
+        {"channels": channels, "state_store": MemoryStateStore(), "client_registry": ClientRegistry(), **config}
+    )
+    fetcher.client = client
+    return fetcher
+
+
+class TestSlackFetcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SlackFetcher pagination and concurrency."""
+
+    async def test_follows_next_cursor(self):
+        """Every page of a channel's history is fetched."""
+        now = time.time()
+        fetcher = _fetcher(["C1"], FakeSlackClient({"C1": [[_message(now - i)] for i in range(3)]}))
+
+        updates = await fetcher.fetch_updates()
+
+        self.assertEqual(len(updates), 3)
+        self.assertEqual([cursor for _, cursor in fetcher.client.calls], [None, "1", "2"])
+
+    async def test_channels_are_crawled_concurrently(self):
+        """Channel crawls overlap instead of running one after another."""
+        now = time.time()
+        channels = [f"C{i}" for i in range(10)]
+        client = FakeSlackClient({c: [[_message(now)]] for c in channels}, delay=0.1)
+        fetcher = _fetcher(channels, client, max_concurrency=10)
+
+        started = time.perf_counter()
+        updates = await fetcher.fetch_updates()
+
+        self.assertEqual(len(updates), 10)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    async def test_channel_watermark_limits_next_fetch(self):
+        """After a commit, the next fetch starts at the newest message already seen."""
+        now = time.time()
+        client = FakeSlackClient({"C1": [[_message(now - 10), _message(now - 20)]]})
+        fetcher = _fetcher(["C1"], client, thread_lookback_days=0)
+
+        await fetcher.fetch_updates()
+        fetcher.commit_watermarks()
+        self.assertAlmostEqual(to_epoch(fetcher.resolve_since("C1")), now - 10, delta=1)
+
+        # An uncommitted run leaves the stored watermark untouched, and full resync ignores it
+        client.pages["C1"][0].insert(0, _message(now - 1))
+        await fetcher.fetch_updates()
+        fetcher.discard_watermarks()
+        self.assertAlmostEqual(to_epoch(fetcher.resolve_since("C1")), now - 10, delta=1)
+        self.assertLess(to_epoch(fetcher.resolve_since("C1", full_resync=True)), now - 3600)
+
+    async def test_threads_are_fetched_incrementally(self):
+        """Only threads with replies newer than the stored watermark are re-crawled."""
+        now = time.time()
+        parent_ts = f"{now - 3600:.6f}"
+        first_reply, second_reply = f"{now - 1800:.6f}", f"{now - 60:.6f}"
+        parent = _message(parent_ts, thread_ts=parent_ts, reply_count=1, latest_reply=first_reply)
+        client = FakeSlackClient(
+            {"C1": [[parent]]},
+            replies={parent_ts: [parent, _message(first_reply, thread_ts=parent_ts)]}
+        )
+        fetcher = _fetcher(["C1"], client)
+
+        updates = await fetcher.fetch_updates()
+        fetcher.commit_watermarks()
+        self.assertEqual(sum(u.metadata.get("is_thread_reply", False) for u in updates), 1)
+
+        # No new replies: the thread is not fetched again
+        await fetcher.fetch_updates()
+        fetcher.commit_watermarks()
+        self.assertEqual(len(client.reply_calls), 1)
+
+        # A new reply arrives: only it is returned
+        parent.update(reply_count=2, latest_reply=second_reply)
+        client.replies[parent_ts].append(_message(second_reply, text="new", thread_ts=parent_ts))
+        updates = await fetcher.fetch_updates()
+        replies = [u for u in updates if u.metadata.get("is_thread_reply")]
+        self.assertEqual([u.content for u in replies], ["new"])
+
+    async def test_old_threads_are_polled_instead_of_rereading_history(self):
+        """History is read back to the previous run's window; older known threads are polled directly."""
+        now = time.time()
+        parent_ts, first_reply, second_reply = f"{now - 7200:.6f}", f"{now - 7000:.6f}", f"{now - 30:.6f}"
+        parent = _message(parent_ts, thread_ts=parent_ts, reply_count=1, latest_reply=first_reply)
+        client = FakeSlackClient(
+            {"C1": [[parent]]},
+            replies={parent_ts: [parent, _message(first_reply, thread_ts=parent_ts)]}
+        )
+        fetcher = _fetcher(["C1"], client)
+
+        for message_ts in (None, now - 3600, now - 1800):
+            if message_ts:
+                client.pages["C1"][0].insert(0, _message(message_ts))
+            await fetcher.fetch_updates()
+            fetcher.commit_watermarks()
+
+        client.replies[parent_ts].append(_message(second_reply, text="late", thread_ts=parent_ts))
+        client.reply_calls.clear()
+        updates = await fetcher.fetch_updates()
+
+        # Only the previous run's window is read again, not the whole thread lookback
+        self.assertAlmostEqual(client.history_oldest[-1], now - 3600, delta=1)
+        self.assertEqual([ts for _, ts, _ in client.reply_calls], [parent_ts])
+        self.assertAlmostEqual(float(client.reply_calls[0][2]), now - 1800, delta=1)
+        self.assertEqual([u.content for u in updates if u.metadata.get("is_thread_reply")], ["late"])
+
+    async def test_failed_channel_fails_the_source(self):
+        """A channel error is raised after the other channels are streamed, not logged as an empty channel."""
+        now = time.time()
+        client = FakeSlackClient({"C1": [[_message(now - 10)]], "C2": [[]]}, failing={"C2"})
+        fetcher = _fetcher(["C1", "C2"], client)
+
+        updates = []
+        with self.assertRaises(SlackApiError):
+            async for page in fetcher.stream_updates():
+                updates.extend(page)
+        self.assertEqual(len(updates), 1)
+
+    async def test_stream_is_newest_first_across_channels_and_threads(self):
+        """Thread replies newer than later history are interleaved in timestamp order."""
+        now = time.time()
+        parent_ts, reply_ts = f"{now - 300:.6f}", f"{now - 5:.6f}"
+        parent = _message(parent_ts, thread_ts=parent_ts, reply_count=1, latest_reply=reply_ts)
+        client = FakeSlackClient(
+            {"C1": [[_message(now - 10)], [parent]], "C2": [[_message(now - 1), _message(now - 200)]]},
+            replies={parent_ts: [parent, _message(reply_ts, thread_ts=parent_ts)]}
+        )
+        fetcher = _fetcher(["C1", "C2"], client)
+
+        updates = [u async for page in fetcher.stream_updates() for u in page]
+
+        timestamps = [u.epoch for u in updates]
+        self.assertEqual(len(updates), 5)
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertTrue(updates[1].metadata.get("is_thread_reply"))
+
+
+class FakeJira:
+    """Stand-in for the blocking jira client that caps pages at 50 issues."""
+
+    def __init__(self, issues_by_project, failing_pages=(), time_zone="UTC"):
+        self.issues_by_project = issues_by_project
+        self.failing_pages = set(failing_pages)
+        self.time_zone = time_zone
+        self.calls = []
+        self.jql = []
+
+    def client_info(self):
+        return "https://jira.example.com"
+
+    def myself(self):
+        return {"accountId": "1", "timeZone": self.time_zone}
+
+    def search_issues(self, jql, startAt, maxResults, fields, json_result):
+        project = jql.split('project in ("')[1].split('"')[0]
+        self.calls.append((project, startAt))
+        self.jql.append(jql)
+        if (project, startAt) in self.failing_pages:
+            raise JIRAError(status_code=500, text="Internal server error")
+        issues = self.issues_by_project[project]
+        return {"issues": issues[startAt:startAt + min(maxResults, 50)], "total": len(issues)}
+
+
+def _issue(key, updated=None):
+    if updated is None:
+        updated = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S.000%z")
+    return {"key": key, "fields": {"summary": "Summary", "updated": updated}}
+
+
+class TestJiraFetcher(unittest.TestCase):
+    """Test cases for JiraFetcher pagination."""
+
+    def test_fetches_every_page_of_every_project(self):
+        """Issues beyond the first page are fetched for each project shard."""
+        fake = FakeJira({p: [_issue(f"{p}-{i}") for i in range(120)] for p in ("ABC", "XYZ")})
+        with patch.object(JiraFetcher, "_initialize_jira_client", return_value=fake):
+            fetcher = JiraFetcher({"projects": ["ABC", "XYZ"], "state_store": MemoryStateStore()})
+
+        updates = asyncio.run(fetcher.fetch_updates())
+
+        self.assertEqual(len(updates), 240)
+        self.assertEqual(sorted(start for p, start in fake.calls if p == "ABC"), [0, 50, 100])
+        self.assertEqual(updates[0].url, "https://jira.example.com/browse/ABC-0")
+
+    def test_since_is_written_in_the_account_timezone(self):
+        """JQL dates are read in the account's timezone, so the UTC watermark is converted to it."""
+        fake = FakeJira({"ABC": []}, time_zone="America/Los_Angeles")
+        with patch.object(JiraFetcher, "_initialize_jira_client", return_value=fake):
+            fetcher = JiraFetcher({"projects": ["ABC"], "state_store": MemoryStateStore()})
+
+        asyncio.run(fetcher.fetch_updates(since=datetime(2024, 1, 31, 12, 0, tzinfo=timezone.utc)))
+
+        self.assertTrue(fake.jql[0].startswith("updated >= '2024-01-31 04:00' AND"), fake.jql[0])
+
+    def test_issue_at_the_watermark_is_not_reported_again(self):
+        """Issues updated at or before the watermark are dropped although JQL matches them."""
+        watermark = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=1)
+        later = watermark + timedelta(seconds=30)
+        fake = FakeJira({"ABC": [
+            _issue("ABC-2", later.strftime("%Y-%m-%dT%H:%M:%S.000%z")),
+            _issue("ABC-1", watermark.strftime("%Y-%m-%dT%H:%M:%S.000%z")),
+        ]})
+        store = MemoryStateStore()
+        with patch.object(JiraFetcher, "_initialize_jira_client", return_value=fake):
+            fetcher = JiraFetcher({"projects": ["ABC"], "state_store": store})
+        fetcher.advance_watermark("ABC", watermark)
+        fetcher.commit_watermarks()
+
+        updates = asyncio.run(fetcher.fetch_updates())
+
+        self.assertEqual([update.metadata["key"] for update in updates], ["ABC-2"])
+        self.assertEqual(fetcher.staged_state()[fetcher.watermark_namespace]["ABC"], later.timestamp())
+
+    def test_close_shuts_down_the_worker_pool(self):
+        """The pool running page requests is shut down when the fetcher is closed."""
+        with patch.object(JiraFetcher, "_initialize_jira_client", return_value=FakeJira({})):
+            fetcher = JiraFetcher({"state_store": MemoryStateStore()})
+
+        fetcher.close()
+
+        with self.assertRaises(RuntimeError):
+            fetcher.executor.submit(print)
+
+    def test_failed_page_fails_the_fetch(self):
+        """A failed search page is raised instead of returning a partial or empty result."""
+        for failing_page in (("XYZ", 0), ("XYZ", 50)):
+            fake = FakeJira({p: [_issue(f"{p}-{i}") for i in range(120)] for p in ("ABC", "XYZ")}, {failing_page})
+            with patch.object(JiraFetcher, "_initialize_jira_client", return_value=fake):
+                fetcher = JiraFetcher({"projects": ["ABC", "XYZ"], "state_store": MemoryStateStore()})
+
+            with self.assertRaises(JIRAError):
+                asyncio.run(fetcher.fetch_updates())
+            self.assertEqual(fetcher.staged_state(), {})
+
+
+class FakeNotionClient:
+    """Stand-in for the async Notion client with a paginated database and text blocks."""
+
+    def __init__(self, result_pages, failing_query=None, block_delay=0.0):
+        self.result_pages = result_pages
+        self.failing_query = failing_query
+        self.block_delay = block_delay
+        self.block_requests = []
+        self.cancelled_previews = 0
+        self.databases = self
+        self.blocks = self
+        self.children = self
+
+    async def query(self, **params):
+        await asyncio.sleep(0)
+        index = int(params.get("start_cursor") or 0)
+        if index == self.failing_query:
+            raise RequestTimeoutError()
+        has_more = index + 1 < self.result_pages
+        results = [
+            {"id": f"page-{index}-{i}", "url": "https://notion.so/x", "last_edited_time": "2024-01-31T09:15:00.000Z"}
+            for i in range(2)
+        ]
+        return {"results": results, "has_more": has_more, "next_cursor": str(index + 1) if has_more else None}
+
+    async def list(self, block_id, page_size, start_cursor=None):
+        self.block_requests.append(page_size)
+        try:
+            await asyncio.sleep(self.block_delay)
+        except asyncio.CancelledError:
+            self.cancelled_previews += 1
+            raise
+        blocks = [{"type": "paragraph", "paragraph": {"rich_text": [{"plain_text": f"line {i}"}]}} for i in range(page_size)]
+        return {"results": blocks, "has_more": True, "next_cursor": "more"}
+
+
+class TestNotionFetcher(unittest.TestCase):
+    """Test cases for NotionFetcher pagination and block previews."""
+
+    def test_reads_all_result_pages_with_bounded_previews(self):
+        """All query pages are followed and only the preview's worth of blocks is requested."""
+        fake = FakeNotionClient(result_pages=3)
+        with patch.object(NotionFetcher, "_initialize_notion_client", return_value=fake):
+            fetcher = NotionFetcher({
+                "state_store": MemoryStateStore(),
+                "client_registry": ClientRegistry(),
+                "preview_blocks": 3,
+                "use_content_cache": False
+            })
+
+        updates = asyncio.run(fetcher.fetch_updates())
+
+        self.assertEqual(len(updates), 6)
+        self.assertEqual(fake.block_requests, [3] * 6)
+        self.assertEqual(updates[0].content.count("PARAGRAPH:"), 3)
+
+    def test_unchanged_pages_are_served_from_cache(self):
+        """A page whose last_edited_time has not changed costs no block requests."""
+        fake = FakeNotionClient(result_pages=1)
+        cache = ContentCache("notion_blocks", path=":memory:")
+        with patch.object(NotionFetcher, "_initialize_notion_client", return_value=fake):
+            fetcher = NotionFetcher(
+                {"state_store": MemoryStateStore(), "client_registry": ClientRegistry(), "content_cache": cache}
+            )
+
+        first = asyncio.run(fetcher.fetch_updates(full_resync=True))
+        second = asyncio.run(fetcher.fetch_updates(full_resync=True))
+
+        self.assertEqual(len(fake.block_requests), 2)
+        self.assertEqual([u.content for u in first], [u.content for u in second])
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 2))
+
+    def test_failed_query_fails_the_fetch(self):
+        """A failed query page is raised after the previews in flight are cancelled and awaited."""
+        fake = FakeNotionClient(result_pages=3, failing_query=2, block_delay=1.0)
+        with patch.object(NotionFetcher, "_initialize_notion_client", return_value=fake):
+            fetcher = NotionFetcher(
+                {"state_store": MemoryStateStore(), "client_registry": ClientRegistry(), "use_content_cache": False}
+            )
+
+        async def fetch():
+            with self.assertRaises(RequestTimeoutError):
+                await fetcher.fetch_updates()
+            return fake.cancelled_previews
+
+        cancelled = asyncio.run(fetch())
+        self.assertGreater(cancelled, 0)
+        self.assertEqual(cancelled, len(fake.block_requests))
+        self.assertEqual(fetcher.staged_state(), {})
+
+
+async def _stream(source, pages, delay=0.0):
+    for page in pages:
+        await asyncio.sleep(delay)
+        yield [Update.trusted(source=source, content=str(ts), timestamp=ts) for ts in page]
+
+
+class TestUpdateStreamMerger(unittest.IsolatedAsyncioTestCase):
+    """Test cases for merging per-source update streams."""
+
+    async def test_merges_newest_first(self):
+        """Pages from several streams come out as one timestamp-ordered stream."""
+        merger = UpdateStreamMerger(
+            {"a": _stream("a", [[10, 8], [5, 1]]), "b": _stream("b", [[9, 7, 6], [2]], delay=0.01)},
+            page_size=3
+        )
+
+        pages = [page async for page in merger]
+
+        self.assertEqual([u.content for page in pages for u in page], ["10", "9", "8", "7", "6", "5", "2", "1"])
+        self.assertTrue(all(len(page) <= 3 for page in pages))
+        self.assertEqual({name: r["count"] for name, r in merger.report.items()}, {"a": 4, "b": 4})
+
+    async def test_slow_stream_is_dropped_at_its_deadline(self):
+        """A stream past its deadline is dropped without holding back the others."""
+        merger = UpdateStreamMerger(
+            {"fast": _stream("fast", [[3, 2]]), "slow": _stream("slow", [[100]], delay=5)},
+            timeouts={"slow": 0.1}
+        )
+
+        started = time.perf_counter()
+        updates = [u async for page in merger for u in page]
+
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual([u.content for u in updates], ["3", "2"])
+        self.assertEqual(merger.failed, ["slow"])
+        self.assertIn("timed out", merger.report["slow"]["error"])
+
+
+class TestUpdates(unittest.TestCase):
+    """Test cases for Update normalization."""
+
+    def test_timestamps_are_normalized_to_utc(self):
+        """Naive, offset and epoch timestamps all become comparable UTC datetimes."""
+        naive = Update(source="a", content="x", timestamp=datetime(2024, 1, 1, 12))
+        offset = Update(source="b", content="y", timestamp=datetime(2024, 1, 1, 14, tzinfo=timezone(timedelta(hours=1))))
+        trusted = Update.trusted(source="c", content="z", timestamp=1704110400.0)
+
+        self.assertEqual(naive.timestamp.tzinfo, timezone.utc)
+        self.assertEqual(offset.timestamp, datetime(2024, 1, 1, 13, tzinfo=timezone.utc))
+        self.assertEqual(trusted.timestamp, naive.timestamp)
+        self.assertEqual(sorted([offset, naive, trusted], key=lambda u: u.timestamp)[-1].source, "b")
+        self.assertEqual(trusted.model_fields_set, set(Update.model_fields))
+        self.assertEqual(trusted.model_copy(update={"author": "u"}).model_dump()["content"], "z")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,377 @@
+"""Tests for AutoPM's notifiers."""
+import asyncio
+import itertools
+import socket
+import unittest
+from datetime import datetime, timezone
+from email import message_from_bytes
+
+from aiosmtpd.controller import Controller
+from slack_sdk.errors import SlackApiError
+
+from clients.client_registry import ClientRegistry
+from notifiers.base_notifier import BaseNotifier, NotificationResult
+from notifiers.broadcaster import Broadcaster, Destination
+from notifiers.email_notifier import EmailNotifier, PersonalizedEmail
+from notifiers.slack_blocks import MAX_SECTION_CHARS, block_chars, pack_messages, split_text
+from notifiers.slack_notifier import SlackNotifier
+from renderers.rendered_digest import RenderedDigest
+from renderers.slack_renderer import BlockKitRenderer
+from summarizers.base_summarizer import DigestSummary, SummaryItem
+
+
+class FakeSlackClient:
+    """Slack client double whose replies reach the server after the given delays."""
+
+    def __init__(self, delays=()):
+        self.delays = iter(delays)
+        self.clock = itertools.count(1)
+        self.messages = {}  # ts -> payload
+        self.list_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat_postMessage(self, channel, thread_ts=None, **payload):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(next(self.delays, 0))
+        finally:
+            self.in_flight -= 1
+        ts = f"1700000000.{next(self.clock):06d}"
+        self.messages[ts] = dict(payload, thread_ts=thread_ts)
+        return {"ok": True, "channel": "C123", "ts": ts}
+
+    async def conversations_history(self, channel, oldest, **kwargs):
+        if channel != "C123":
+            raise SlackApiError("channel_not_found", {"ok": False, "error": "channel_not_found"})
+        history = [dict(message, ts=ts) for ts, message in self.messages.items() if message["thread_ts"] is None]
+        return {"ok": True, "messages": history[::-1]}
+
+    async def conversations_list(self, types, exclude_archived, limit, cursor=None):
+        self.list_calls += 1
+        if cursor is None:
+            return {"ok": True, "channels": [{"id": "C999", "name": "general"}], "response_metadata": {"next_cursor": "2"}}
+        return {"ok": True, "channels": [{"id": "C123", "name": "digests"}], "response_metadata": {"next_cursor": ""}}
+
+
+def _summary(items_per_section, words=40):
+    text = " ".join(["word"] * words)
+    return DigestSummary(
+        timestamp=datetime(2024, 5, 1, tzinfo=timezone.utc),
+        **{
+            section: [SummaryItem(content=f"{section} {i} {text}", source=f"jira:A-{i}") for i in range(items_per_section)]
+            for section in ("progress", "blockers", "next_steps")
+        }
+    )
+
+
+def _notifier(client, **config):
+    notifier = SlackNotifier({"client_registry": ClientRegistry(rate_limits={}), **config})
+    notifier.client = client
+    return notifier
+
+
+class RecordingHandler:
+    """aiosmtpd handler that keeps every message and the session it came in on."""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.messages = []  # (session id, recipients, parsed message)
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((id(session), list(envelope.rcpt_tos), message_from_bytes(envelope.content)))
+        return "250 Message accepted"
+
+
+class DelayedNotifier(BaseNotifier):
+    """Notifier double that takes `delay` seconds per send and records its peak concurrency."""
+
+    def __init__(self, delay, registry):
+        super().__init__({"client_registry": registry})
+        self.delay = delay
+        self.prepared = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.sent = []
+
+    def prepare(self, digest):
+        self.prepared += 1
+        return {"content": digest.markdown.upper()}
+
+    def destination_kwargs(self, target):
+        return {"target": target}
+
+    async def send(self, content, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.wait_for(asyncio.sleep(self.delay), kwargs.get("request_timeout"))
+        finally:
+            self.in_flight -= 1
+        self.sent.append((kwargs["target"], content))
+        return NotificationResult(success=True, message="sent")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestSlackBlocks(unittest.TestCase):
+    """Test cases for Block Kit rendering and packing."""
+
+    def test_messages_respect_limits_and_keep_items_whole(self):
+        """Packed messages stay under the limits, items are never split, headers never end a message."""
+        summary = _summary(items_per_section=120)
+
+        messages = pack_messages(BlockKitRenderer().render(summary), max_blocks=20, max_chars=6000)
+
+        self.assertGreater(len(messages), 1)
+        texts = []
+        for blocks in messages:
+            self.assertLessEqual(len(blocks), 20)
+            self.assertLessEqual(sum(block_chars(block) for block in blocks), 6000)
+            self.assertNotEqual(blocks[-1]["type"], "header")
+            self.assertNotEqual(blocks[0]["type"], "divider")
+            for block in blocks:
+                if block["type"] == "section":
+                    self.assertLessEqual(len(block["text"]["text"]), MAX_SECTION_CHARS)
+                    texts.extend(block["text"]["text"].split("\n"))
+        items = [line for line in texts if not line.startswith("_Source")]
+        self.assertEqual(len(items), 360)
+        self.assertTrue(all(line.endswith("word") for line in items))
+
+    def test_split_text_prefers_structure_and_reopens_code_blocks(self):
+        """Text breaks at paragraphs before lines and words, and split code blocks stay fenced."""
+        paragraphs = ["alpha " * 30, "beta " * 30, "```\n" + "code line\n" * 40 + "```"]
+        chunks = split_text("\n\n".join(paragraphs), 200)
+
+        self.assertTrue(all(len(chunk) <= 200 for chunk in chunks))
+        self.assertTrue(chunks[0].startswith("alpha") and "beta" not in chunks[0])
+        self.assertTrue(all(chunk.count("```") % 2 == 0 for chunk in chunks))
+        self.assertEqual({word for chunk in chunks for word in chunk.split()}, {"alpha", "beta", "code", "line", "```"})
+
+
+class TestSlackNotifier(unittest.IsolatedAsyncioTestCase):
+    """Test cases for posting digests to Slack."""
+
+    async def test_replies_are_posted_in_order(self):
+        """Each reply waits for the one before it, so slow requests cannot reorder the thread."""
+        client = FakeSlackClient(delays=[0, 0.05, 0.0, 0.02, 0])
+        notifier = _notifier(client, max_message_chars=3500)
+        summary = _summary(items_per_section=30)
+        expected = notifier.build_messages(RenderedDigest(summary))
+        self.assertGreaterEqual(len(expected), 4)
+
+        result = await notifier.send("", channel="#digests", summary=summary)
+
+        self.assertTrue(result.success, result.message)
+        self.assertEqual(client.max_in_flight, 1)
+        posted = [client.messages[ts] for ts in sorted(client.messages)]
+        self.assertEqual([message["blocks"] for message in posted], [payload["blocks"] for payload in expected])
+        parent = min(client.messages)
+        self.assertIsNone(posted[0]["thread_ts"])
+        self.assertTrue(all(message["thread_ts"] == parent for message in posted[1:]))
+
+    async def test_timeout_applies_to_each_request(self):
+        """A thread of several messages may take longer than the timeout; a single slow request may not."""
+        client = FakeSlackClient(delays=[0.03] * 5)
+        notifier = _notifier(client, max_text_chars=100)
+        content = "\n".join(f"- item {i} is on track" for i in range(20))
+
+        result = await notifier.send(content, request_timeout=0.05)
+
+        self.assertTrue(result.success, result.message)
+        self.assertGreater(len(client.messages), 3)
+
+        client.delays = iter([0.2])
+        result = await notifier.send(content, request_timeout=0.05)
+
+        self.assertFalse(result.success)
+        self.assertEqual(result.message, "A Slack request timed out after 0.05s")
+
+    async def test_plain_text_is_chunked_into_a_thread(self):
+        """Without a summary the markdown is split into a parent message and replies."""
+        client = FakeSlackClient()
+        notifier = _notifier(client, max_text_chars=100)
+        content = "\n".join(f"- item {i} is on track" for i in range(30))
+
+        result = await notifier.send(content)
+
+        self.assertTrue(result.success, result.message)
+        posted = [client.messages[ts]["text"] for ts in sorted(client.messages)]
+        self.assertEqual("\n".join(posted), content)
+
+    async def test_interrupted_delivery_is_not_posted_twice(self):
+        """A retry with the same idempotency key finds the earlier digest in the channel."""
+        client = FakeSlackClient()
+        notifier = _notifier(client)
+
+        first = await notifier.send("digest", channel="C123", idempotency_key="key-1")
+        retry = await notifier.send("digest", channel="C123", idempotency_key="key-1", delivered_after=0)
+        other = await notifier.send("digest", channel="C123", idempotency_key="key-2", delivered_after=0)
+
+        self.assertTrue(retry.details["deduplicated"])
+        self.assertEqual(retry.details["thread_ts"], first.details["thread_ts"])
+        self.assertNotIn("deduplicated", other.details)
+        self.assertEqual(len(client.messages), 2)
+        self.assertEqual(client.messages[first.details["thread_ts"]]["metadata"]["event_payload"], {"idempotency_key": "key-1"})
+
+    async def test_channel_names_are_resolved_for_deduplication(self):
+        """A destination given by name is looked up once and checked by id."""
+        client = FakeSlackClient()
+        notifier = _notifier(client)
+
+        first = await notifier.send("digest", channel="#digests", idempotency_key="key-1")
+        retries = await asyncio.gather(*(
+            notifier.send("digest", channel="#digests", idempotency_key="key-1", delivered_after=0) for _ in range(3)
+        ))
+
+        self.assertTrue(all(retry.details.get("deduplicated") for retry in retries))
+        self.assertEqual(retries[0].details["thread_ts"], first.details["thread_ts"])
+        self.assertEqual(len(client.messages), 1)
+        self.assertEqual(client.list_calls, 2)  # Two pages, listed once
+
+
+
+class TestEmailNotifier(unittest.IsolatedAsyncioTestCase):
+    """Test cases for pooled SMTP delivery against a local server."""
+
+    def _start_server(self, handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        self.addCleanup(controller.stop)
+        return controller
+
+    def _notifier(self, controller, **config):
+        registry = ClientRegistry()
+        self.addAsyncCleanup(registry.close)
+        return EmailNotifier({
+            "client_registry": registry,
+            "smtp_server": controller.hostname,
+            "smtp_port": controller.port,
+            "sender_email": "autopm@example.com",
+            "use_tls": False,
+            **config
+        })
+
+    async def test_batch_reuses_a_few_connections_for_many_recipients(self):
+        """Personalized emails share pooled sessions; a refused address only fails its own email."""
+        handler = RecordingHandler(refuse=["gone@example.com"])
+        notifier = self._notifier(self._start_server(handler), max_connections=3)
+        recipients = [f"user{i}@example.com" for i in range(20)] + ["gone@example.com"]
+
+        result = await notifier.send_batch([
+            PersonalizedEmail(to=address, subject="Digest", content=f"Hello {address}") for address in recipients
+        ])
+
+        self.assertFalse(result.success)
+        self.assertEqual(list(result.details["failed"]), ["gone@example.com"])
+        self.assertEqual(sorted(result.details["sent"]), sorted(recipients[:-1]))
+        self.assertLessEqual(notifier.pool.connections_opened, 3)
+        self.assertLessEqual(len({session for session, _, _ in handler.messages}), 3)
+        for _, rcpt_tos, message in handler.messages:
+            self.assertEqual(rcpt_tos, [message["To"]])
+            self.assertIn(message["To"], message.get_payload()[0].get_payload(decode=True).decode())
+
+    async def test_sends_reuse_the_pooled_connection(self):
+        """Consecutive sends go over one connection, and a connection the server closed is replaced."""
+        handler = RecordingHandler()
+        notifier = self._notifier(self._start_server(handler))
+
+        for _ in range(3):
+            result = await notifier.send(
+                "Digest body", subject="Digest", to_emails=["team@example.com"], bcc_emails=["pm@example.com"]
+            )
+            self.assertTrue(result.success, result.message)
+        self.assertEqual(notifier.pool.connections_opened, 1)
+        self.assertEqual(handler.messages[0][1], ["team@example.com", "pm@example.com"])
+        self.assertIsNone(handler.messages[0][2]["Bcc"])
+
+        # A session that dropped while idle is discarded and replaced
+        (smtp, _), = notifier.pool._idle
+        smtp.close()
+        result = await notifier.send("Digest body", subject="Digest", to_emails=["team@example.com"])
+
+        self.assertTrue(result.success, result.message)
+        self.assertEqual(notifier.pool.connections_opened, 2)
+        self.assertEqual(len(handler.messages), 4)
+
+    async def test_digests_go_out_as_html_with_a_plain_text_alternative(self):
+        """Broadcast digests are rendered to HTML once and sent with the markdown alongside."""
+        handler = RecordingHandler()
+        notifier = self._notifier(self._start_server(handler))
+        summary = _summary(items_per_section=2)
+
+        results = await Broadcaster({"email": notifier}).broadcast(
+            summary.to_markdown(), Destination.parse_list("email:team@example.com, email:leads@example.com"), summary
+        )
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(handler.messages), 2)
+        for _, _, message in handler.messages:
+            plain, html = message.get_payload()
+            self.assertEqual(plain.get_content_type(), "text/plain")
+            self.assertTrue(plain.get_payload(decode=True).decode().startswith("# Project Update Digest"))
+            self.assertEqual(html.get_content_type(), "text/html")
+            self.assertIn("<h2 style=", html.get_payload(decode=True).decode())
+
+
+
+class TestBroadcaster(unittest.IsolatedAsyncioTestCase):
+    """Test cases for concurrent multi-destination delivery."""
+
+    async def test_many_destinations_take_about_as_long_as_the_slowest(self):
+        """Deliveries overlap within per-notifier limits, and each notifier renders once."""
+        registry = ClientRegistry()
+        slack, email = DelayedNotifier(0.1, registry), DelayedNotifier(0.2, registry)
+        broadcaster = Broadcaster({"slack": slack, "email": email}, {"concurrency": {"slack": 20, "email": 2}})
+        destinations = Destination.parse_list(
+            ",".join([f"slack:#team-{i}" for i in range(40)] + [f"email:list{i}@example.com" for i in range(3)])
+        )
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await broadcaster.broadcast("digest", destinations)
+        elapsed = loop.time() - started
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual([result.destination for result in results], [d.label for d in destinations])
+        # 40 Slack sends at 20 at a time and 3 emails at 2 at a time: two rounds each
+        self.assertLess(elapsed, 0.7)
+        self.assertEqual((slack.peak, email.peak), (20, 2))
+        self.assertEqual((slack.prepared, email.prepared), (1, 1))
+        self.assertEqual(set(content for _, content in slack.sent), {"DIGEST"})
+        self.assertGreater(results[-1].queued_seconds, 0.1)
+
+    async def test_timeouts_and_unknown_notifiers_fail_only_their_destination(self):
+        """A slow or unconfigured destination is reported without holding up the others."""
+        registry = ClientRegistry()
+        broadcaster = Broadcaster(
+            {"slack": DelayedNotifier(0, registry), "email": DelayedNotifier(5, registry)}, {"timeouts": {"email": 0.05}}
+        )
+
+        results = await broadcaster.broadcast(
+            "digest", Destination.parse_list("slack:#general, email:team@example.com, teams:General")
+        )
+
+        self.assertEqual([result.success for result in results], [True, False, False])
+        self.assertEqual(results[1].message, "A request timed out after 0.05s")
+        self.assertIn("not configured", results[2].message)
+
+    def test_parse_list_rejects_entries_without_a_target(self):
+        """Destination specs must be notifier:target pairs."""
+        with self.assertRaises(ValueError):
+            Destination.parse_list("slack:#general, email")
+
+
+if __name__ == "__main__":
+    unittest.main()
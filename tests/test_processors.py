@@ -0,0 +1,146 @@
+"""Tests for AutoPM's update processors."""
+import unittest
+from datetime import datetime, timezone
+
+from fetchers.base_fetcher import Update
+from processors.deduplicator import NearDuplicateCollapser
+from processors.relevance_scorer import LINE_OVERHEAD_TOKENS, RelevanceScorer
+
+ANNOUNCEMENT = (
+    "We are excited to announce that the payments service migration to the new cluster "
+    "is complete and all traffic is now served from us-east-2 with no downtime"
+)
+
+
+def _update(source, content, timestamp, url="", metadata=None):
+    return Update(
+        source=source,
+        content=content,
+        timestamp=datetime.fromtimestamp(timestamp, timezone.utc),
+        url=url,
+        metadata=metadata or {},
+    )
+
+
+class TestNearDuplicateCollapser(unittest.TestCase):
+    """Test cases for NearDuplicateCollapser."""
+
+    def test_cross_posts_collapse_into_one(self):
+        """Lightly edited copies collapse into the longest one, which lists the others."""
+        updates = [
+            _update("slack:#general", "FYI " + ANNOUNCEMENT, 300, url="https://slack/1"),
+            _update("notion:Launches", "Weekly planning notes for the onboarding flow redesign and billing page", 250),
+            _update("jira:OPS-1", "Comment: " + ANNOUNCEMENT.replace("excited", "thrilled"), 200, url="https://jira/1"),
+            _update("slack:#engineering", ANNOUNCEMENT + " Thanks to the infra team!", 100, url="https://slack/2"),
+        ]
+
+        result = NearDuplicateCollapser().process(updates)
+
+        self.assertEqual([u.source for u in result], ["notion:Launches", "slack:#engineering"])
+        self.assertEqual(result[1].metadata["duplicate_urls"], ["https://slack/1", "https://jira/1"])
+        self.assertEqual(result[1].metadata["duplicate_sources"], ["slack:#general", "jira:OPS-1"])
+        self.assertEqual(result[0].metadata, {})
+
+    def test_short_messages_only_collapse_when_identical(self):
+        """Messages too short to fingerprint are compared by their normalized text."""
+        updates = [
+            _update("slack:#a", "LGTM", 3),
+            _update("slack:#b", "lgtm!", 2),
+            _update("slack:#c", "LGTM, ship it", 1),
+        ]
+
+        result = NearDuplicateCollapser().process(updates)
+
+        self.assertEqual([u.source for u in result], ["slack:#b", "slack:#c"])
+
+    def test_short_replies_from_other_authors_or_threads_are_kept(self):
+        """Identical short replies only collapse when the same author repeats them in the same thread."""
+        updates = [
+            Update(source="slack:C1:thread", content="+1", author=author, metadata={"thread_ts": thread}, timestamp=ts)
+            for ts, (author, thread) in enumerate([("U1", "1.0"), ("U2", "1.0"), ("U1", "2.0"), ("U1", "1.0")], 1)
+        ]
+
+        result = NearDuplicateCollapser().process(updates)
+
+        self.assertEqual([(u.author, u.metadata["thread_ts"]) for u in result], [("U1", "1.0"), ("U2", "1.0"), ("U1", "2.0")])
+        self.assertEqual(result[0].metadata["duplicate_sources"], ["slack:C1:thread"])
+
+    def test_exact_copies_collapse_without_pairwise_comparison(self):
+        """Many identical posts are grouped by hash instead of being compared with each other."""
+        updates = [_update(f"slack:#c{i}", ANNOUNCEMENT, i) for i in range(200)]
+        collapser = NearDuplicateCollapser()
+        comparisons = []
+        original = collapser._is_duplicate
+        collapser._is_duplicate = lambda a, b: comparisons.append(1) or original(a, b)
+
+        result = collapser.process(updates)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(len(result[0].metadata["duplicate_sources"]), 199)
+        self.assertEqual(comparisons, [])
+
+
+
+class TestRelevanceScorer(unittest.TestCase):
+    """Test cases for RelevanceScorer."""
+
+    def test_keeps_top_k_in_input_order_and_reports_drops(self):
+        """The highest-scoring updates are kept in their original order; the rest are reported."""
+        hour = 3600
+        updates = [
+            _update("slack:C1", "thanks!", 10 * hour, url="https://slack/thanks"),
+            _update("jira:OPS-7", "Checkout fails for EU customers after the deploy", 9 * hour,
+                    metadata={"priority": "Highest", "status": "Blocked", "issue_type": "Bug"}),
+            _update("slack:C1", "Lunch options for the offsite are in the doc", 8 * hour),
+            _update("slack:C2", "Migration plan for the billing database is ready for review", 2 * hour,
+                    metadata={"reactions": [{"name": "eyes", "count": 6}], "reply_count": 12}),
+        ]
+
+        scorer = RelevanceScorer({"max_updates": 2})
+        result = scorer.process(updates)
+
+        self.assertEqual([u.source for u in result], ["jira:OPS-7", "slack:C2"])
+        report = scorer.last_report
+        self.assertEqual((report.kept, report.dropped), (2, 2))
+        self.assertEqual(report.dropped_by_reason, {"max_updates": 2})
+        self.assertEqual(report.dropped_by_source, {"slack": 2})
+        # The short "thanks!" is penalized below the older chatter
+        self.assertEqual([d.url for d in report.top_dropped][-1], "https://slack/thanks")
+
+    def test_token_budget_and_source_quota(self):
+        """Selection stops at the token budget, and one source cannot take more than its share."""
+        updates = [
+            _update(f"slack:C{i}", f"Standup note {i}: " + "rollout looks healthy " * 20, 100 - i)
+            for i in range(6)
+        ] + [_update("jira:OPS-1", "Rollback plan drafted for the payments cutover", 50)]
+
+        scorer = RelevanceScorer({"token_budget": 400, "source_quotas": {"slack": 0.5}})
+        per_update = scorer.estimate_tokens(updates[0])
+        result = scorer.process(updates)
+
+        kept_slack = [u for u in result if u.source.startswith("slack:")]
+        self.assertEqual(len(kept_slack), 200 // per_update)
+        self.assertIn("jira:OPS-1", [u.source for u in result])
+        self.assertLessEqual(scorer.last_report.tokens, 400)
+        self.assertIn("source_quota", scorer.last_report.dropped_by_reason)
+        self.assertEqual(scorer.last_report.kept + scorer.last_report.dropped, len(updates))
+
+    def test_stops_counting_once_the_budget_is_spent(self):
+        """Shorter updates still fill leftover budget, but nothing is counted once none can fit."""
+        updates = [_update("jira:A-1", "Long design review notes " * 10, 100), _update("jira:A-2", "Short note on rollout", 90)]
+        updates += [_update(f"jira:B-{i}", f"Backlog item {i} groomed", 80 - i) for i in range(50)]
+        scorer = RelevanceScorer({"source_quotas": {}})
+        scorer.token_budget = scorer.estimate_tokens(updates[1]) + LINE_OVERHEAD_TOKENS
+        counted = []
+        estimate = scorer.estimate_tokens
+        scorer.estimate_tokens = lambda update: counted.append(update.source) or estimate(update)
+
+        result = scorer.process(updates)
+
+        self.assertEqual([u.source for u in result], ["jira:A-2"])
+        self.assertEqual(counted, ["jira:A-1", "jira:A-2"])
+        self.assertEqual(scorer.last_report.dropped_by_reason, {"token_budget": 51})
+
+
+if __name__ == "__main__":
+    unittest.main()
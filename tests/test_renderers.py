@@ -0,0 +1,106 @@
+"""Tests for AutoPM's digest renderers."""
+import unittest
+from datetime import datetime, timezone
+
+from renderers.html_renderer import HtmlRenderer
+from renderers.markdown_renderer import MarkdownRenderer
+from renderers.rendered_digest import BLOCK_KIT, DEFAULT_RENDERERS, HTML, MARKDOWN, SLACK_MRKDWN, RenderedDigest
+from renderers.slack_renderer import SlackMrkdwnRenderer
+from summarizers.base_summarizer import DigestSummary, SummaryItem
+
+
+def _summary():
+    return DigestSummary(
+        timestamp=datetime(2024, 5, 1, 17, 0, tzinfo=timezone.utc),
+        progress=[
+            SummaryItem(content="Shipped **search** <beta>", source="jira:A-1"),
+            SummaryItem(content="See [the plan](https://example.com/plan?a=1&b=2)", source=""),
+        ],
+        next_steps=[SummaryItem(content="Run `migrate` & deploy", source="slack:C1")]
+    )
+
+
+class CountingRenderer:
+    """Wraps a renderer and counts how often it renders."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.calls = 0
+
+    def render(self, summary):
+        self.calls += 1
+        return self.renderer.render(summary)
+
+
+class TestTemplateRenderers(unittest.TestCase):
+    """Test cases for the text formats."""
+
+    def test_markdown_layout(self):
+        """Markdown keeps the digest's established layout."""
+        self.assertEqual(
+            MarkdownRenderer().render(_summary()),
+            "# Project Update Digest\n"
+            "*Generated at: 2024-05-01 17:00 UTC*\n"
+            "\n## Progress\n"
+            "1. Shipped **search** <beta>\n*Source: jira:A-1*\n"
+            "2. See [the plan](https://example.com/plan?a=1&b=2)\n"
+            "\n## Next Steps\n"
+            "1. Run `migrate` & deploy\n*Source: slack:C1*\n"
+        )
+
+    def test_slack_mrkdwn_escapes_and_converts_markup(self):
+        """Slack control characters are escaped and markdown bold and links become mrkdwn."""
+        rendered = SlackMrkdwnRenderer().render(_summary())
+
+        self.assertIn("1. Shipped *search* &lt;beta&gt;\n_Source: jira:A-1_", rendered)
+        self.assertIn("<https://example.com/plan?a=1&amp;b=2|the plan>", rendered)
+        self.assertTrue(rendered.startswith("*Project Update Digest*\n"))
+        self.assertNotIn("Blockers", rendered)
+
+    def test_html_is_escaped_and_styled_inline(self):
+        """HTML escapes item text, converts markup and styles every element without a stylesheet."""
+        rendered = HtmlRenderer().render(_summary())
+
+        self.assertIn("Shipped <strong>search</strong> &lt;beta&gt;", rendered)
+        self.assertIn('<a href="https://example.com/plan?a=1&amp;b=2" style="color:#0052cc;">the plan</a>', rendered)
+        self.assertIn(">migrate</code> &amp; deploy", rendered)
+        self.assertIn("Source: slack:C1</span>", rendered)
+        self.assertNotIn("<style", rendered)
+        for tag in ("<h1", "<h2", "<ol", "<li"):
+            self.assertTrue(all(part.startswith(" style=") for part in rendered.split(tag)[1:]), tag)
+        self.assertEqual(rendered.count("<li "), 3)
+
+
+class TestRenderedDigest(unittest.TestCase):
+    """Test cases for lazy, cached rendering."""
+
+    def test_each_format_is_rendered_once_on_first_use(self):
+        """Formats render lazily and repeated requests reuse the first rendering."""
+        renderers = {format: CountingRenderer(renderer) for format, renderer in DEFAULT_RENDERERS.items()}
+        digest = RenderedDigest(_summary(), renderers=renderers)
+
+        self.assertEqual(digest.rendered_formats, [])
+        html = digest.render(HTML)
+        for _ in range(5):
+            self.assertIs(digest.render(HTML), html)
+            digest.render(BLOCK_KIT)
+
+        self.assertEqual(digest.rendered_formats, [HTML, BLOCK_KIT])
+        self.assertEqual({format: renderer.calls for format, renderer in renderers.items()}, {
+            MARKDOWN: 0, SLACK_MRKDWN: 0, BLOCK_KIT: 1, HTML: 1
+        })
+
+    def test_markdown_only_digest(self):
+        """Without a summary the given markdown is the only format."""
+        digest = RenderedDigest(markdown="# Digest")
+
+        self.assertEqual(digest.markdown, "# Digest")
+        self.assertFalse(digest.can_render(HTML))
+        with self.assertRaises(ValueError):
+            digest.render(HTML)
+        with self.assertRaises(ValueError):
+            RenderedDigest(_summary()).render("pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
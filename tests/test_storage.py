@@ -0,0 +1,110 @@
+"""Tests for AutoPM's local storage."""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from storage.content_cache import ContentCache
+from storage.run_journal import RunJournal
+from storage.state_store import SQLiteStateStore
+
+
+class TestSQLiteStateStore(unittest.TestCase):
+    """Test cases for SQLiteStateStore."""
+
+    def test_round_trip_and_prune(self):
+        """Values survive a round trip and stale entries are pruned."""
+        store = SQLiteStateStore(":memory:")
+        store.set_many("ns", {"a": 1.5, "b": "x"})
+
+        self.assertEqual(store.get_many("ns", ["a", "b", "c"]), {"a": 1.5, "b": "x"})
+        self.assertEqual(store.prune("ns", time.time() + 1), 2)
+        self.assertIsNone(store.get("ns", "a"))
+
+
+class TestContentCache(unittest.TestCase):
+    """Test cases for ContentCache eviction."""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Reading an entry protects it from LRU eviction."""
+        cache = ContentCache("test", path=":memory:", max_entries=2)
+        with patch("storage.content_cache.time.time", side_effect=[1, 2, 3, 4, 5, 6]):
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_expired_entries_are_misses(self):
+        """Entries older than the TTL are not returned."""
+        cache = ContentCache("test", path=":memory:", ttl_seconds=10)
+        with patch("storage.content_cache.time.time", return_value=100):
+            cache.set("a", [1, 2])
+        with patch("storage.content_cache.time.time", return_value=105):
+            self.assertEqual(cache.get("a"), [1, 2])
+        with patch("storage.content_cache.time.time", return_value=200):
+            self.assertIsNone(cache.get("a"))
+
+
+
+class TestRunJournal(unittest.TestCase):
+    """Test cases for RunJournal checkpoints and outbox."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "journal.db")
+
+    def _journal(self, **kwargs):
+        journal = RunJournal(self.path, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_unfinished_run_resumes_with_its_checkpoints_and_outbox(self):
+        """A restarted process picks up the open run and only redelivers what did not succeed."""
+        journal = self._journal()
+        run = journal.start("digest")
+        journal.checkpoint(run, "fetched", {"updates": [{"id": "1"}]})
+        journal.checkpoint(run, "summary", {"progress": []})
+        journal.outbox(run, ["slack:#a", "slack:#b", "email:team@example.com"])
+        journal.mark_sending(run, ["slack:#a", "slack:#b", "email:team@example.com"])
+        journal.record_delivery(run, "slack:#a", True, {"message": "sent"})
+        journal.record_delivery(run, "email:team@example.com", False, {"message": "refused"})
+
+        resumed = self._journal().start("digest")
+
+        self.assertTrue(resumed.resumed)
+        self.assertEqual(resumed.run_id, run.run_id)
+        self.assertEqual(resumed.stages, ["fetched", "summary"])
+        self.assertEqual(journal.load(resumed, "fetched"), {"updates": [{"id": "1"}]})
+        self.assertIsNone(journal.load(resumed, "rendered"))
+        outbox = journal.outbox(resumed, ["slack:#a", "slack:#b", "email:team@example.com"])
+        self.assertEqual(
+            {label: entry.status for label, entry in outbox.items()},
+            {"slack:#a": "delivered", "slack:#b": "sending", "email:team@example.com": "failed"}
+        )
+        self.assertEqual(outbox["slack:#a"].result, {"message": "sent"})
+        self.assertEqual(len({entry.idempotency_key for entry in outbox.values()}), 3)
+
+    def test_finished_full_resync_and_expired_runs_start_fresh(self):
+        """Completed runs are never resumed, and resume=False or an old run starts a new one."""
+        journal = self._journal(resume_window=60)
+        first = journal.start("digest")
+        journal.finish(first)
+        second = journal.start("digest")
+        third = journal.start("digest", resume=False)
+
+        self.assertFalse(second.resumed)
+        self.assertNotEqual(second.run_id, first.run_id)
+        self.assertFalse(third.resumed)
+        with patch("storage.run_journal.time.time", return_value=time.time() + 120):
+            self.assertFalse(journal.start("digest").resumed)
+        self.assertEqual(journal.prune(time.time() + 300), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
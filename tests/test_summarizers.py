@@ -0,0 +1,475 @@
+"""Tests for the AutoPM summarizers."""
+import asyncio
+import json
+import re
+import threading
+import time
+import unittest
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from openai import AsyncOpenAI
+
+from fetchers.base_fetcher import Update
+from storage.content_cache import ContentCache
+from storage.state_store import MemoryStateStore
+from summarizers.extractive_summarizer import ExtractiveSummarizer
+from summarizers.keyword_classifier import KeywordClassifier
+from summarizers.openai_summarizer import OpenAISummarizer
+from summarizers.prompt_builder import PromptBuilder, clean_content
+from summarizers.stream_parser import SummaryStreamParser
+from summarizers.token_counter import TokenCounter
+
+
+class FakeCompletions:
+    """Stand-in for the async chat completions API that answers map and reduce prompts."""
+
+    def __init__(self, delay=0.0, fail_reduce=False, piece_size=8, fail_stream_after=None):
+        self.delay = delay
+        self.fail_reduce = fail_reduce
+        self.piece_size = piece_size
+        self.fail_stream_after = fail_stream_after
+        self.stream_finished = False
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        if "Partial summaries:" in prompt:
+            if self.fail_reduce:
+                raise RuntimeError("reduce failed")
+            result = {"progress": [{"content": "merged", "source": "all"}]}
+        else:
+            refs = _refs(prompt)
+            result = {"progress": [{"content": f"{len(refs)} updates", "source": "chunk", "updates": refs}]}
+            if kwargs.get("stream"):
+                # One item per update, so a stream has several items to deliver
+                result = {"progress": [{"content": f"update {ref}", "source": "s", "updates": [ref]} for ref in refs]}
+        if kwargs.get("stream"):
+            return self._stream(json.dumps(result))
+        message = SimpleNamespace(content=json.dumps(result))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    async def _stream(self, text):
+        """Yield the response in small pieces, like a streamed completion."""
+        pieces = [text[i:i + self.piece_size] for i in range(0, len(text), self.piece_size)]
+        for number, piece in enumerate(pieces):
+            if self.fail_stream_after is not None and number >= self.fail_stream_after:
+                raise RuntimeError("stream dropped")
+            await asyncio.sleep(0.001)
+            finish = "stop" if number == len(pieces) - 1 else None
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=finish)])
+        self.stream_finished = True
+
+
+def _refs(prompt):
+    return [int(ref) for ref in re.findall(r"^\[(\d+)\] ", prompt, re.MULTILINE)]
+
+
+def _summarizer(completions, **config):
+    config.setdefault("use_extraction_cache", False)
+    config.setdefault("state_store", MemoryStateStore())
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    with patch.object(OpenAISummarizer, "_initialize_openai_client", return_value=client):
+        return OpenAISummarizer(config)
+
+
+def _updates(count):
+    return [
+        Update.trusted(source=f"slack:C{i}", content=f"Shipped feature {i} " * 20, timestamp=1700000000.0 + i)
+        for i in range(count)
+    ]
+
+
+class TestOpenAISummarizer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for token-budgeted map-reduce summarization."""
+
+    async def test_small_input_uses_one_completion(self):
+        """Updates that fit in one prompt are summarized with a single request."""
+        completions = FakeCompletions()
+        summary = await _summarizer(completions).summarize(_updates(3))
+
+        self.assertEqual(len(completions.prompts), 1)
+        self.assertEqual(summary.progress[0].content, "3 updates")
+
+    async def test_large_input_is_mapped_concurrently_and_reduced(self):
+        """Chunks stay under the token budget, run concurrently and are merged."""
+        completions = FakeCompletions(delay=0.05)
+        summarizer = _summarizer(completions, chunk_tokens=800, max_concurrency=4)
+
+        started = time.perf_counter()
+        summary = await summarizer.summarize(_updates(40))
+
+        map_prompts = [p for p in completions.prompts if "Partial summaries:" not in p]
+        self.assertGreater(len(map_prompts), 4)
+        self.assertEqual(sum(len(_refs(p)) for p in map_prompts), 40)
+        self.assertTrue(all(summarizer.token_counter.count(p) <= 800 for p in completions.prompts))
+        self.assertEqual(completions.max_in_flight, 4)
+        self.assertLess(time.perf_counter() - started, 0.05 * len(map_prompts))
+        self.assertEqual([item.content for item in summary.progress], ["merged"])
+
+    async def test_failed_reduce_keeps_partial_summaries(self):
+        """If merging fails, the chunk summaries are concatenated rather than lost."""
+        completions = FakeCompletions(fail_reduce=True)
+        summary = await _summarizer(completions, chunk_tokens=1500).summarize(_updates(40))
+
+        self.assertGreater(len(summary.progress), 1)
+        self.assertEqual(sum(int(item.content.split()[0]) for item in summary.progress), 40)
+
+    async def test_cached_updates_are_not_sent_again(self):
+        """Only updates missing from the extraction cache reach the model."""
+        completions = FakeCompletions()
+        cache = ContentCache("summary_extractions", path=":memory:")
+        summarizer = _summarizer(completions, extraction_cache=cache)
+        updates = _updates(4)
+
+        await summarizer.summarize(updates[:3])
+        # Whitespace differences do not change the cache key
+        updates[0] = updates[0].model_copy(update={"content": "  " + updates[0].content.replace(" ", "  ")})
+        summary = await summarizer.summarize(updates)
+
+        self.assertEqual(len(_refs(completions.prompts[1])), 1)
+        self.assertIn("Shipped feature 3 ", completions.prompts[1])
+        self.assertEqual(cache.stats.hits, 3)
+        self.assertEqual([item.content for item in summary.progress], ["merged"])
+        self.assertIn("3 updates", completions.prompts[2])
+
+
+    async def test_stream_yields_items_before_completion_ends(self):
+        """Streamed items arrive while the completion is still being generated."""
+        completions = FakeCompletions()
+        summarizer = _summarizer(completions)
+
+        received = []
+        async for section, item in summarizer.summarize_stream(_updates(5)):
+            received.append((section, item.content, completions.stream_finished))
+
+        self.assertEqual([content for _, content, _ in received], [f"update {n}" for n in range(1, 6)])
+        self.assertFalse(received[0][2])
+
+    async def test_dropped_stream_falls_back_for_remaining_updates(self):
+        """If the stream fails, updates not covered by a yielded item use the fallback."""
+        completions = FakeCompletions(fail_stream_after=12)
+        summarizer = _summarizer(completions)
+
+        received = [item.content async for _, item in summarizer.summarize_stream(_updates(5))]
+
+        streamed = [content for content in received if content.startswith("update ")]
+        self.assertTrue(streamed)
+        self.assertEqual(len(received), 5)
+
+    async def test_open_circuit_uses_the_offline_summarizer(self):
+        """While the circuit is open, no request is made and the local summarizer answers."""
+        completions = FakeCompletions()
+        summarizer = _summarizer(completions)
+        for _ in range(summarizer.resilience.policy.failure_threshold):
+            summarizer.resilience.breaker.record_failure()
+
+        summary = await summarizer.summarize(_updates(3))
+
+        self.assertEqual(completions.prompts, [])
+        self.assertTrue(summary.progress)
+        self.assertIn("score", summary.progress[0].metadata)
+
+
+class BatchAPIStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the OpenAI files and batches endpoints.
+
+    A batch reports "in_progress" on its first retrieval and "completed" on the next,
+    answering every request like FakeCompletions except those listed in `failing`.
+    """
+
+    files = {}
+    batches = {}
+    failing = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200, raw=False):
+        body = payload if raw else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            upload = next(part for part in message.get_payload() if part.get_filename())
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = upload.get_payload(decode=True).decode()
+            self._send({"id": file_id, "object": "file", "bytes": len(self.files[file_id]), "created_at": 0,
+                        "filename": upload.get_filename(), "purpose": "batch", "status": "processed"})
+        elif self.path == "/v1/batches":
+            request = json.loads(body)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {"input_file_id": request["input_file_id"], "polls": 0, "status": "validating"}
+            self._send(self._batch(batch_id))
+        elif self.path.endswith("/cancel"):
+            batch_id = self.path.split("/")[3]
+            self.batches[batch_id]["status"] = "cancelled"
+            self._send(self._batch(batch_id))
+        else:
+            self._send({"error": {"message": "not found"}}, status=404)
+
+    def do_GET(self):
+        if self.path.startswith("/v1/batches/"):
+            batch_id = self.path.split("/")[3]
+            batch = self.batches[batch_id]
+            batch["polls"] += 1
+            if batch["status"] != "cancelled":
+                batch["status"] = "in_progress" if batch["polls"] < 2 else "completed"
+            if batch["status"] == "completed" and "output_file_id" not in batch:
+                batch["output_file_id"] = self._run(batch["input_file_id"])
+            self._send(self._batch(batch_id))
+        elif self.path.startswith("/v1/files/") and self.path.endswith("/content"):
+            self._send(self.files[self.path.split("/")[3]].encode(), raw=True)
+        else:
+            self._send({"error": {"message": "not found"}}, status=404)
+
+    def _batch(self, batch_id):
+        batch = self.batches[batch_id]
+        return {"id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions", "completion_window": "24h",
+                "created_at": 0, "input_file_id": batch["input_file_id"], "status": batch["status"],
+                "output_file_id": batch.get("output_file_id")}
+
+    def _run(self, input_file_id):
+        lines = []
+        for line in self.files[input_file_id].splitlines():
+            request = json.loads(line)
+            if request["custom_id"] in self.failing:
+                lines.append({"custom_id": request["custom_id"], "response": {"status_code": 500, "body": {}}})
+                continue
+            refs = _refs(request["body"]["messages"][-1]["content"])
+            result = {"progress": [{"content": f"{len(refs)} updates", "source": "batch", "updates": refs}]}
+            choice = {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": json.dumps(result)}}
+            lines.append({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": {"choices": [choice]}}})
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = "\n".join(json.dumps(line) for line in lines)
+        return file_id
+
+
+class TestBatchMode(unittest.IsolatedAsyncioTestCase):
+    """Test cases for summarizing through the batch API."""
+
+    def setUp(self):
+        BatchAPIStandIn.files, BatchAPIStandIn.batches, BatchAPIStandIn.failing = {}, {}, set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), BatchAPIStandIn)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _summarizer(self, completions, **config):
+        client = AsyncOpenAI(api_key="test", base_url=f"http://127.0.0.1:{self.server.server_port}/v1", max_retries=0)
+        client.chat = SimpleNamespace(completions=completions)
+        config.setdefault("state_store", MemoryStateStore())
+        with patch.object(OpenAISummarizer, "_initialize_openai_client", return_value=client):
+            return OpenAISummarizer({"batch_poll_interval": 0.01, "chunk_tokens": 800, **config})
+
+    async def test_batch_results_are_reduced(self):
+        """Map requests go through the batch; a failed request falls back, and the reduce runs live."""
+        BatchAPIStandIn.failing = {"chunk-1"}
+        completions = FakeCompletions()
+        summarizer = self._summarizer(completions, use_extraction_cache=False)
+
+        summary = await summarizer.summarize_batch(_updates(40), job="weekly")
+
+        requests = BatchAPIStandIn.files["file-0"].splitlines()
+        self.assertGreater(len(requests), 2)
+        self.assertEqual(sum(len(_refs(json.loads(r)["body"]["messages"][-1]["content"])) for r in requests), 40)
+        # Only the reduce stage uses live completions
+        self.assertTrue(all("Partial summaries:" in prompt for prompt in completions.prompts))
+        self.assertIn('"source": "batch"', completions.prompts[0])
+        self.assertEqual([item.content for item in summary.progress], ["merged"])
+        self.assertIsNone(summarizer.state_store.get("openai_batches", "weekly"))
+
+    async def test_prepared_batch_fills_the_extraction_cache(self):
+        """A batch submitted early is collected by a later run, which only sends new updates."""
+        store = MemoryStateStore()
+        cache = ContentCache("summary_extractions", path=":memory:")
+        updates = _updates(12)
+        preparer = self._summarizer(FakeCompletions(), state_store=store, extraction_cache=cache)
+        batch_id = await preparer.submit_batch(updates[:10], job="daily")
+
+        completions = FakeCompletions()
+        digest_run = self._summarizer(completions, state_store=store, extraction_cache=cache)
+        self.assertIsNone(await digest_run.collect_batch("daily", wait=0))
+        partials = await digest_run.collect_batch("daily", wait=5)
+        await digest_run.summarize(updates)
+
+        self.assertEqual(batch_id, "batch-0")
+        self.assertEqual(sum(int(p.progress[0].content.split()[0]) for p in partials), 10)
+        self.assertEqual(cache.stats.hits, 10)
+        self.assertEqual(len(_refs(completions.prompts[0])), 2)
+
+
+class TestExtractiveSummarizer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the local extractive summarizer."""
+
+    async def test_central_sentences_are_picked_per_section(self):
+        """Sentences shared by many updates rank first; near-repeats are skipped."""
+        updates = [
+            Update.trusted(source="slack:#eng", timestamp=1700000000.0, url="https://slack/1",
+                           content="The payments migration shipped to the new cluster today. Lunch was great."),
+            Update.trusted(source="jira:PAY-1", timestamp=1700000001.0,
+                           content="Payments migration to the new cluster shipped and verified."),
+            Update.trusted(source="jira:PAY-2", timestamp=1700000002.0,
+                           content="Payments cutover is blocked on the cluster database credentials."),
+            Update.trusted(source="notion:Plan", timestamp=1700000003.0,
+                           content="Next we need to retire the old payments cluster.\nAlso the payments migration shipped to the new cluster today."),
+        ]
+        summarizer = ExtractiveSummarizer({"max_items": 2})
+
+        summary = await summarizer.summarize(updates)
+        again = await summarizer.summarize(updates)
+
+        self.assertEqual(summary.progress[0].content, "The payments migration shipped to the new cluster today.")
+        self.assertEqual(summary.progress[0].metadata["url"], "https://slack/1")
+        self.assertEqual(len(summary.progress), 2)
+        self.assertNotIn("Lunch was great.", [item.content for item in summary.progress])
+        self.assertEqual([item.source for item in summary.blockers], ["jira:PAY-2"])
+        self.assertEqual([item.source for item in summary.next_steps], ["notion:Plan"])
+        self.assertEqual(summary.model_dump(exclude={"timestamp"}), again.model_dump(exclude={"timestamp"}))
+
+
+class TestSummaryStreamParser(unittest.TestCase):
+    """Test cases for incremental summary parsing."""
+
+    def test_items_survive_any_split(self):
+        """Items are emitted whole however the document is split, skipping unknown keys."""
+        document = json.dumps({
+            "progress": [{"content": 'a "}" b', "source": "s", "updates": [1]}],
+            "notes": [{"content": "ignored"}],
+            "next_steps": [{"content": "n{", "source": ""}],
+        })
+        for size in (1, 5, len(document)):
+            parser = SummaryStreamParser(("progress", "blockers", "next_steps"))
+            items = []
+            for start in range(0, len(document), size):
+                items.extend(parser.feed(document[start:start + size]))
+
+            self.assertEqual([(section, item.content) for section, item in items],
+                             [("progress", 'a "}" b'), ("next_steps", "n{")])
+            self.assertTrue(parser.complete)
+            self.assertEqual(parser.result["progress"][0]["updates"], [1])
+
+
+class TestPromptBuilder(unittest.TestCase):
+    """Test cases for prompt compaction."""
+
+    def test_markup_is_stripped(self):
+        """Mentions, links, emoji, emphasis and code blocks are reduced to plain text."""
+        text = (
+            "*Deploy done* :tada: <@U123|alice> see <https://ci/1|the build> in <#C42|eng>\n"
+            "```\ntraceback...\n```  cc <!here> `flag_x` ~old~"
+        )
+
+        self.assertEqual(
+            clean_content(text),
+            "Deploy done @alice see the build in #eng [code] cc @here flag_x old"
+        )
+
+    def test_per_source_budgets_and_savings(self):
+        """Content is cut to its source's budget and the token savings are reported."""
+        builder = PromptBuilder(
+            TokenCounter("gpt-4"), source_budgets={"slack": 20}, default_budget=1000, measure=True
+        )
+        long_text = "word " * 200
+        updates = [
+            Update.trusted(source="slack:#eng", content=long_text, timestamp=1700000000.0),
+            Update.trusted(source="jira:OPS-1", content=long_text, timestamp=1700000000.0),
+        ]
+
+        rendered, stats = builder.format_updates(updates)
+
+        self.assertTrue(rendered[0][0].startswith("[1] slack:#eng 2023-11-14 22:13 | word"))
+        self.assertTrue(rendered[0][0].rstrip().endswith("…"))
+        self.assertLess(rendered[0][1], rendered[1][1])
+        self.assertEqual(stats.tokens_after, rendered[0][1] + rendered[1][1])
+        self.assertGreater(stats.saved_ratio, 0.3)
+
+    def test_savings_are_not_measured_by_default(self):
+        """Without measure the uncompacted rendering is never tokenized."""
+        updates = [Update.trusted(source="slack:#eng", content="Deployed the fix", timestamp=1700000000.0)]
+        calls = {}
+        for measure in (False, True):
+            counter = TokenCounter("gpt-4")
+            count = counter.count
+            calls[measure] = []
+            counter.count = lambda text, seen=calls[measure], count=count: seen.append(text) or count(text)
+            rendered, stats = PromptBuilder(counter, measure=measure).format_updates(updates)
+
+        self.assertEqual(len(calls[True]), len(calls[False]) + 1)
+        self.assertNotIn(calls[True][-1], calls[False])
+        self.assertGreater(stats.tokens_before, 0)
+        self.assertEqual(PromptBuilder(TokenCounter("gpt-4")).format_updates(updates)[1].tokens_before, 0)
+
+
+
+class TestKeywordClassifier(unittest.TestCase):
+    """Test cases for the keyword classifier."""
+
+    def test_batch_uses_weights_and_whole_words(self):
+        """Each text gets its highest-scoring category; keywords only match whole words."""
+        texts = [
+            "Deploy is BLOCKED on creds, will retry tomorrow",
+            "We need  to update the runbook next",
+            "Shipped the importer; unblocked and done",
+            "",
+        ]
+
+        self.assertEqual(
+            KeywordClassifier().classify_batch(texts),
+            ["blockers", "next_steps", "progress", "progress"]
+        )
+
+    def test_keywords_do_not_match_longer_words(self):
+        """Keywords are not found inside or at the start of other words and compounds."""
+        classifier = KeywordClassifier()
+        texts = [
+            "Talked to William about the rollout",
+            "Issued new certs for the API gateway",
+            "Upgraded next.js and the next-gen pipeline",
+            "Unblocked the importer",
+            "Need to document the API",
+        ]
+
+        self.assertEqual(classifier.classify_batch(texts), ["progress", "progress", "progress", "progress", "next_steps"])
+        # Only "need to" scores; "to do" must not match "to document"
+        self.assertEqual(classifier.score_batch(texts[-1:])[0], [0.0, 2.0, 0.0])
+
+    def test_listed_inflections_match(self):
+        """Inflections in the lexicon match as whole words, multi-word terms across whitespace."""
+        classifier = KeywordClassifier()
+
+        self.assertEqual(
+            classifier.classify_batch(["Blocking the release", "Two blockers remain", "Next steps: ship it", "Failed again."]),
+            ["blockers", "blockers", "next_steps", "blockers"]
+        )
+
+    def test_custom_lexicon(self):
+        """A configured lexicon replaces the default one."""
+        classifier = KeywordClassifier({"blockers": {"sev1": 1.0}, "next_steps": {"later": 1.0}})
+
+        self.assertEqual(classifier.classify_batch(["sev1 open", "blocked", "later"]),
+                         ["blockers", "progress", "next_steps"])
+
+
+if __name__ == "__main__":
+    unittest.main()